@@ -1,8 +1,12 @@
 // /src/ableton_db.rs
+use crate::database::core::{sql_placeholders, MAX_SQL_PARAMS};
 use crate::error::DatabaseError;
 use crate::models::PluginFormat;
 use crate::utils::plugins::parse_plugin_format;
-use rusqlite::{params, types::Type, Connection, Result as SqliteResult};
+use rusqlite::{
+    params, params_from_iter, types::Type, Connection, OpenFlags, Result as SqliteResult, Row,
+};
+use std::collections::{HashMap, HashSet};
 use std::path::PathBuf;
 
 #[derive(Debug)]
@@ -24,14 +28,24 @@ pub struct AbletonDatabase {
 }
 
 impl AbletonDatabase {
+    /// Opens Ableton's plugin database read-only. Ableton owns this file, so nothing
+    /// here should take write locks or create journal files next to it; reads are
+    /// served from a memory map rather than per-page read calls.
     pub fn new(db_path: PathBuf) -> Result<Self, DatabaseError> {
-        let conn =
-            Connection::open(db_path).map_err(|e| DatabaseError::ConnectionError(e.to_string()))?;
+        let conn = Connection::open_with_flags(
+            db_path,
+            OpenFlags::SQLITE_OPEN_READ_ONLY | OpenFlags::SQLITE_OPEN_NO_MUTEX,
+        )
+        .map_err(|e| DatabaseError::ConnectionError(e.to_string()))?;
+        conn.pragma_update(None, "mmap_size", 67_108_864)?; // 64 MiB
+        conn.pragma_update(None, "temp_store", "MEMORY")?;
         Ok(Self { conn })
     }
 
-    pub fn get_database_plugins(&self) -> Result<Vec<(String, PluginFormat)>, DatabaseError> {
-        let mut stmt = self.conn.prepare(
+    /// Returns the enabled, scanned plugins as a set, collected straight from the
+    /// rows so lookups against it are O(1) with no intermediate Vec
+    pub fn get_database_plugins(&self) -> Result<HashSet<(String, PluginFormat)>, DatabaseError> {
+        let mut stmt = self.conn.prepare_cached(
             "SELECT name, dev_identifier FROM plugins WHERE scanstate = 1 AND enabled = 1",
         )?;
         let plugin_iter = stmt.query_map(params![], |row| {
@@ -43,9 +57,7 @@ impl AbletonDatabase {
             Ok((name, format))
         })?;
 
-        plugin_iter
-            .collect::<SqliteResult<Vec<_>>>()
-            .map_err(DatabaseError::from)
+        Ok(plugin_iter.collect::<SqliteResult<HashSet<_>>>()?)
     }
 
     pub fn get_plugin_by_dev_identifier(
@@ -54,21 +66,9 @@ impl AbletonDatabase {
     ) -> Result<Option<DbPlugin>, DatabaseError> {
         let mut stmt = self
             .conn
-            .prepare("SELECT * FROM plugins WHERE dev_identifier = ?")?;
-        let result: SqliteResult<DbPlugin> = stmt.query_row(params![dev_identifier], |row| {
-            Ok(DbPlugin {
-                plugin_id: row.get(0)?,
-                module_id: row.get(1)?,
-                dev_identifier: row.get(2)?,
-                name: row.get(3)?,
-                vendor: row.get(4)?,
-                version: row.get(5)?,
-                sdk_version: row.get(6)?,
-                flags: row.get(7)?,
-                parsestate: row.get(8)?,
-                enabled: row.get(9)?,
-            })
-        });
+            .prepare_cached("SELECT * FROM plugins WHERE dev_identifier = ?")?;
+        let result: SqliteResult<DbPlugin> =
+            stmt.query_row(params![dev_identifier], Self::row_to_db_plugin);
 
         match result {
             Ok(plugin) => Ok(Some(plugin)),
@@ -76,4 +76,42 @@ impl AbletonDatabase {
             Err(e) => Err(DatabaseError::QueryError(e.to_string())),
         }
     }
+
+    /// Looks up several plugins at once, keyed by dev identifier. Identifiers that
+    /// are not in the database are simply absent from the map.
+    pub fn get_plugins_by_dev_identifiers(
+        &self,
+        dev_identifiers: &[&str],
+    ) -> Result<HashMap<String, DbPlugin>, DatabaseError> {
+        let mut plugins = HashMap::with_capacity(dev_identifiers.len());
+
+        for chunk in dev_identifiers.chunks(MAX_SQL_PARAMS) {
+            let mut stmt = self.conn.prepare_cached(&format!(
+                "SELECT * FROM plugins WHERE dev_identifier IN ({})",
+                sql_placeholders(chunk.len())
+            ))?;
+            let mut rows = stmt.query(params_from_iter(chunk))?;
+            while let Some(row) = rows.next()? {
+                let plugin = Self::row_to_db_plugin(row)?;
+                plugins.insert(plugin.dev_identifier.clone(), plugin);
+            }
+        }
+
+        Ok(plugins)
+    }
+
+    fn row_to_db_plugin(row: &Row) -> SqliteResult<DbPlugin> {
+        Ok(DbPlugin {
+            plugin_id: row.get(0)?,
+            module_id: row.get(1)?,
+            dev_identifier: row.get(2)?,
+            name: row.get(3)?,
+            vendor: row.get(4)?,
+            version: row.get(5)?,
+            sdk_version: row.get(6)?,
+            flags: row.get(7)?,
+            parsestate: row.get(8)?,
+            enabled: row.get(9)?,
+        })
+    }
 }
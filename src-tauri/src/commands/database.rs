@@ -3,9 +3,13 @@ use serde::Serialize;
 use crate::commands::state::AppState;
 use crate::live_set::LiveSet;
 use crate::database::search::{SearchQuery, SearchResult};
+use crate::database::LiveSetDatabase;
 use chrono::{DateTime, Local};
+use std::collections::HashMap;
+use std::sync::atomic::Ordering;
+use std::sync::Arc;
 
-#[derive(Serialize)]
+#[derive(Serialize, Clone)]
 pub struct ProjectInfo {
     pub id: String,
     pub name: String,
@@ -38,11 +42,14 @@ impl From<LiveSet> for ProjectInfo {
                 live_set.time_signature.denominator
             ),
             key_scale: live_set.key_signature.map(|k| 
-                format!("{:?} {:?}", k.tonic, k.scale)
-            ),
-            duration: live_set.estimated_duration.map(|d| 
-                format!("{}:{:02}", d.num_minutes(), d.num_seconds() % 60)
+                [k.tonic.as_str(), k.scale.as_str()].join(" ")
             ),
+            // Durations are whole seconds in the database, so one integer split
+            // gives both fields
+            duration: live_set.estimated_duration.map(|d| {
+                let seconds = d.num_seconds();
+                format!("{}:{:02}", seconds / 60, seconds % 60)
+            }),
             ableton_version: format!("{}.{}.{}{}", 
                 live_set.ableton_version.major,
                 live_set.ableton_version.minor,
@@ -59,19 +66,94 @@ impl From<LiveSet> for ProjectInfo {
     }
 }
 
+/// The last `list_projects` response and the database version it was built from
+pub struct ProjectListCache {
+    version: (i64, i64),
+    projects: Vec<ProjectInfo>,
+}
+
+/// Recent `search_projects` responses keyed by query and limit, valid for one
+/// database version. Covers repeated queries such as deleting back to an earlier
+/// search or the frontend re-issuing the current one. `projects` holds every
+/// project converted for a response in this version, so a query that narrows the
+/// previous one (typing another letter) only runs the FTS lookup and loads no rows.
+#[derive(Default)]
+pub struct SearchCache {
+    version: (i64, i64),
+    results: HashMap<(String, Option<usize>), Vec<ProjectInfo>>,
+    projects: HashMap<String, ProjectInfo>,
+}
+
+impl SearchCache {
+    /// Empties the cache if it was filled from an older database version
+    fn sync_version(&mut self, version: (i64, i64)) {
+        if self.version != version {
+            self.version = version;
+            self.results.clear();
+            self.projects.clear();
+        }
+    }
+}
+
+/// Responses kept per database version. Every keystroke is a new query, so the
+/// cache is emptied once full rather than tracking recency.
+const SEARCH_CACHE_CAPACITY: usize = 64;
+
+// Database calls block on SQLite, so they run on the blocking pool instead of an
+// async runtime worker. They use the read-only connection, which scans never lock.
+
 #[tauri::command]
 pub async fn list_projects(state: State<'_, AppState>) -> Result<Vec<ProjectInfo>, String> {
-    let db = state.db.lock().map_err(|e| e.to_string())?;
-    db.get_all_projects_with_status(Some(true))
-        .map_err(|e| e.to_string())
-        .map(|projects| projects.into_iter().map(ProjectInfo::from).collect())
+    let db = Arc::clone(&state.read_db);
+    let cache = Arc::clone(&state.project_list_cache);
+    let search_cache = Arc::clone(&state.search_cache);
+    tokio::task::spawn_blocking(move || -> Result<Vec<ProjectInfo>, String> {
+        let db = db.lock().map_err(|e| e.to_string())?;
+
+        // The list only changes when a scan or the watcher writes, so reuse the last
+        // response until the database version moves
+        let version = db.data_version().map_err(|e| e.to_string())?;
+        let mut cache = cache.lock().map_err(|e| e.to_string())?;
+        if let Some(cached) = cache.as_ref().filter(|cached| cached.version == version) {
+            return Ok(cached.projects.clone());
+        }
+
+        // Convert rows as they are read rather than collecting every LiveSet first
+        let mut projects = Vec::new();
+        db.for_each_project_with_relations(Some(true), |live_set| {
+            projects.push(ProjectInfo::from(live_set))
+        })
+        .map_err(|e| e.to_string())?;
+
+        // Every active project was just loaded, so searches in this version can take
+        // their matches from here instead of querying relations again
+        let mut search_cache = search_cache.lock().map_err(|e| e.to_string())?;
+        search_cache.sync_version(version);
+        search_cache.projects.extend(
+            projects.iter().map(|project| (project.id.clone(), project.clone()))
+        );
+
+        *cache = Some(ProjectListCache {
+            version,
+            projects: projects.clone(),
+        });
+        Ok(projects)
+    })
+    .await
+    .map_err(|e| e.to_string())?
 }
 
+/// Searches projects, returning the best `limit` matches (all of them, up to the
+/// search cap, when no limit is given). A search overtaken by a newer one before
+/// it runs returns no matches; errors are reserved for real failures.
 #[tauri::command]
 pub async fn search_projects(
     query: String,
+    limit: Option<usize>,
     state: State<'_, AppState>
 ) -> Result<Vec<ProjectInfo>, String> {
+    let generation = state.search_generation.fetch_add(1, Ordering::SeqCst) + 1;
+
     // Validate query length
     if query.trim().is_empty() {
         return list_projects(state).await;
@@ -81,11 +163,56 @@ pub async fn search_projects(
         return Err("Search query too long (max 100 characters)".to_string());
     }
     
-    let mut db = state.db.lock().map_err(|e| e.to_string())?;
-    let search_query = SearchQuery::parse(&query);
-    db.search_fts(&search_query)
-        .map_err(|e| e.to_string())
-        .map(|results| results.into_iter()
-            .map(|r| ProjectInfo::from(r.project))
-            .collect())
+    let db = Arc::clone(&state.read_db);
+    let cache = Arc::clone(&state.search_cache);
+    let latest_generation = Arc::clone(&state.search_generation);
+    tokio::task::spawn_blocking(move || -> Result<Vec<ProjectInfo>, String> {
+        let db = db.lock().map_err(|e| e.to_string())?;
+
+        // A newer search arrived while this one waited for the connection; its
+        // results would be discarded, so don't run it. This isn't a failure, so
+        // answer with no matches rather than an error the caller would surface
+        if latest_generation.load(Ordering::SeqCst) != generation {
+            return Ok(Vec::new());
+        }
+
+        let version = db.data_version().map_err(|e| e.to_string())?;
+        let mut cache = cache.lock().map_err(|e| e.to_string())?;
+        cache.sync_version(version);
+        let key = (query, limit);
+        if let Some(cached) = cache.results.get(&key) {
+            return Ok(cached.clone());
+        }
+
+        let mut search_query = SearchQuery::parse(&key.0);
+        search_query.limit = limit;
+        let ranked = db.search_ids(&search_query).map_err(|e| e.to_string())?;
+
+        // Load only the matches no earlier response in this version has converted
+        let missing: Vec<String> = ranked
+            .iter()
+            .map(|(id, _)| id)
+            .filter(|id| !cache.projects.contains_key(*id))
+            .cloned()
+            .collect();
+        if !missing.is_empty() {
+            let loaded = LiveSetDatabase::load_projects_by_ids(&db.conn, &missing)
+                .map_err(|e| e.to_string())?;
+            cache.projects.extend(
+                loaded.into_iter().map(|(id, live_set)| (id, ProjectInfo::from(live_set)))
+            );
+        }
+        let projects: Vec<ProjectInfo> = ranked
+            .iter()
+            .filter_map(|(id, _)| cache.projects.get(id).cloned())
+            .collect();
+
+        if cache.results.len() >= SEARCH_CACHE_CAPACITY {
+            cache.results.clear();
+        }
+        cache.results.insert(key, projects.clone());
+        Ok(projects)
+    })
+    .await
+    .map_err(|e| e.to_string())?
 } 
\ No newline at end of file
@@ -2,7 +2,7 @@ use tauri::State;
 use log::{info, error};
 use serde::Serialize;
 use crate::commands::state::AppState;
-use crate::process_projects;
+use crate::process_projects_with_db;
 use std::sync::Arc;
 
 #[derive(Clone, Serialize)]
@@ -28,8 +28,9 @@ pub async fn start_scan(state: State<'_, AppState>, window: tauri::Window) -> Re
     *is_scanning = true;
     info!("Starting new scan");
     
-    // Clone Arc for the async task
+    // Clone Arcs for the async task
     let is_scanning_clone = Arc::clone(&state.is_scanning);
+    let db = Arc::clone(&state.db);
     
     // Emit initial progress
     window.emit("scan:progress", ScanProgress {
@@ -39,12 +40,13 @@ pub async fn start_scan(state: State<'_, AppState>, window: tauri::Window) -> Re
         message: "Starting scan...".into(),
     }).map_err(|e| e.to_string())?;
     
-    // Run process_projects in a separate thread
+    // Run process_projects on the blocking pool; it parses files and writes to SQLite
+    // synchronously for the whole scan and would otherwise tie up a runtime worker
     let window_clone = window.clone();
     let window_clone2 = window_clone.clone();
-    tokio::spawn(async move {
+    tokio::task::spawn_blocking(move || {
         info!("Starting process_projects in background");
-        let scan_result = process_projects(Some(window_clone));
+        let scan_result = process_projects_with_db(Some(window_clone), &db);
         
         // Always reset scanning flag, even if there was an error
         if let Ok(mut is_scanning) = is_scanning_clone.lock().map_err(|e| {
@@ -1,18 +1,34 @@
+use std::sync::atomic::AtomicU64;
 use std::sync::{Arc, Mutex};
 use crate::database::LiveSetDatabase;
+use crate::commands::database::{ProjectListCache, SearchCache};
 use std::path::PathBuf;
 
 pub struct AppState {
     pub is_scanning: Arc<Mutex<bool>>,
     pub db: Arc<Mutex<LiveSetDatabase>>,
+    /// Read-only connection for listing and searching, so the UI is not blocked
+    /// while a scan or the watcher holds `db`
+    pub read_db: Arc<Mutex<LiveSetDatabase>>,
+    pub project_list_cache: Arc<Mutex<Option<ProjectListCache>>>,
+    pub search_cache: Arc<Mutex<SearchCache>>,
+    /// Bumped by every search request, so a search still queued behind the
+    /// connection lock can tell it has been superseded by a newer keystroke
+    pub search_generation: Arc<AtomicU64>,
 }
 
 impl AppState {
     pub fn new(db_path: PathBuf) -> Result<Self, Box<dyn std::error::Error>> {
-        let db = LiveSetDatabase::new(db_path)?;
+        // The read-write connection creates the schema before the reader opens
+        let db = LiveSetDatabase::new(db_path.clone())?;
+        let read_db = LiveSetDatabase::open_read_only(db_path)?;
         Ok(Self {
             is_scanning: Arc::new(Mutex::new(false)),
             db: Arc::new(Mutex::new(db)),
+            read_db: Arc::new(Mutex::new(read_db)),
+            project_list_cache: Arc::new(Mutex::new(None)),
+            search_cache: Arc::new(Mutex::new(SearchCache::default())),
+            search_generation: Arc::new(AtomicU64::new(0)),
         })
     }
 } 
\ No newline at end of file
@@ -9,6 +9,16 @@ pub struct Config {
     pub paths: Vec<String>,
     pub database_path: String,
     pub live_database_dir: String,
+    /// Log filter passed to env_logger (e.g. "debug"). Defaults to "error";
+    /// debug logging also enables extra verification queries, so keep it off
+    /// outside of debugging.
+    #[serde(default)]
+    pub log_level: Option<String>,
+    /// When set, the file watcher polls watched folders every this many seconds
+    /// instead of using native change notifications, which can miss events on
+    /// network shares.
+    #[serde(default)]
+    pub watcher_poll_interval_secs: Option<u64>,
 }
 
 impl Config {
@@ -1,11 +1,13 @@
 use std::collections::HashMap;
 use std::sync::Arc;
 use log::{debug, info};
-use rusqlite::{params, Connection, Transaction};
+use rusqlite::{params, Connection, Transaction, TransactionBehavior};
 use uuid::Uuid;
 use std::path::PathBuf;
 
-use super::models::SqlDateTime;
+use super::core::UPSERT_PROJECT_SQL;
+use super::models::{text_column, uuid_from_sql, uuid_to_sql, SqlDateTime};
+use super::LiveSetDatabase;
 use crate::error::DatabaseError;
 use crate::live_set::LiveSet;
 use crate::models::{Plugin, Sample};
@@ -14,15 +16,18 @@ struct BatchTransaction<'a> {
     tx: Transaction<'a>,
     unique_plugins: HashMap<String, Plugin>,  // dev_identifier -> Plugin
     unique_samples: HashMap<String, Sample>,  // path -> Sample
-    plugin_id_map: HashMap<String, String>,   // old_uuid -> canonical_uuid
-    sample_id_map: HashMap<String, String>,   // old_uuid -> canonical_uuid
+    // Kept as Uuids and only written out as text when bound, into a reused buffer
+    plugin_id_map: HashMap<Uuid, Uuid>,       // old_uuid -> canonical_uuid
+    sample_id_map: HashMap<Uuid, Uuid>,       // old_uuid -> canonical_uuid
     stats: BatchStats,
 }
 
 impl<'a> BatchTransaction<'a> {
     fn new(conn: &'a mut Connection) -> Result<Self, DatabaseError> {
         Ok(Self {
-            tx: conn.transaction()?,
+            // Immediate: the batch reads existing rows before writing, and taking the
+            // write lock at the start lets busy_timeout apply instead of failing on upgrade
+            tx: conn.transaction_with_behavior(TransactionBehavior::Immediate)?,
             unique_plugins: HashMap::new(),
             unique_samples: HashMap::new(),
             plugin_id_map: HashMap::new(),
@@ -33,7 +38,7 @@ impl<'a> BatchTransaction<'a> {
 
     fn load_existing_plugins(&mut self) -> Result<(), DatabaseError> {
         debug!("Loading existing plugins from database");
-        let mut stmt = self.tx.prepare(
+        let mut stmt = self.tx.prepare_cached(
             "SELECT id, ableton_plugin_id, ableton_module_id, dev_identifier, name, format,
                     installed, vendor, version, sdk_version, flags, scanstate, enabled
              FROM plugins"
@@ -41,7 +46,7 @@ impl<'a> BatchTransaction<'a> {
 
         let existing_plugins = stmt.query_map([], |row| {
             Ok(Plugin {
-                id: Uuid::parse_str(&row.get::<_, String>(0)?).unwrap(),
+                id: uuid_from_sql(text_column(row, 0)?, 0)?,
                 plugin_id: row.get(1)?,
                 module_id: row.get(2)?,
                 dev_identifier: row.get(3)?,
@@ -67,13 +72,13 @@ impl<'a> BatchTransaction<'a> {
 
     fn load_existing_samples(&mut self) -> Result<(), DatabaseError> {
         debug!("Loading existing samples from database");
-        let mut stmt = self.tx.prepare(
+        let mut stmt = self.tx.prepare_cached(
             "SELECT id, name, path, is_present FROM samples"
         )?;
 
         let existing_samples = stmt.query_map([], |row| {
             Ok(Sample {
-                id: Uuid::parse_str(&row.get::<_, String>(0)?).unwrap(),
+                id: uuid_from_sql(text_column(row, 0)?, 0)?,
                 name: row.get(1)?,
                 path: PathBuf::from(row.get::<_, String>(2)?),
                 is_present: row.get(3)?,
@@ -128,19 +133,17 @@ impl<'a> BatchTransaction<'a> {
         for live_set in live_sets {
             // Collect and merge plugins
             for plugin in &live_set.plugins {
-                let old_id = plugin.id.to_string();
                 let entry = self.unique_plugins
                     .entry(plugin.dev_identifier.clone())
                     .and_modify(|existing| Self::merge_plugin_metadata(existing, plugin))
                     .or_insert_with(|| plugin.clone());
                 
                 // Map the old UUID to the canonical UUID
-                self.plugin_id_map.insert(old_id, entry.id.to_string());
+                self.plugin_id_map.insert(plugin.id, entry.id);
             }
             
             // Collect and merge samples
             for sample in &live_set.samples {
-                let old_id = sample.id.to_string();
                 let path_str = sample.path.to_string_lossy().to_string();
                 
                 // Only update is_present status for existing samples
@@ -154,7 +157,7 @@ impl<'a> BatchTransaction<'a> {
                     .or_insert_with(|| sample.clone());
                 
                 // Map the old UUID to the canonical UUID
-                self.sample_id_map.insert(old_id, entry.id.to_string());
+                self.sample_id_map.insert(sample.id, entry.id);
             }
         }
         
@@ -169,43 +172,44 @@ impl<'a> BatchTransaction<'a> {
     fn insert_plugins(&mut self) -> Result<(), DatabaseError> {
         debug!("Upserting {} plugins", self.unique_plugins.len());
         
+        let mut stmt = self.tx.prepare_cached(
+            "INSERT INTO plugins (
+                id, ableton_plugin_id, ableton_module_id, dev_identifier,
+                name, format, installed, vendor, version, sdk_version,
+                flags, scanstate, enabled
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(dev_identifier) DO UPDATE SET
+                ableton_plugin_id = COALESCE(EXCLUDED.ableton_plugin_id, ableton_plugin_id),
+                ableton_module_id = COALESCE(EXCLUDED.ableton_module_id, ableton_module_id),
+                name = EXCLUDED.name,
+                format = EXCLUDED.format,
+                installed = EXCLUDED.installed OR plugins.installed,
+                vendor = COALESCE(EXCLUDED.vendor, vendor),
+                version = COALESCE(EXCLUDED.version, version),
+                sdk_version = COALESCE(EXCLUDED.sdk_version, sdk_version),
+                flags = COALESCE(EXCLUDED.flags, flags),
+                scanstate = COALESCE(EXCLUDED.scanstate, scanstate),
+                enabled = COALESCE(EXCLUDED.enabled, enabled)
+            ",
+        )?;
+
+        let mut id_buffer = Uuid::encode_buffer();
         for plugin in self.unique_plugins.values() {
-            let plugin_id = plugin.id.to_string();
-            self.tx.execute(
-                "INSERT INTO plugins (
-                    id, ableton_plugin_id, ableton_module_id, dev_identifier,
-                    name, format, installed, vendor, version, sdk_version,
-                    flags, scanstate, enabled
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(dev_identifier) DO UPDATE SET
-                    ableton_plugin_id = COALESCE(EXCLUDED.ableton_plugin_id, ableton_plugin_id),
-                    ableton_module_id = COALESCE(EXCLUDED.ableton_module_id, ableton_module_id),
-                    name = EXCLUDED.name,
-                    format = EXCLUDED.format,
-                    installed = EXCLUDED.installed OR plugins.installed,
-                    vendor = COALESCE(EXCLUDED.vendor, vendor),
-                    version = COALESCE(EXCLUDED.version, version),
-                    sdk_version = COALESCE(EXCLUDED.sdk_version, sdk_version),
-                    flags = COALESCE(EXCLUDED.flags, flags),
-                    scanstate = COALESCE(EXCLUDED.scanstate, scanstate),
-                    enabled = COALESCE(EXCLUDED.enabled, enabled)
-                ",
-                params![
-                    plugin_id,
-                    plugin.plugin_id,
-                    plugin.module_id,
-                    plugin.dev_identifier,
-                    plugin.name,
-                    plugin.plugin_format.to_string(),
-                    plugin.installed,
-                    plugin.vendor,
-                    plugin.version,
-                    plugin.sdk_version,
-                    plugin.flags,
-                    plugin.scanstate,
-                    plugin.enabled,
-                ],
-            )?;
+            stmt.execute(params![
+                uuid_to_sql(&plugin.id, &mut id_buffer),
+                plugin.plugin_id,
+                plugin.module_id,
+                plugin.dev_identifier,
+                plugin.name,
+                plugin.plugin_format.as_str(),
+                plugin.installed,
+                plugin.vendor,
+                plugin.version,
+                plugin.sdk_version,
+                plugin.flags,
+                plugin.scanstate,
+                plugin.enabled,
+            ])?;
             self.stats.plugins_inserted += 1;
         }
         Ok(())
@@ -214,124 +218,93 @@ impl<'a> BatchTransaction<'a> {
     fn insert_samples(&mut self) -> Result<(), DatabaseError> {
         debug!("Upserting {} samples", self.unique_samples.len());
         
+        let mut stmt = self.tx.prepare_cached(
+            "INSERT INTO samples (
+                id, name, path, is_present
+            ) VALUES (?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE SET
+                name = EXCLUDED.name,
+                is_present = EXCLUDED.is_present OR samples.is_present
+            ",
+        )?;
+
+        let mut id_buffer = Uuid::encode_buffer();
         for sample in self.unique_samples.values() {
-            let sample_id = sample.id.to_string();
-            self.tx.execute(
-                "INSERT INTO samples (
-                    id, name, path, is_present
-                ) VALUES (?, ?, ?, ?)
-                ON CONFLICT(path) DO UPDATE SET
-                    name = EXCLUDED.name,
-                    is_present = EXCLUDED.is_present OR samples.is_present
-                ",
-                params![
-                    sample_id,
-                    sample.name,
-                    sample.path.to_string_lossy().to_string(),
-                    sample.is_present,
-                ],
-            )?;
+            stmt.execute(params![
+                uuid_to_sql(&sample.id, &mut id_buffer),
+                sample.name,
+                sample.path.to_string_lossy().to_string(),
+                sample.is_present,
+            ])?;
             self.stats.samples_inserted += 1;
         }
         Ok(())
     }
 
-    fn insert_projects(&mut self, live_sets: &[LiveSet]) -> Result<(), DatabaseError> {
+    /// Writes the projects and their links, returning the stored id of each project
+    fn insert_projects(&mut self, live_sets: &[LiveSet]) -> Result<Vec<String>, DatabaseError> {
+        // Prepare once and rebind per row rather than re-parsing the SQL each time.
+        // An upsert keeps an already stored project's id, where REPLACE would delete
+        // the row and orphan its tags, notes and search index entry.
+        let mut insert_project = self.tx.prepare_cached(UPSERT_PROJECT_SQL)?;
+        let mut link_plugin = self.tx.prepare_cached(
+            "INSERT OR IGNORE INTO project_plugins (project_id, plugin_id)
+             VALUES (?, ?)",
+        )?;
+        let mut link_sample = self.tx.prepare_cached(
+            "INSERT OR IGNORE INTO project_samples (project_id, sample_id)
+             VALUES (?, ?)",
+        )?;
+
+        let mut project_ids = Vec::with_capacity(live_sets.len());
+        let mut id_buffer = Uuid::encode_buffer();
         for live_set in live_sets {
-            let project_id = live_set.id.to_string();
-            
-            // Insert project
-            self.tx.execute(
-                "INSERT OR REPLACE INTO projects (
-                    id, name, path, hash, created_at, modified_at,
-                    last_parsed_at, tempo, time_signature_numerator,
-                    time_signature_denominator, key_signature_tonic,
-                    key_signature_scale, furthest_bar, duration_seconds,
-                    ableton_version_major, ableton_version_minor,
-                    ableton_version_patch, ableton_version_beta,
-                    notes
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                params![
-                    project_id,
-                    live_set.name,
-                    live_set.file_path.to_string_lossy().to_string(),
-                    live_set.file_hash,
-                    SqlDateTime::from(live_set.created_time),
-                    SqlDateTime::from(live_set.modified_time),
-                    SqlDateTime::from(live_set.last_parsed_timestamp),
-                    live_set.tempo,
-                    live_set.time_signature.numerator,
-                    live_set.time_signature.denominator,
-                    live_set.key_signature.as_ref().map(|k| k.tonic.to_string()),
-                    live_set.key_signature.as_ref().map(|k| k.scale.to_string()),
-                    live_set.furthest_bar,
-                    live_set.estimated_duration.map(|d| d.num_seconds()),
-                    live_set.ableton_version.major,
-                    live_set.ableton_version.minor,
-                    live_set.ableton_version.patch,
-                    live_set.ableton_version.beta,
-                    None::<String>,
-                ],
-            )?;
+            // Insert project, or update the row already stored for its path
+            let project_id: String = insert_project.query_row(params![
+                uuid_to_sql(&live_set.id, &mut id_buffer),
+                live_set.name,
+                live_set.file_path.to_string_lossy().to_string(),
+                live_set.file_hash,
+                SqlDateTime::from(live_set.created_time),
+                SqlDateTime::from(live_set.modified_time),
+                SqlDateTime::from(live_set.last_parsed_timestamp),
+                live_set.tempo,
+                live_set.time_signature.numerator,
+                live_set.time_signature.denominator,
+                live_set.key_signature.as_ref().map(|k| k.tonic.as_str()),
+                live_set.key_signature.as_ref().map(|k| k.scale.as_str()),
+                live_set.furthest_bar,
+                live_set.estimated_duration.map(|d| d.num_seconds()),
+                live_set.ableton_version.major,
+                live_set.ableton_version.minor,
+                live_set.ableton_version.patch,
+                live_set.ableton_version.beta,
+                None::<String>,
+            ], |row| row.get(0))?;
+            LiveSetDatabase::clear_project_links(&self.tx, &project_id)?;
             
             // Link plugins using the mapped IDs
             for plugin in &live_set.plugins {
-                let old_id = plugin.id.to_string();
-                let canonical_id = self.plugin_id_map.get(&old_id).unwrap();
-                self.tx.execute(
-                    "INSERT OR IGNORE INTO project_plugins (project_id, plugin_id)
-                     VALUES (?, ?)",
-                    params![project_id, canonical_id],
-                )?;
+                let canonical_id = self.plugin_id_map.get(&plugin.id).unwrap();
+                link_plugin.execute(params![project_id, uuid_to_sql(canonical_id, &mut id_buffer)])?;
             }
             
             // Link samples using the mapped IDs
             for sample in &live_set.samples {
-                let old_id = sample.id.to_string();
-                let canonical_id = self.sample_id_map.get(&old_id).unwrap();
-                self.tx.execute(
-                    "INSERT OR IGNORE INTO project_samples (project_id, sample_id)
-                     VALUES (?, ?)",
-                    params![project_id, canonical_id],
-                )?;
+                let canonical_id = self.sample_id_map.get(&sample.id).unwrap();
+                link_sample.execute(params![project_id, uuid_to_sql(canonical_id, &mut id_buffer)])?;
             }
             
             self.stats.projects_inserted += 1;
+            project_ids.push(project_id);
         }
-        Ok(())
+        Ok(project_ids)
     }
 
-    fn update_search_indexes(&self, live_sets: &[LiveSet]) -> Result<(), DatabaseError> {
-        debug!("Updating search indexes for {} projects", live_sets.len());
-        
-        for live_set in live_sets {
-            let project_id = live_set.id.to_string();
-            
-            self.tx.execute(
-                "UPDATE project_search SET
-                    plugins = (
-                        SELECT GROUP_CONCAT(pl.name || ' ' || COALESCE(pl.vendor, ''), ' ')
-                        FROM plugins pl
-                        JOIN project_plugins pp ON pp.plugin_id = pl.id
-                        WHERE pp.project_id = ?
-                    ),
-                    samples = (
-                        SELECT GROUP_CONCAT(s.name, ' ')
-                        FROM samples s
-                        JOIN project_samples ps ON ps.sample_id = s.id
-                        WHERE ps.project_id = ?
-                    ),
-                    tags = (
-                        SELECT GROUP_CONCAT(t.name, ' ')
-                        FROM tags t
-                        JOIN project_tags pt ON pt.tag_id = t.id
-                        WHERE pt.project_id = ?
-                    )
-                WHERE project_id = ?",
-                params![project_id, project_id, project_id, project_id],
-            )?;
-        }
-        Ok(())
+    fn update_search_indexes(&self, project_ids: &[String]) -> Result<(), DatabaseError> {
+        debug!("Updating search indexes for {} projects", project_ids.len());
+
+        LiveSetDatabase::refresh_search_index(&self.tx, project_ids)
     }
 
     fn commit(self) -> Result<BatchStats, DatabaseError> {
@@ -369,10 +342,10 @@ impl<'a> BatchInsertManager<'a> {
         batch.insert_samples()?;
         
         // Then insert projects and their relationships
-        batch.insert_projects(&self.live_sets)?;
+        let project_ids = batch.insert_projects(&self.live_sets)?;
         
         // Finally update search indexes
-        batch.update_search_indexes(&self.live_sets)?;
+        batch.update_search_indexes(&project_ids)?;
         
         // Commit and get stats
         let stats = batch.commit()?;
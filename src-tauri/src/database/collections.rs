@@ -1,14 +1,12 @@
 use crate::database::models::SqlDateTime;
 use crate::error::DatabaseError;
 use crate::live_set::LiveSet;
-use crate::models::{AbletonVersion, KeySignature, Plugin, Sample, TimeSignature};
-use chrono::{Local, TimeZone};
-use log::debug;
+use chrono::Local;
+use log::{debug, log_enabled, Level};
 use rusqlite::{params, OptionalExtension};
-use std::collections::HashSet;
-use std::path::PathBuf;
 use uuid::Uuid;
 
+use super::core::ProjectColumns;
 use super::LiveSetDatabase;
 
 impl LiveSetDatabase {
@@ -51,13 +49,15 @@ impl LiveSetDatabase {
             project_id, collection_id
         );
 
-        // Debug: Verify project exists
-        let project_exists: bool = self.conn.query_row(
-            "SELECT EXISTS(SELECT 1 FROM projects WHERE id = ?)",
-            [project_id],
-            |row| row.get(0),
-        )?;
-        debug!("Project exists in projects table: {}", project_exists);
+        // Debug: Verify project exists (skipped unless debug logging is on)
+        if log_enabled!(Level::Debug) {
+            let project_exists: bool = self.conn.query_row(
+                "SELECT EXISTS(SELECT 1 FROM projects WHERE id = ?)",
+                [project_id],
+                |row| row.get(0),
+            )?;
+            debug!("Project exists in projects table: {}", project_exists);
+        }
 
         let now = Local::now();
 
@@ -82,15 +82,17 @@ impl LiveSetDatabase {
             ],
         )?;
 
-        // Debug: Verify insertion
-        let inserted_project: Option<(String, i32)> = self.conn.query_row(
-            "SELECT project_id, position FROM collection_projects WHERE collection_id = ? AND project_id = ?",
-            params![collection_id, project_id],
-            |row| Ok((row.get(0)?, row.get(1)?)),
-        ).optional()?;
-        
-        if let Some((pid, pos)) = inserted_project {
-            debug!("Verified project {} inserted at position {}", pid, pos);
+        // Debug: Verify insertion (skipped unless debug logging is on)
+        if log_enabled!(Level::Debug) {
+            let inserted_project: Option<(String, i32)> = self.conn.query_row(
+                "SELECT project_id, position FROM collection_projects WHERE collection_id = ? AND project_id = ?",
+                params![collection_id, project_id],
+                |row| Ok((row.get(0)?, row.get(1)?)),
+            ).optional()?;
+
+            if let Some((pid, pos)) = inserted_project {
+                debug!("Verified project {} inserted at position {}", pid, pos);
+            }
         }
 
         // Update collection's modified timestamp
@@ -222,9 +224,9 @@ impl LiveSetDatabase {
         let mut results = Vec::new();
         
         {
-            let mut stmt = tx.prepare(
+            let mut stmt = tx.prepare_cached(
                 r#"
-                SELECT p.id, p.path, p.name, p.hash, p.notes, p.created_at, p.modified_at, p.last_parsed_at,
+                SELECT p.is_active, p.id, p.path, p.name, p.hash, p.created_at, p.modified_at, p.last_parsed_at,
                        p.tempo, p.time_signature_numerator, p.time_signature_denominator,
                        p.key_signature_tonic, p.key_signature_scale, p.duration_seconds, p.furthest_bar,
                        p.ableton_version_major, p.ableton_version_minor, p.ableton_version_patch, p.ableton_version_beta
@@ -235,118 +237,22 @@ impl LiveSetDatabase {
                 "#,
             )?;
 
+            let columns = ProjectColumns::new(&stmt)?;
             let mut rows = stmt.query([collection_id])?;
             while let Some(row) = rows.next()? {
-                let project_id: String = row.get(0)?;
-                debug!("Retrieved project from join query: {}", project_id);
-                let duration_secs: Option<i64> = row.get(13)?;
-                let created_timestamp: i64 = row.get(5)?;
-                let modified_timestamp: i64 = row.get(6)?;
-                let parsed_timestamp: i64 = row.get(7)?;
-
-                let mut live_set = LiveSet {
-                    is_active: true,
-                    id: Uuid::parse_str(&project_id).map_err(|_| {
-                        rusqlite::Error::InvalidParameterName("Invalid UUID".into())
-                    })?,
-                    file_path: PathBuf::from(row.get::<_, String>(1)?),
-                    name: row.get(2)?,
-                    file_hash: row.get(3)?,
-                    created_time: Local
-                        .timestamp_opt(created_timestamp, 0)
-                        .single()
-                        .ok_or_else(|| {
-                            rusqlite::Error::InvalidParameterName("Invalid timestamp".into())
-                        })?,
-                    modified_time: Local
-                        .timestamp_opt(modified_timestamp, 0)
-                        .single()
-                        .ok_or_else(|| {
-                            rusqlite::Error::InvalidParameterName("Invalid timestamp".into())
-                        })?,
-                    last_parsed_timestamp: Local
-                        .timestamp_opt(parsed_timestamp, 0)
-                        .single()
-                        .ok_or_else(|| {
-                            rusqlite::Error::InvalidParameterName("Invalid timestamp".into())
-                        })?,
-
-                    tempo: row.get(8)?,
-                    time_signature: TimeSignature {
-                        numerator: row.get(9)?,
-                        denominator: row.get(10)?,
-                    },
-                    key_signature: match (row.get::<_, Option<String>>(11)?, row.get::<_, Option<String>>(12)?) {
-                        (Some(tonic), Some(scale)) => Some(KeySignature {
-                            tonic: tonic.parse().map_err(|e| rusqlite::Error::InvalidParameterName(e))?,
-                            scale: scale.parse().map_err(|e| rusqlite::Error::InvalidParameterName(e))?,
-                        }),
-                        _ => None,
-                    },
-                    furthest_bar: row.get(14)?,
-                    ableton_version: AbletonVersion {
-                        major: row.get(15)?,
-                        minor: row.get(16)?,
-                        patch: row.get(17)?,
-                        beta: row.get(18)?,
-                    },
-                    estimated_duration: duration_secs.map(chrono::Duration::seconds),
-                    plugins: HashSet::new(),
-                    samples: HashSet::new(),
-                    tags: HashSet::new(),
-                };
-
-                // Get plugins, samples, and tags in separate scopes
-                {
-                    let mut stmt = tx.prepare(
-                        "SELECT p.* FROM plugins p JOIN project_plugins pp ON pp.plugin_id = p.id WHERE pp.project_id = ?"
-                    )?;
-                    live_set.plugins = stmt.query_map([&project_id], |row| {
-                        Ok(Plugin {
-                            id: Uuid::new_v4(),
-                            plugin_id: row.get(1)?,
-                            module_id: row.get(2)?,
-                            dev_identifier: row.get(3)?,
-                            name: row.get(4)?,
-                            plugin_format: row.get::<_, String>(5)?.parse()
-                                .map_err(|e| rusqlite::Error::InvalidParameterName(e))?,
-                            installed: row.get(6)?,
-                            vendor: row.get(7)?,
-                            version: row.get(8)?,
-                            sdk_version: row.get(9)?,
-                            flags: row.get(10)?,
-                            scanstate: row.get(11)?,
-                            enabled: row.get(12)?,
-                        })
-                    })?.filter_map(|r| r.ok()).collect();
-                }
-
-                {
-                    let mut stmt = tx.prepare(
-                        "SELECT s.* FROM samples s JOIN project_samples ps ON ps.sample_id = s.id WHERE ps.project_id = ?"
-                    )?;
-                    live_set.samples = stmt.query_map([&project_id], |row| {
-                        Ok(Sample {
-                            id: Uuid::new_v4(),
-                            name: row.get(1)?,
-                            path: PathBuf::from(row.get::<_, String>(2)?),
-                            is_present: row.get(3)?,
-                        })
-                    })?.filter_map(|r| r.ok()).collect();
-                }
-
-                {
-                    let mut stmt = tx.prepare(
-                        "SELECT t.name FROM tags t JOIN project_tags pt ON pt.tag_id = t.id WHERE pt.project_id = ?"
-                    )?;
-                    live_set.tags = stmt.query_map([&project_id], |row| row.get(0))?.filter_map(|r| r.ok()).collect();
-                }
-
-                debug!("Adding project to results: {}", live_set.name);
-                results.push(live_set);
+                results.push(Self::row_to_live_set(row, &columns)?);
             }
         }
 
+        // Relations are loaded for the whole collection at once: one query per
+        // relation rather than three per project
+        Self::attach_relations(&tx, &mut results)?;
+        let project_ids: Vec<String> = results.iter().map(|p| p.id.to_string()).collect();
+        let mut tags_by_project = Self::load_project_tags(&tx, &project_ids)?;
+        for (live_set, project_id) in results.iter_mut().zip(&project_ids) {
+            live_set.tags = tags_by_project.remove(project_id).unwrap_or_default();
+        }
+
         tx.commit()?;
         debug!("Retrieved {} projects from collection", results.len());
         Ok(results)
@@ -354,7 +260,7 @@ impl LiveSetDatabase {
 
     pub fn list_collections(&mut self) -> Result<Vec<(String, String, Option<String>)>, DatabaseError> {
         debug!("Listing all collections");
-        let mut stmt = self.conn.prepare(
+        let mut stmt = self.conn.prepare_cached(
             "SELECT id, name, description FROM collections ORDER BY name"
         )?;
 
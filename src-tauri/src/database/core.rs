@@ -1,15 +1,181 @@
-use super::models::SqlDateTime;
+use super::models::{
+    optional_text_column, plugins_from_json, samples_from_json, text_column, uuid_from_sql,
+    SqlDateTime,
+};
+use super::search::{fts5_prefix_query, MAX_SEARCH_RESULTS, SEARCH_RANK_FUNCTION};
 use crate::error::DatabaseError;
 use crate::live_set::LiveSet;
 use crate::models::{AbletonVersion, KeySignature, Plugin, Sample, TimeSignature};
 use crate::utils::metadata::load_file_hash;
 use chrono::{DateTime, Local, TimeZone};
-use log::{debug, info};
-use rusqlite::{params, Connection, OptionalExtension, Result as SqliteResult};
-use std::collections::HashSet;
+use log::{debug, info, log_enabled, Level};
+use rusqlite::{
+    params, params_from_iter, Connection, OpenFlags, OptionalExtension, Transaction,
+    TransactionBehavior,
+};
+use std::collections::{HashMap, HashSet};
 use std::path::{Path, PathBuf};
 use uuid::Uuid;
 use chrono::Utc;
+
+/// The `projects` columns read by `row_to_live_set`. Listed explicitly rather than
+/// using `SELECT *` so unused wide columns such as `notes` are never read.
+pub(crate) const PROJECT_COLUMNS: &str = "is_active, id, path, name, hash, created_at, modified_at, last_parsed_at, \
+     tempo, time_signature_numerator, time_signature_denominator, \
+     key_signature_tonic, key_signature_scale, duration_seconds, furthest_bar, \
+     ableton_version_major, ableton_version_minor, ableton_version_patch, ableton_version_beta";
+
+/// Inserts a project, or updates the row already stored for its path in place. The
+/// stored id is kept so tags, notes and collections stay attached across rescans,
+/// and is returned so relations are linked to the row that was actually written.
+pub(crate) const UPSERT_PROJECT_SQL: &str = "INSERT INTO projects (
+        id, name, path, hash, created_at, modified_at,
+        last_parsed_at, tempo, time_signature_numerator,
+        time_signature_denominator, key_signature_tonic,
+        key_signature_scale, furthest_bar, duration_seconds,
+        ableton_version_major, ableton_version_minor,
+        ableton_version_patch, ableton_version_beta,
+        notes
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(path) DO UPDATE SET
+        is_active = true,
+        name = excluded.name,
+        hash = excluded.hash,
+        created_at = excluded.created_at,
+        modified_at = excluded.modified_at,
+        last_parsed_at = excluded.last_parsed_at,
+        tempo = excluded.tempo,
+        time_signature_numerator = excluded.time_signature_numerator,
+        time_signature_denominator = excluded.time_signature_denominator,
+        key_signature_tonic = excluded.key_signature_tonic,
+        key_signature_scale = excluded.key_signature_scale,
+        furthest_bar = excluded.furthest_bar,
+        duration_seconds = excluded.duration_seconds,
+        ableton_version_major = excluded.ableton_version_major,
+        ableton_version_minor = excluded.ableton_version_minor,
+        ableton_version_patch = excluded.ableton_version_patch,
+        ableton_version_beta = excluded.ableton_version_beta
+    RETURNING id";
+
+/// Tokenizer and prefix options of `project_search`. A stored table whose definition
+/// lacks them was created by an older schema and is rebuilt on startup.
+const SEARCH_TABLE_OPTIONS: [&str; 2] = [
+    "tokenize='porter unicode61 remove_diacritics 2'",
+    "prefix='2 3 4'",
+];
+
+/// Refills `project_search` from the stored projects and their relations
+const REBUILD_SEARCH_INDEX_SQL: &str = "INSERT INTO project_search (
+        project_id, name, path, plugins, samples, tags, notes, created_at, modified_at, tempo
+    )
+    SELECT
+        p.id,
+        p.name,
+        p.path,
+        (SELECT GROUP_CONCAT(pl.name || ' ' || COALESCE(pl.vendor, ''), ' ')
+         FROM plugins pl
+         JOIN project_plugins pp ON pp.plugin_id = pl.id
+         WHERE pp.project_id = p.id),
+        (SELECT GROUP_CONCAT(s.name, ' ')
+         FROM samples s
+         JOIN project_samples ps ON ps.sample_id = s.id
+         WHERE ps.project_id = p.id),
+        (SELECT GROUP_CONCAT(t.name, ' ')
+         FROM tags t
+         JOIN project_tags pt ON pt.tag_id = t.id
+         WHERE pt.project_id = p.id),
+        COALESCE(p.notes, ''),
+        strftime('%Y-%m-%d %H:%M:%S', datetime(p.created_at, 'unixepoch')),
+        strftime('%Y-%m-%d %H:%M:%S', datetime(p.modified_at, 'unixepoch')),
+        CAST(p.tempo AS TEXT)
+    FROM projects p;";
+
+/// Correlated subquery aggregating a project's plugins into a JSON array, decoded
+/// by `plugins_from_json`. Must be selected from `projects`.
+pub(crate) const PROJECT_PLUGINS_JSON: &str = "(SELECT json_group_array(json_object(\
+        'id', pl.id, 'ableton_plugin_id', pl.ableton_plugin_id, 'ableton_module_id', pl.ableton_module_id, \
+        'dev_identifier', pl.dev_identifier, 'name', pl.name, 'format', pl.format, \
+        'installed', pl.installed, 'vendor', pl.vendor, 'version', pl.version, \
+        'sdk_version', pl.sdk_version, 'flags', pl.flags, 'scanstate', pl.scanstate, \
+        'enabled', pl.enabled)) \
+     FROM plugins pl \
+     JOIN project_plugins pp ON pp.plugin_id = pl.id \
+     WHERE pp.project_id = projects.id)";
+
+/// Correlated subquery aggregating a project's samples into a JSON array, decoded
+/// by `samples_from_json`. Must be selected from `projects`.
+pub(crate) const PROJECT_SAMPLES_JSON: &str = "(SELECT json_group_array(json_object(\
+        'id', s.id, 'name', s.name, 'path', s.path, 'is_present', s.is_present)) \
+     FROM samples s \
+     JOIN project_samples ps ON ps.sample_id = s.id \
+     WHERE ps.project_id = projects.id)";
+
+/// Upper bound on bound parameters per statement (SQLite's historical default limit)
+pub(crate) const MAX_SQL_PARAMS: usize = 999;
+
+/// Builds a `?, ?, ...` placeholder list for an `IN (...)` clause
+pub(crate) fn sql_placeholders(count: usize) -> String {
+    let mut placeholders = String::with_capacity(count * 3);
+    for i in 0..count {
+        if i > 0 {
+            placeholders.push_str(", ");
+        }
+        placeholders.push('?');
+    }
+    placeholders
+}
+
+/// Positions of the project columns within a statement's result set. Resolved once
+/// per statement so `row_to_live_set` can read each row by index instead of
+/// matching column names on every `get`.
+pub(crate) struct ProjectColumns {
+    is_active: usize,
+    id: usize,
+    path: usize,
+    name: usize,
+    hash: usize,
+    created_at: usize,
+    modified_at: usize,
+    last_parsed_at: usize,
+    tempo: usize,
+    time_signature_numerator: usize,
+    time_signature_denominator: usize,
+    key_signature_tonic: usize,
+    key_signature_scale: usize,
+    duration_seconds: usize,
+    furthest_bar: usize,
+    ableton_version_major: usize,
+    ableton_version_minor: usize,
+    ableton_version_patch: usize,
+    ableton_version_beta: usize,
+}
+
+impl ProjectColumns {
+    pub(crate) fn new(stmt: &rusqlite::Statement<'_>) -> rusqlite::Result<Self> {
+        Ok(Self {
+            is_active: stmt.column_index("is_active")?,
+            id: stmt.column_index("id")?,
+            path: stmt.column_index("path")?,
+            name: stmt.column_index("name")?,
+            hash: stmt.column_index("hash")?,
+            created_at: stmt.column_index("created_at")?,
+            modified_at: stmt.column_index("modified_at")?,
+            last_parsed_at: stmt.column_index("last_parsed_at")?,
+            tempo: stmt.column_index("tempo")?,
+            time_signature_numerator: stmt.column_index("time_signature_numerator")?,
+            time_signature_denominator: stmt.column_index("time_signature_denominator")?,
+            key_signature_tonic: stmt.column_index("key_signature_tonic")?,
+            key_signature_scale: stmt.column_index("key_signature_scale")?,
+            duration_seconds: stmt.column_index("duration_seconds")?,
+            furthest_bar: stmt.column_index("furthest_bar")?,
+            ableton_version_major: stmt.column_index("ableton_version_major")?,
+            ableton_version_minor: stmt.column_index("ableton_version_minor")?,
+            ableton_version_patch: stmt.column_index("ableton_version_patch")?,
+            ableton_version_beta: stmt.column_index("ableton_version_beta")?,
+        })
+    }
+}
+
 pub struct LiveSetDatabase {
     pub conn: Connection,
 }
@@ -18,14 +184,84 @@ impl LiveSetDatabase {
     pub fn new(db_path: PathBuf) -> Result<Self, DatabaseError> {
         debug!("Opening database at {:?}", db_path);
         let conn = Connection::open(&db_path)?;
+        Self::configure_connection(&conn)?;
         let mut db = Self { conn };
         db.initialize()?;
         info!("Database initialized successfully at {:?}", db_path);
         Ok(db)
     }
 
+    /// Opens a read-only connection to a database already created by `new`, for
+    /// queries that should not wait behind a scan holding the write connection.
+    /// Under WAL it reads the last committed state while the other connection writes.
+    pub fn open_read_only(db_path: PathBuf) -> Result<Self, DatabaseError> {
+        debug!("Opening read-only database connection at {:?}", db_path);
+        let conn = Connection::open_with_flags(
+            &db_path,
+            OpenFlags::SQLITE_OPEN_READ_ONLY
+                | OpenFlags::SQLITE_OPEN_URI
+                | OpenFlags::SQLITE_OPEN_NO_MUTEX,
+        )?;
+        conn.pragma_update(None, "query_only", true)?;
+        Self::configure_cache(&conn)?;
+        Ok(Self { conn })
+    }
+
+    /// Applies connection-level pragmas. WAL lets the UI keep reading while a scan
+    /// writes; NORMAL sync is safe under WAL and avoids an fsync per commit. The
+    /// trade-off is durability, not integrity: a power loss can roll back the last
+    /// few commits, which the next scan simply writes again.
+    fn configure_connection(conn: &Connection) -> Result<(), DatabaseError> {
+        let journal_mode: String =
+            conn.pragma_update_and_check(None, "journal_mode", "WAL", |row| row.get(0))?;
+        debug!("Database journal mode: {}", journal_mode);
+
+        conn.pragma_update(None, "synchronous", "NORMAL")?;
+        Self::configure_cache(conn)
+    }
+
+    /// Caching and locking pragmas shared by read-write and read-only connections
+    fn configure_cache(conn: &Connection) -> Result<(), DatabaseError> {
+        conn.pragma_update(None, "cache_size", -65536)?; // 64 MiB page cache
+        conn.pragma_update(None, "temp_store", "MEMORY")?;
+        conn.pragma_update(None, "mmap_size", 268_435_456)?; // 256 MiB
+        conn.busy_timeout(std::time::Duration::from_secs(5))?;
+        // Room for the fixed queries plus a few IN (...) variants from the batch loaders
+        conn.set_prepared_statement_cache_capacity(64);
+        Ok(())
+    }
+
     fn initialize(&mut self) -> Result<(), DatabaseError> {
         debug!("Initializing database tables and indexes");
+
+        // `CREATE VIRTUAL TABLE IF NOT EXISTS` keeps a search table built with older
+        // tokenizer options, so drop it here and refill it once it is recreated below
+        let search_table_sql: Option<String> = self
+            .conn
+            .query_row(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'project_search'",
+                [],
+                |row| row.get(0),
+            )
+            .optional()?;
+        let rebuild_search_index = match search_table_sql {
+            Some(sql) => !SEARCH_TABLE_OPTIONS.iter().all(|option| sql.contains(option)),
+            None => false,
+        };
+        // Drop, recreate and refill in one transaction, so an interrupted rebuild
+        // can't leave a current-looking but empty index behind. If any step below
+        // fails, dropping the transaction rolls it back rather than leaving it open
+        // on the shared connection. `new_unchecked` only borrows the connection, so
+        // the schema batch can still run on `self.conn` inside the transaction.
+        let rebuild_tx = if rebuild_search_index {
+            info!("Search index uses outdated options, rebuilding it");
+            let tx = Transaction::new_unchecked(&self.conn, TransactionBehavior::Immediate)?;
+            tx.execute_batch("DROP TABLE project_search;")?;
+            Some(tx)
+        } else {
+            None
+        };
+
         self.conn.execute_batch(
             r#"--sql
             -- Core tables
@@ -141,13 +377,22 @@ impl LiveSetDatabase {
             );
 
             -- Basic indexes for performance
-            CREATE INDEX IF NOT EXISTS idx_projects_path ON projects(path);
+            -- projects.path and samples.path are UNIQUE, so SQLite already indexes
+            -- them; a second index on the same column only slows down writes
+            DROP INDEX IF EXISTS idx_projects_path;
             CREATE INDEX IF NOT EXISTS idx_plugins_name ON plugins(name);
-            CREATE INDEX IF NOT EXISTS idx_samples_path ON samples(path);
+            DROP INDEX IF EXISTS idx_samples_path;
             CREATE INDEX IF NOT EXISTS idx_tags_name ON tags(name);
             CREATE INDEX IF NOT EXISTS idx_collection_projects_position ON collection_projects(collection_id, position);
             CREATE INDEX IF NOT EXISTS idx_projects_is_active ON projects(is_active);
 
+            -- Reverse covering indexes for the link tables. Their primary keys already
+            -- cover lookups by project; these cover lookups by plugin, sample and tag
+            -- (e.g. projects with a given tag) without touching the table rows.
+            CREATE INDEX IF NOT EXISTS idx_project_plugins_plugin ON project_plugins(plugin_id, project_id);
+            CREATE INDEX IF NOT EXISTS idx_project_samples_sample ON project_samples(sample_id, project_id);
+            CREATE INDEX IF NOT EXISTS idx_project_tags_tag ON project_tags(tag_id, project_id);
+
             -- Full-text search
             CREATE VIRTUAL TABLE IF NOT EXISTS project_search USING fts5(
                 project_id UNINDEXED,  -- Reference to projects table
@@ -160,7 +405,10 @@ impl LiveSetDatabase {
                 created_at,           -- Creation timestamp
                 modified_at,          -- Modification timestamp
                 tempo,                -- Project tempo
-                tokenize='porter unicode61'
+                -- Fold accents so "cafe" finds "Café", and keep prefix indexes for the
+                -- short prefixes typed while searching so "term"* needs no token scan
+                tokenize='porter unicode61 remove_diacritics 2',
+                prefix='2 3 4'
             );
 
             -- FTS5 triggers for maintaining the search index
@@ -197,6 +445,29 @@ impl LiveSetDatabase {
                 DELETE FROM project_search WHERE project_id = old.id;
             END;
 
+            -- Tags change one link at a time after a project is indexed, so keep the
+            -- tags column current as they are added or removed instead of leaving it
+            -- stale until the project is next written
+            CREATE TRIGGER IF NOT EXISTS project_tags_ai AFTER INSERT ON project_tags BEGIN
+                UPDATE project_search SET tags = (
+                    SELECT GROUP_CONCAT(t.name, ' ')
+                    FROM tags t
+                    JOIN project_tags pt ON pt.tag_id = t.id
+                    WHERE pt.project_id = new.project_id
+                )
+                WHERE project_id = new.project_id;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS project_tags_ad AFTER DELETE ON project_tags BEGIN
+                UPDATE project_search SET tags = (
+                    SELECT GROUP_CONCAT(t.name, ' ')
+                    FROM tags t
+                    JOIN project_tags pt ON pt.tag_id = t.id
+                    WHERE pt.project_id = old.project_id
+                )
+                WHERE project_id = old.project_id;
+            END;
+
             -- Update FTS index after project insert (done manually to ensure all relations are set)
             CREATE TRIGGER IF NOT EXISTS projects_ai AFTER INSERT ON projects BEGIN
                 INSERT INTO project_search (
@@ -219,45 +490,131 @@ impl LiveSetDatabase {
             "#,
         )?;
 
+        if let Some(tx) = rebuild_tx {
+            tx.execute_batch(REBUILD_SEARCH_INDEX_SQL)?;
+            self.optimize_search_index()?;
+            tx.commit()?;
+        }
+        // Store the weighted ranking in the index config so searches can order by
+        // `rank`. It persists with the index, so only write it when it differs
+        // rather than dirtying the database on every startup.
+        let stored_rank: Option<String> = self
+            .conn
+            .query_row(
+                "SELECT v FROM project_search_config WHERE k = 'rank'",
+                [],
+                |row| row.get(0),
+            )
+            .optional()?;
+        if stored_rank.as_deref() != Some(SEARCH_RANK_FUNCTION) {
+            self.conn.execute(
+                "INSERT INTO project_search (project_search, rank) VALUES ('rank', ?)",
+                [SEARCH_RANK_FUNCTION],
+            )?;
+        }
+
+        // Refresh planner statistics (only re-analyzes tables that need it) so the
+        // indexes above are actually chosen
+        self.conn.execute_batch("PRAGMA optimize;")?;
+
         debug!("Database schema initialized successfully");
         Ok(())
     }
 
+    /// Merges the search index into a single segment. Bulk writes leave many small
+    /// segments that every query has to visit; merging rewrites the whole index, so
+    /// it is run after a bulk load rather than per batch.
+    pub fn optimize_search_index(&self) -> Result<(), DatabaseError> {
+        debug!("Optimizing search index");
+        self.conn
+            .execute_batch("INSERT INTO project_search (project_search) VALUES ('optimize');")?;
+        Ok(())
+    }
+
+    /// Rebuilds the plugins, samples and tags columns of the given projects' search
+    /// rows from their current links. project_id is UNINDEXED, so every lookup by it
+    /// scans the search table: a whole chunk of projects is updated per statement
+    /// rather than scanning once per project.
+    pub(crate) fn refresh_search_index(
+        conn: &Connection,
+        project_ids: &[String],
+    ) -> Result<(), DatabaseError> {
+        for chunk in project_ids.chunks(MAX_SQL_PARAMS) {
+            let mut stmt = conn.prepare_cached(&format!(
+                "UPDATE project_search SET
+                    plugins = (
+                        SELECT GROUP_CONCAT(pl.name || ' ' || COALESCE(pl.vendor, ''), ' ')
+                        FROM plugins pl
+                        JOIN project_plugins pp ON pp.plugin_id = pl.id
+                        WHERE pp.project_id = project_search.project_id
+                    ),
+                    samples = (
+                        SELECT GROUP_CONCAT(s.name, ' ')
+                        FROM samples s
+                        JOIN project_samples ps ON ps.sample_id = s.id
+                        WHERE ps.project_id = project_search.project_id
+                    ),
+                    tags = (
+                        SELECT GROUP_CONCAT(t.name, ' ')
+                        FROM tags t
+                        JOIN project_tags pt ON pt.tag_id = t.id
+                        WHERE pt.project_id = project_search.project_id
+                    )
+                WHERE project_id IN ({})",
+                sql_placeholders(chunk.len())
+            ))?;
+            stmt.execute(params_from_iter(chunk))?;
+        }
+        Ok(())
+    }
+
+    /// Drops a project's plugin and sample links so a rescan can write its current set
+    pub(crate) fn clear_project_links(
+        tx: &rusqlite::Transaction,
+        project_id: &str,
+    ) -> Result<(), DatabaseError> {
+        tx.prepare_cached("DELETE FROM project_plugins WHERE project_id = ?")?
+            .execute([project_id])?;
+        tx.prepare_cached("DELETE FROM project_samples WHERE project_id = ?")?
+            .execute([project_id])?;
+        Ok(())
+    }
+
     fn insert_plugin(tx: &rusqlite::Transaction, plugin: &Plugin) -> Result<(), DatabaseError> {
-        tx.execute(
+        tx.prepare_cached(
             "INSERT OR REPLACE INTO plugins (
                 id, ableton_plugin_id, ableton_module_id, dev_identifier, name, format,
                 installed, vendor, version, sdk_version, flags, scanstate, enabled
             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            params![
-                plugin.id.to_string(),
-                plugin. plugin_id,
-                plugin.module_id,
-                plugin.dev_identifier,
-                plugin.name,
-                plugin.plugin_format.to_string(),
-                plugin.installed,
-                plugin.vendor,
-                plugin.version,
-                plugin.sdk_version,
-                plugin.flags,
-                plugin.scanstate,
-                plugin.enabled,
-            ],
-        )?;
+        )?
+        .execute(params![
+            plugin.id.to_string(),
+            plugin.plugin_id,
+            plugin.module_id,
+            plugin.dev_identifier,
+            plugin.name,
+            plugin.plugin_format.as_str(),
+            plugin.installed,
+            plugin.vendor,
+            plugin.version,
+            plugin.sdk_version,
+            plugin.flags,
+            plugin.scanstate,
+            plugin.enabled,
+        ])?;
         Ok(())
     }
 
     fn insert_sample(tx: &rusqlite::Transaction, sample: &Sample) -> Result<(), DatabaseError> {
-        tx.execute(
+        tx.prepare_cached(
             "INSERT OR REPLACE INTO samples (id, name, path, is_present) VALUES (?, ?, ?, ?)",
-            params![
-                sample.id.to_string(),
-                sample.name,
-                sample.path.to_string_lossy().to_string(),
-                sample.is_present,
-            ],
-        )?;
+        )?
+        .execute(params![
+            sample.id.to_string(),
+            sample.name,
+            sample.path.to_string_lossy().to_string(),
+            sample.is_present,
+        ])?;
         Ok(())
     }
 
@@ -266,10 +623,10 @@ impl LiveSetDatabase {
         project_id: &str,
         plugin_id: &str,
     ) -> Result<(), DatabaseError> {
-        tx.execute(
+        tx.prepare_cached(
             "INSERT OR REPLACE INTO project_plugins (project_id, plugin_id) VALUES (?, ?)",
-            params![project_id, plugin_id],
-        )?;
+        )?
+        .execute(params![project_id, plugin_id])?;
         Ok(())
     }
 
@@ -278,10 +635,10 @@ impl LiveSetDatabase {
         project_id: &str,
         sample_id: &str,
     ) -> Result<(), DatabaseError> {
-        tx.execute(
+        tx.prepare_cached(
             "INSERT OR REPLACE INTO project_samples (project_id, sample_id) VALUES (?, ?)",
-            params![project_id, sample_id],
-        )?;
+        )?
+        .execute(params![project_id, sample_id])?;
         Ok(())
     }
 
@@ -290,344 +647,120 @@ impl LiveSetDatabase {
         Ok(None)
     }
 
+    /// Finds projects whose name, plugins or samples contain words starting with the
+    /// query terms. Uses the `project_search` FTS5 index, so the cost depends on the
+    /// number of matches rather than on scanning every project and its relations.
+    /// When no word starts with the query, falls back to matching it anywhere inside
+    /// those names, so "verb" still finds "Reverb" and "filter" finds "FabFilter".
     pub fn search(&mut self, query: &str) -> Result<Vec<LiveSet>, DatabaseError> {
         debug!("Performing search with query: {}", query);
-        let tx = self.conn.transaction()?;
-
-        // First, get all matching project paths
-        let project_paths = {
-            let mut stmt = tx.prepare(
-                r#"
-                SELECT DISTINCT p.path 
-                FROM projects p
-                LEFT JOIN project_plugins pp ON pp.project_id = p.id
-                LEFT JOIN plugins pl ON pl.id = pp.plugin_id
-                LEFT JOIN project_samples ps ON ps.project_id = p.id
-                LEFT JOIN samples s ON s.id = ps.sample_id
-                WHERE 
-                    p.name LIKE ?1 OR
-                    pl.name LIKE ?1 OR
-                    s.name LIKE ?1 OR
-                    pl.vendor LIKE ?1
-                "#,
-            )?;
-
-            let pattern = format!("%{}%", query);
-            debug!("Using search pattern: {}", pattern);
-
-            let paths: Vec<String> = stmt
-                .query_map([&pattern], |row| row.get(0))?
-                .filter_map(|r| r.ok())
-                .collect();
 
-            debug!("Found {} matching project paths", paths.len());
-            paths
-        };
-
-        let mut results = Vec::new();
-
-        // For each path, get the full project details
-        for path in project_paths {
-            let project = {
-                let mut stmt = tx.prepare(
-                    r#"
-                    SELECT 
-                        id, path, name, hash, created_at, modified_at, last_parsed_at,
-                        tempo, time_signature_numerator, time_signature_denominator,
-                        key_signature_tonic, key_signature_scale, duration_seconds, furthest_bar,
-                        ableton_version_major, ableton_version_minor, ableton_version_patch, ableton_version_beta
-                    FROM projects 
-                    WHERE path = ?
-                    "#,
-                )?;
-
-                stmt.query_row([&path], |row| {
-                    let project_id: String = row.get(0)?;
-                    debug!("Found project with ID: {}", project_id);
-
-                    let duration_secs: Option<i64> = row.get(12)?;
-                    let created_timestamp: i64 = row.get(4)?;
-                    let modified_timestamp: i64 = row.get(5)?;
-                    let parsed_timestamp: i64 = row.get(6)?;
-
-                    let mut live_set = LiveSet {
-                        is_active: true,
-                        id: Uuid::parse_str(&project_id).map_err(|_| {
-                            rusqlite::Error::InvalidParameterName("Invalid UUID".into())
-                        })?,
-                        file_path: PathBuf::from(row.get::<_, String>(1)?),
-                        name: row.get(2)?,
-                        file_hash: row.get(3)?,
-                        created_time: Local
-                            .timestamp_opt(created_timestamp, 0)
-                            .single()
-                            .ok_or_else(|| {
-                                rusqlite::Error::InvalidParameterName("Invalid timestamp".into())
-                            })?,
-                        modified_time: Local
-                            .timestamp_opt(modified_timestamp, 0)
-                            .single()
-                            .ok_or_else(|| {
-                                rusqlite::Error::InvalidParameterName("Invalid timestamp".into())
-                            })?,
-                        last_parsed_timestamp: Local
-                            .timestamp_opt(parsed_timestamp, 0)
-                            .single()
-                            .ok_or_else(|| {
-                                rusqlite::Error::InvalidParameterName("Invalid timestamp".into())
-                            })?,
-
-                        tempo: row.get(7)?,
-                        time_signature: TimeSignature {
-                            numerator: row.get(8)?,
-                            denominator: row.get(9)?,
-                        },
-                        key_signature: match (
-                            row.get::<_, Option<String>>(10)?,
-                            row.get::<_, Option<String>>(11)?,
-                        ) {
-                            (Some(tonic), Some(scale)) => {
-                                debug!("Found key signature: {} {}", tonic, scale);
-                                Some(KeySignature {
-                                    tonic: tonic
-                                        .parse()
-                                        .map_err(|e| rusqlite::Error::InvalidParameterName(e))?,
-                                    scale: scale
-                                        .parse()
-                                        .map_err(|e| rusqlite::Error::InvalidParameterName(e))?,
-                                })
-                            }
-                            _ => None,
-                        },
-                        furthest_bar: row.get(13)?,
-
-                        ableton_version: AbletonVersion {
-                            major: row.get(14)?,
-                            minor: row.get(15)?,
-                            patch: row.get(16)?,
-                            beta: row.get(17)?,
-                        },
-
-                        estimated_duration: duration_secs.map(chrono::Duration::seconds),
-                        plugins: HashSet::new(),
-                        samples: HashSet::new(),
-                        tags: HashSet::new(),
-                    };
-
-                    // Get plugins in a new scope
-                    {
-                        let mut stmt = tx.prepare(
-                            r#"
-                            SELECT p.* 
-                            FROM plugins p
-                            JOIN project_plugins pp ON pp.plugin_id = p.id
-                            WHERE pp.project_id = ?
-                            "#,
-                        )?;
-
-                        let plugins = stmt
-                            .query_map([&project_id], |row| {
-                                let name: String = row.get(4)?;
-                                debug!("Found plugin: {}", name);
-                                Ok(Plugin {
-                                    id: Uuid::new_v4(),
-                                    plugin_id: row.get(1)?,
-                                    module_id: row.get(2)?,
-                                    dev_identifier: row.get(3)?,
-                                    name,
-                                    plugin_format: row
-                                        .get::<_, String>(5)?
-                                        .parse()
-                                        .map_err(|e| rusqlite::Error::InvalidParameterName(e))?,
-                                    installed: row.get(6)?,
-                                    vendor: row.get(7)?,
-                                    version: row.get(8)?,
-                                    sdk_version: row.get(9)?,
-                                    flags: row.get(10)?,
-                                    scanstate: row.get(11)?,
-                                    enabled: row.get(12)?,
-                                })
-                            })?
-                            .filter_map(|r| r.ok())
-                            .collect::<HashSet<_>>();
-
-                        debug!("Retrieved {} plugins", plugins.len());
-                        live_set.plugins = plugins;
-                    }
-
-                    // Get samples in a new scope
-                    {
-                        let mut stmt = tx.prepare(
-                            r#"
-                            SELECT s.* 
-                            FROM samples s
-                            JOIN project_samples ps ON ps.sample_id = s.id
-                            WHERE ps.project_id = ?
-                            "#,
-                        )?;
-
-                        let samples = stmt
-                            .query_map([&project_id], |row| {
-                                let name: String = row.get(1)?;
-                                debug!("Found sample: {}", name);
-                                Ok(Sample {
-                                    id: Uuid::new_v4(),
-                                    name,
-                                    path: PathBuf::from(row.get::<_, String>(2)?),
-                                    is_present: row.get(3)?,
-                                })
-                            })?
-                            .filter_map(|r| r.ok())
-                            .collect::<HashSet<_>>();
-
-                        debug!("Retrieved {} samples", samples.len());
-                        live_set.samples = samples;
-                    }
-
-                    Ok(live_set)
-                })
-                .optional()?
-            };
-
-            if let Some(live_set) = project {
-                debug!("Retrieved project: {}", live_set.name);
-                results.push(live_set);
+        let match_expression = match fts5_prefix_query(query) {
+            Some(terms) => format!("{{name plugins samples}} : ({})", terms),
+            None => {
+                // Nothing to match on, so every project qualifies
+                let mut results = Vec::new();
+                self.for_each_project_with_relations(None, |live_set| results.push(live_set))?;
+                return Ok(results);
             }
+        };
+        debug!("Using FTS5 match expression: {}", match_expression);
+
+        // Rank inside the FTS index, then load the matches in rank order
+        let ranked = Self::ranked_project_ids(&self.conn, &match_expression, MAX_SEARCH_RESULTS)?;
+        let mut project_ids: Vec<String> = ranked.into_iter().map(|(id, _)| id).collect();
+        if project_ids.is_empty() {
+            debug!("No prefix matches, falling back to substring search");
+            project_ids = Self::substring_project_ids(&self.conn, query, MAX_SEARCH_RESULTS)?;
         }
+        let mut projects = Self::load_projects_by_ids(&self.conn, &project_ids)?;
+        let results: Vec<LiveSet> = project_ids
+            .iter()
+            .filter_map(|id| projects.remove(id))
+            .collect();
 
-        tx.commit()?;
         debug!("Successfully retrieved {} matching projects", results.len());
         Ok(results)
     }
 
-    pub fn get_project_by_path(&mut self, path: &str) -> Result<Option<LiveSet>, DatabaseError> {
-        debug!("Retrieving project by path: {}", path);
-        let tx = self.conn.transaction()?;
-
-        // Get project
-        let mut stmt = tx.prepare(
-            r#"
-            SELECT 
-                id, path, name, hash, created_at, modified_at, last_parsed_at,
-                tempo, time_signature_numerator, time_signature_denominator,
-                key_signature_tonic, key_signature_scale, duration_seconds, furthest_bar,
-                ableton_version_major, ableton_version_minor, ableton_version_patch, ableton_version_beta
-            FROM projects 
-            WHERE path = ?
-            "#,
-        )?;
+    /// Loads the given projects with their plugins and samples, keyed by project id.
+    /// Ids are looked up in chunks, so the cost is a fixed number of queries
+    /// regardless of how many projects are requested.
+    pub(crate) fn load_projects_by_ids(
+        conn: &Connection,
+        project_ids: &[String],
+    ) -> Result<HashMap<String, LiveSet>, DatabaseError> {
+        let mut projects = Vec::with_capacity(project_ids.len());
+
+        for chunk in project_ids.chunks(MAX_SQL_PARAMS) {
+            let mut stmt = conn.prepare_cached(&format!(
+                "SELECT {} FROM projects WHERE id IN ({})",
+                PROJECT_COLUMNS,
+                sql_placeholders(chunk.len())
+            ))?;
+            let columns = ProjectColumns::new(&stmt)?;
+
+            let mut rows = stmt.query(params_from_iter(chunk))?;
+            while let Some(row) = rows.next()? {
+                projects.push(Self::row_to_live_set(row, &columns)?);
+            }
+        }
 
-        let project = stmt
-            .query_row([path], |row| {
-                let project_id: String = row.get(0)?;
-                debug!("Found project with ID: {}", project_id);
-
-                let duration_secs: Option<i64> = row.get(12)?;
-                let created_timestamp: i64 = row.get(4)?;
-                let modified_timestamp: i64 = row.get(5)?;
-                let parsed_timestamp: i64 = row.get(6)?;
-
-                // Create LiveSet instance
-                let live_set = LiveSet {
-                    is_active: true,
-                    id: Uuid::parse_str(&project_id).map_err(|_| {
-                        rusqlite::Error::InvalidParameterName("Invalid UUID".into())
-                    })?,
-                    file_path: PathBuf::from(row.get::<_, String>(1)?),
-                    name: row.get(2)?,
-                    file_hash: row.get(3)?,
-                    created_time: Local
-                        .timestamp_opt(created_timestamp, 0)
-                        .single()
-                        .ok_or_else(|| {
-                            rusqlite::Error::InvalidParameterName("Invalid timestamp".into())
-                        })?,
-                    modified_time: Local
-                        .timestamp_opt(modified_timestamp, 0)
-                        .single()
-                        .ok_or_else(|| {
-                            rusqlite::Error::InvalidParameterName("Invalid timestamp".into())
-                        })?,
-                    last_parsed_timestamp: Local
-                        .timestamp_opt(parsed_timestamp, 0)
-                        .single()
-                        .ok_or_else(|| {
-                            rusqlite::Error::InvalidParameterName("Invalid timestamp".into())
-                        })?,
-
-                    tempo: row.get(7)?,
-                    time_signature: TimeSignature {
-                        numerator: row.get(8)?,
-                        denominator: row.get(9)?,
-                    },
-                    key_signature: match (
-                        row.get::<_, Option<String>>(10)?,
-                        row.get::<_, Option<String>>(11)?,
-                    ) {
-                        (Some(tonic), Some(scale)) => {
-                            debug!("Found key signature: {} {}", tonic, scale);
-                            Some(KeySignature {
-                                tonic: tonic
-                                    .parse()
-                                    .map_err(|e| rusqlite::Error::InvalidParameterName(e))?,
-                                scale: scale
-                                    .parse()
-                                    .map_err(|e| rusqlite::Error::InvalidParameterName(e))?,
-                            })
-                        }
-                        _ => None,
-                    },
-                    furthest_bar: row.get(13)?,
-
-                    ableton_version: AbletonVersion {
-                        major: row.get(14)?,
-                        minor: row.get(15)?,
-                        patch: row.get(16)?,
-                        beta: row.get(17)?,
-                    },
-
-                    estimated_duration: duration_secs.map(chrono::Duration::seconds),
-                    plugins: HashSet::new(),
-                    samples: HashSet::new(),
-                    tags: HashSet::new(),
-                };
+        Self::attach_relations(conn, &mut projects)?;
+        Ok(projects
+            .into_iter()
+            .map(|live_set| (live_set.id.to_string(), live_set))
+            .collect())
+    }
 
-                Ok(live_set)
-            })
-            .optional()?;
+    /// Fills in the plugins and samples of already loaded projects with one batched
+    /// query per relation.
+    pub(crate) fn attach_relations(
+        conn: &Connection,
+        live_sets: &mut [LiveSet],
+    ) -> Result<(), DatabaseError> {
+        let project_ids: Vec<String> = live_sets.iter().map(|p| p.id.to_string()).collect();
+        let mut plugins_by_project = Self::load_project_plugins(conn, &project_ids)?;
+        let mut samples_by_project = Self::load_project_samples(conn, &project_ids)?;
 
-        let mut project = match project {
-            Some(p) => {
-                debug!("Found project: {}", p.name);
-                p
-            }
-            None => {
-                debug!("No project found at path: {}", path);
-                return Ok(None);
-            }
-        };
+        for (live_set, project_id) in live_sets.iter_mut().zip(&project_ids) {
+            live_set.plugins = plugins_by_project.remove(project_id).unwrap_or_default();
+            live_set.samples = samples_by_project.remove(project_id).unwrap_or_default();
+        }
+        Ok(())
+    }
 
-        // Get plugins
-        debug!("Retrieving plugins for project");
-        let mut stmt = tx.prepare(
-            r#"
-            SELECT p.* 
-            FROM plugins p
-            JOIN project_plugins pp ON pp.plugin_id = p.id
-            WHERE pp.project_id = (SELECT id FROM projects WHERE path = ?)
-            "#,
-        )?;
+    /// Loads the plugins of every given project with one query per chunk of ids,
+    /// grouped by project id.
+    pub(crate) fn load_project_plugins(
+        conn: &Connection,
+        project_ids: &[String],
+    ) -> Result<HashMap<String, HashSet<Plugin>>, DatabaseError> {
+        let mut plugins_by_project: HashMap<String, HashSet<Plugin>> =
+            HashMap::with_capacity(project_ids.len());
+
+        for chunk in project_ids.chunks(MAX_SQL_PARAMS) {
+            let mut stmt = conn.prepare_cached(&format!(
+                r#"
+                SELECT pp.project_id, p.ableton_plugin_id, p.ableton_module_id, p.dev_identifier,
+                       p.name, p.format, p.installed, p.vendor, p.version, p.sdk_version,
+                       p.flags, p.scanstate, p.enabled, p.id
+                FROM plugins p
+                JOIN project_plugins pp ON pp.plugin_id = p.id
+                WHERE pp.project_id IN ({})
+                "#,
+                sql_placeholders(chunk.len())
+            ))?;
 
-        let plugins = stmt
-            .query_map([path], |row| {
-                let name: String = row.get(4)?;
-                debug!("Found plugin: {}", name);
-                Ok(Plugin {
-                    id: Uuid::new_v4(),
+            let mut rows = stmt.query(params_from_iter(chunk))?;
+            while let Some(row) = rows.next()? {
+                let project_id: String = row.get(0)?;
+                let plugin = Plugin {
+                    id: uuid_from_sql(text_column(row, 13)?, 13)?,
                     plugin_id: row.get(1)?,
                     module_id: row.get(2)?,
                     dev_identifier: row.get(3)?,
-                    name,
+                    name: row.get(4)?,
                     plugin_format: row
                         .get::<_, String>(5)?
                         .parse()
@@ -639,47 +772,116 @@ impl LiveSetDatabase {
                     flags: row.get(10)?,
                     scanstate: row.get(11)?,
                     enabled: row.get(12)?,
-                })
-            })?
-            .collect::<SqliteResult<HashSet<_>>>()?;
-
-        debug!("Retrieved {} plugins", plugins.len());
-        project.plugins = plugins;
-
-        // Get samples
-        debug!("Retrieving samples for project");
-        let mut stmt = tx.prepare(
-            r#"
-            SELECT s.* 
-            FROM samples s
-            JOIN project_samples ps ON ps.sample_id = s.id
-            WHERE ps.project_id = (SELECT id FROM projects WHERE path = ?)
-            "#,
-        )?;
+                };
+                plugins_by_project.entry(project_id).or_default().insert(plugin);
+            }
+        }
+
+        debug!("Retrieved plugins for {} projects", plugins_by_project.len());
+        Ok(plugins_by_project)
+    }
+
+    /// Loads the samples of every given project with one query per chunk of ids,
+    /// grouped by project id.
+    pub(crate) fn load_project_samples(
+        conn: &Connection,
+        project_ids: &[String],
+    ) -> Result<HashMap<String, HashSet<Sample>>, DatabaseError> {
+        let mut samples_by_project: HashMap<String, HashSet<Sample>> =
+            HashMap::with_capacity(project_ids.len());
+
+        for chunk in project_ids.chunks(MAX_SQL_PARAMS) {
+            let mut stmt = conn.prepare_cached(&format!(
+                r#"
+                SELECT ps.project_id, s.name, s.path, s.is_present, s.id
+                FROM samples s
+                JOIN project_samples ps ON ps.sample_id = s.id
+                WHERE ps.project_id IN ({})
+                "#,
+                sql_placeholders(chunk.len())
+            ))?;
 
-        let samples = stmt
-            .query_map([path], |row| {
-                let name: String = row.get(1)?;
-                debug!("Found sample: {}", name);
-                Ok(Sample {
-                    id: Uuid::new_v4(),
-                    name,
+            let mut rows = stmt.query(params_from_iter(chunk))?;
+            while let Some(row) = rows.next()? {
+                let project_id: String = row.get(0)?;
+                let sample = Sample {
+                    id: uuid_from_sql(text_column(row, 4)?, 4)?,
+                    name: row.get(1)?,
                     path: PathBuf::from(row.get::<_, String>(2)?),
                     is_present: row.get(3)?,
-                })
-            })?
-            .collect::<SqliteResult<HashSet<_>>>()?;
+                };
+                samples_by_project.entry(project_id).or_default().insert(sample);
+            }
+        }
 
-        debug!("Retrieved {} samples", samples.len());
-        project.samples = samples;
+        debug!("Retrieved samples for {} projects", samples_by_project.len());
+        Ok(samples_by_project)
+    }
 
-        info!(
-            "Successfully retrieved project {} with {} plugins and {} samples",
-            project.name,
-            project.plugins.len(),
-            project.samples.len()
-        );
-        Ok(Some(project))
+    /// Loads the tag names of every given project with one query per chunk of ids,
+    /// grouped by project id.
+    pub(crate) fn load_project_tags(
+        conn: &Connection,
+        project_ids: &[String],
+    ) -> Result<HashMap<String, HashSet<String>>, DatabaseError> {
+        let mut tags_by_project: HashMap<String, HashSet<String>> =
+            HashMap::with_capacity(project_ids.len());
+
+        for chunk in project_ids.chunks(MAX_SQL_PARAMS) {
+            let mut stmt = conn.prepare_cached(&format!(
+                r#"
+                SELECT pt.project_id, t.name
+                FROM tags t
+                JOIN project_tags pt ON pt.tag_id = t.id
+                WHERE pt.project_id IN ({})
+                "#,
+                sql_placeholders(chunk.len())
+            ))?;
+
+            let mut rows = stmt.query(params_from_iter(chunk))?;
+            while let Some(row) = rows.next()? {
+                let project_id: String = row.get(0)?;
+                tags_by_project.entry(project_id).or_default().insert(row.get(1)?);
+            }
+        }
+
+        debug!("Retrieved tags for {} projects", tags_by_project.len());
+        Ok(tags_by_project)
+    }
+
+    pub fn get_project_by_path(&mut self, path: &str) -> Result<Option<LiveSet>, DatabaseError> {
+        debug!("Retrieving project by path: {}", path);
+
+        // One round trip: the project row with its plugins and samples aggregated
+        // into JSON arrays by correlated subqueries
+        let mut stmt = self.conn.prepare_cached(&format!(
+            "SELECT {}, {} AS plugins_json, {} AS samples_json FROM projects WHERE path = ?",
+            PROJECT_COLUMNS, PROJECT_PLUGINS_JSON, PROJECT_SAMPLES_JSON
+        ))?;
+
+        let columns = ProjectColumns::new(&stmt)?;
+        let plugins_column = stmt.column_index("plugins_json")?;
+        let samples_column = stmt.column_index("samples_json")?;
+
+        let project = stmt
+            .query_row([path], |row| {
+                let mut live_set = Self::row_to_live_set(row, &columns)?;
+                live_set.plugins = plugins_from_json(row, plugins_column)?;
+                live_set.samples = samples_from_json(row, samples_column)?;
+                Ok(live_set)
+            })
+            .optional()?;
+
+        match &project {
+            Some(project) => debug!(
+                "Successfully retrieved project {} with {} plugins and {} samples",
+                project.name,
+                project.plugins.len(),
+                project.samples.len()
+            ),
+            None => debug!("No project found at path: {}", path),
+        }
+        Ok(project)
     }
 
     pub fn insert_project(&mut self, live_set: &LiveSet) -> Result<(), DatabaseError> {
@@ -688,26 +890,16 @@ impl LiveSetDatabase {
             live_set.name,
             live_set.file_path.display()
         );
-        let tx = self.conn.transaction()?;
-
-        // Insert project
-        let project_id = live_set.id.to_string();
-        debug!("Using project UUID: {}", project_id);
-
-        tx.execute(
-            "INSERT INTO projects (
-                id, name, path, hash, created_at, modified_at,
-                last_parsed_at, tempo, time_signature_numerator,
-                time_signature_denominator, key_signature_tonic,
-                key_signature_scale, furthest_bar, duration_seconds,
-                ableton_version_major, ableton_version_minor,
-                ableton_version_patch, ableton_version_beta,
-                notes
-            ) VALUES (
-                ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
-            )",
+        // Take the write lock up front so the whole project commits in one write
+        // transaction instead of upgrading from a read partway through
+        let tx = self
+            .conn
+            .transaction_with_behavior(TransactionBehavior::Immediate)?;
+
+        // Insert the project, or update the existing row for this path
+        let project_id: String = tx.prepare_cached(UPSERT_PROJECT_SQL)?.query_row(
             params![
-                project_id,
+                live_set.id.to_string(),
                 live_set.name,
                 live_set.file_path.to_string_lossy().to_string(),
                 live_set.file_hash,
@@ -717,8 +909,8 @@ impl LiveSetDatabase {
                 live_set.tempo,
                 live_set.time_signature.numerator,
                 live_set.time_signature.denominator,
-                live_set.key_signature.as_ref().map(|k| k.tonic.to_string()),
-                live_set.key_signature.as_ref().map(|k| k.scale.to_string()),
+                live_set.key_signature.as_ref().map(|k| k.tonic.as_str()),
+                live_set.key_signature.as_ref().map(|k| k.scale.as_str()),
                 live_set.furthest_bar,
                 live_set.estimated_duration.map(|d| d.num_seconds()),
                 live_set.ableton_version.major,
@@ -727,7 +919,10 @@ impl LiveSetDatabase {
                 live_set.ableton_version.beta,
                 None::<String>, // notes starts as NULL
             ],
+            |row| row.get(0),
         )?;
+        debug!("Using project UUID: {}", project_id);
+        Self::clear_project_links(&tx, &project_id)?;
 
         // Insert plugins
         debug!("Inserting {} plugins", live_set.plugins.len());
@@ -748,51 +943,31 @@ impl LiveSetDatabase {
         }
 
         // Now update the FTS index with all relations set
-        tx.execute(
-            "UPDATE project_search SET
-                plugins = (
-                    SELECT GROUP_CONCAT(pl.name || ' ' || COALESCE(pl.vendor, ''), ' ')
-                    FROM plugins pl
-                    JOIN project_plugins pp ON pp.plugin_id = pl.id
-                    WHERE pp.project_id = ?
-                ),
-                samples = (
-                    SELECT GROUP_CONCAT(s.name, ' ')
-                    FROM samples s
-                    JOIN project_samples ps ON ps.sample_id = s.id
-                    WHERE ps.project_id = ?
-                ),
-                tags = (
-                    SELECT GROUP_CONCAT(t.name, ' ')
-                    FROM tags t
-                    JOIN project_tags pt ON pt.tag_id = t.id
-                    WHERE pt.project_id = ?
-                )
-            WHERE project_id = ?",
-            params![project_id, project_id, project_id, project_id],
-        )?;
-
-        // Debug: Inspect FTS index content
-        debug!("Inspecting FTS5 index for project {}", live_set.name);
-        #[allow(unused)]
-        if let Ok(Some(row)) = tx.query_row(
-            "SELECT * FROM project_search WHERE project_id = ?",
-            params![project_id],
-            |row| {
-                debug!("FTS5 index content:");
-                debug!("  project_id: {}", row.get::<_, String>(0)?);
-                debug!("  name: {}", row.get::<_, String>(1)?);
-                debug!("  path: {}", row.get::<_, String>(2)?);
-                debug!("  plugins: {:?}", row.get::<_, Option<String>>(3)?);
-                debug!("  samples: {:?}", row.get::<_, Option<String>>(4)?);
-                debug!("  tags: {:?}", row.get::<_, Option<String>>(5)?);
-                debug!("  notes: {:?}", row.get::<_, Option<String>>(6)?);
-                debug!("  created_at: {:?}", row.get::<_, Option<String>>(7)?);
-                debug!("  modified_at: {:?}", row.get::<_, Option<String>>(8)?);
-                Ok(Some(()))
-            },
-        ) {
-            debug!("Successfully inspected FTS5 index");
+        Self::refresh_search_index(&tx, std::slice::from_ref(&project_id))?;
+
+        // Debug: Inspect FTS index content (skipped unless debug logging is on)
+        if log_enabled!(Level::Debug) {
+            debug!("Inspecting FTS5 index for project {}", live_set.name);
+            #[allow(unused)]
+            if let Ok(Some(row)) = tx.query_row(
+                "SELECT * FROM project_search WHERE project_id = ?",
+                params![project_id],
+                |row| {
+                    debug!("FTS5 index content:");
+                    debug!("  project_id: {}", row.get::<_, String>(0)?);
+                    debug!("  name: {}", row.get::<_, String>(1)?);
+                    debug!("  path: {}", row.get::<_, String>(2)?);
+                    debug!("  plugins: {:?}", row.get::<_, Option<String>>(3)?);
+                    debug!("  samples: {:?}", row.get::<_, Option<String>>(4)?);
+                    debug!("  tags: {:?}", row.get::<_, Option<String>>(5)?);
+                    debug!("  notes: {:?}", row.get::<_, Option<String>>(6)?);
+                    debug!("  created_at: {:?}", row.get::<_, Option<String>>(7)?);
+                    debug!("  modified_at: {:?}", row.get::<_, Option<String>>(8)?);
+                    Ok(Some(()))
+                },
+            ) {
+                debug!("Successfully inspected FTS5 index");
+            }
         }
 
         tx.commit()?;
@@ -807,10 +982,9 @@ impl LiveSetDatabase {
     }
 
     pub fn mark_project_deleted(&mut self, project_id: &Uuid) -> Result<(), DatabaseError> {
-        self.conn.execute(
-            "UPDATE projects SET is_active = false WHERE id = ?",
-            params![project_id.to_string()],
-        ).map_err(DatabaseError::from)?;
+        self.conn
+            .prepare_cached("UPDATE projects SET is_active = false WHERE id = ?")?
+            .execute(params![project_id.to_string()])?;
         Ok(())
     }
 
@@ -819,98 +993,167 @@ impl LiveSetDatabase {
         project_id: &Uuid,
         new_path: &Path,
     ) -> Result<(), DatabaseError> {
-        self.conn.execute(
-            "UPDATE projects SET 
-                is_active = true,
-                path = ?,
-                modified_at = ?
-             WHERE id = ?",
-            params![
+        self.conn
+            .prepare_cached(
+                "UPDATE projects SET 
+                    is_active = true,
+                    path = ?,
+                    modified_at = ?
+                 WHERE id = ?",
+            )?
+            .execute(params![
                 new_path.to_string_lossy().to_string(),
                 Utc::now().timestamp(),
                 project_id.to_string(),
-            ],
-        ).map_err(DatabaseError::from)?;
+            ])?;
         Ok(())
     }
 
     pub fn find_deleted_by_hash(&mut self, path: &Path) -> Result<Option<LiveSet>, DatabaseError> {
         let hash = load_file_hash(&path.to_path_buf())?;
         
-        self.conn.query_row(
-            "SELECT * FROM projects 
+        let mut stmt = self.conn.prepare_cached(&format!(
+            "SELECT {} FROM projects 
              WHERE is_active = false AND hash = ?",
-            params![hash],
-            |row| self.row_to_live_set(row),
-        ).optional().map_err(DatabaseError::from)
+            PROJECT_COLUMNS
+        ))?;
+        let columns = ProjectColumns::new(&stmt)?;
+        Ok(stmt
+            .query_row(params![hash], |row| Self::row_to_live_set(row, &columns))
+            .optional()?)
     }
 
     pub fn get_all_projects_with_status(
         &self,
         is_active: Option<bool>
     ) -> Result<Vec<LiveSet>, DatabaseError> {
-        match is_active {
-            Some(status) => {
-                let mut stmt = self.conn.prepare(
-                    "SELECT * FROM projects WHERE is_active = ?"
-                ).map_err(DatabaseError::from)?;
-                
-                let projects = stmt.query_map([status], |row| {
-                    self.row_to_live_set(row)
-                }).map_err(DatabaseError::from)?;
-                
-                projects.collect::<rusqlite::Result<Vec<_>>>().map_err(DatabaseError::from)
-            }
-            None => {
-                let mut stmt = self.conn.prepare(
-                    "SELECT * FROM projects"
-                ).map_err(DatabaseError::from)?;
-                
-                let projects = stmt.query_map([], |row| {
-                    self.row_to_live_set(row)
-                }).map_err(DatabaseError::from)?;
-                
-                projects.collect::<rusqlite::Result<Vec<_>>>().map_err(DatabaseError::from)
+        let mut projects = Vec::new();
+        self.for_each_project_with_status(is_active, |live_set| projects.push(live_set))?;
+        Ok(projects)
+    }
+
+    /// Hands each project row to `visit` as it is read, so callers can build their
+    /// own output without first materializing a `Vec<LiveSet>`.
+    pub fn for_each_project_with_status<F>(
+        &self,
+        is_active: Option<bool>,
+        visit: F,
+    ) -> Result<(), DatabaseError>
+    where
+        F: FnMut(LiveSet),
+    {
+        self.visit_projects(is_active, false, visit)
+    }
+
+    /// Like `for_each_project_with_status`, but each project also carries its plugins
+    /// and samples. These are aggregated to JSON inside SQLite in the same query.
+    pub fn for_each_project_with_relations<F>(
+        &self,
+        is_active: Option<bool>,
+        visit: F,
+    ) -> Result<(), DatabaseError>
+    where
+        F: FnMut(LiveSet),
+    {
+        self.visit_projects(is_active, true, visit)
+    }
+
+    fn visit_projects<F>(
+        &self,
+        is_active: Option<bool>,
+        with_relations: bool,
+        mut visit: F,
+    ) -> Result<(), DatabaseError>
+    where
+        F: FnMut(LiveSet),
+    {
+        let relations = if with_relations {
+            format!(
+                ", {} AS plugins_json, {} AS samples_json",
+                PROJECT_PLUGINS_JSON, PROJECT_SAMPLES_JSON
+            )
+        } else {
+            String::new()
+        };
+        let filter = if is_active.is_some() { " WHERE is_active = ?" } else { "" };
+
+        let mut stmt = self.conn.prepare_cached(&format!(
+            "SELECT {}{} FROM projects{}",
+            PROJECT_COLUMNS, relations, filter
+        ))?;
+
+        let columns = ProjectColumns::new(&stmt)?;
+        let relation_columns = if with_relations {
+            Some((stmt.column_index("plugins_json")?, stmt.column_index("samples_json")?))
+        } else {
+            None
+        };
+
+        let mut rows = match is_active {
+            Some(status) => stmt.query([status])?,
+            None => stmt.query([])?,
+        };
+
+        while let Some(row) = rows.next()? {
+            let mut live_set = Self::row_to_live_set(row, &columns)?;
+            if let Some((plugins_column, samples_column)) = relation_columns {
+                live_set.plugins = plugins_from_json(row, plugins_column)?;
+                live_set.samples = samples_from_json(row, samples_column)?;
             }
+            visit(live_set);
         }
+        Ok(())
     }
 
     pub fn permanently_delete_project(&mut self, project_id: &Uuid) -> Result<(), DatabaseError> {
-        let tx = self.conn.transaction().map_err(DatabaseError::from)?;
+        let tx = self.conn.transaction()?;
         
         // Only allow deletion of inactive projects
-        let rows_affected = tx.execute(
-            "DELETE FROM projects WHERE id = ? AND is_active = false",
-            params![project_id.to_string()],
-        ).map_err(DatabaseError::from)?;
+        let rows_affected = tx
+            .prepare_cached("DELETE FROM projects WHERE id = ? AND is_active = false")?
+            .execute(params![project_id.to_string()])?;
         
         if rows_affected == 0 {
             return Err(DatabaseError::InvalidOperation("Cannot permanently delete an active project".to_string()));
         }
         
-        tx.commit().map_err(DatabaseError::from)?;
+        tx.commit()?;
         Ok(())
     }
 
-    fn row_to_live_set(&self, row: &rusqlite::Row) -> rusqlite::Result<LiveSet> {
-        let id: String = row.get("id")?;
-        let created_timestamp: i64 = row.get("created_at")?;
-        let modified_timestamp: i64 = row.get("modified_at")?;
-        let parsed_timestamp: i64 = row.get("last_parsed_at")?;
-        let duration_secs: Option<i64> = row.get("duration_seconds")?;
+    /// Builds a `LiveSet` from a `projects` row using the column positions resolved by
+    /// `ProjectColumns`, so it works for any query that selects the project columns
+    /// regardless of their order. Plugins, samples and tags are left empty for the
+    /// caller to fill in.
+    pub(crate) fn row_to_live_set(
+        row: &rusqlite::Row,
+        columns: &ProjectColumns,
+    ) -> rusqlite::Result<LiveSet> {
+        // Borrow the id text rather than copying it into a String just to parse it
+        let id = row.get_ref(columns.id)?.as_str().map_err(|e| {
+            rusqlite::Error::FromSqlConversionFailure(
+                columns.id,
+                rusqlite::types::Type::Text,
+                Box::new(e),
+            )
+        })?;
+        let created_timestamp: i64 = row.get(columns.created_at)?;
+        let modified_timestamp: i64 = row.get(columns.modified_at)?;
+        let parsed_timestamp: i64 = row.get(columns.last_parsed_at)?;
+        let duration_secs: Option<i64> = row.get(columns.duration_seconds)?;
 
         Ok(LiveSet {
-            is_active: row.get("is_active")?,
-            id: Uuid::parse_str(&id).map_err(|e| {
+            is_active: row.get(columns.is_active)?,
+            id: Uuid::parse_str(id).map_err(|e| {
                 rusqlite::Error::FromSqlConversionFailure(
-                    0,
+                    columns.id,
                     rusqlite::types::Type::Text,
                     Box::new(e),
                 )
             })?,
-            file_path: PathBuf::from(row.get::<_, String>("path")?),
-            name: row.get("name")?,
-            file_hash: row.get("hash")?,
+            file_path: PathBuf::from(row.get::<_, String>(columns.path)?),
+            name: row.get(columns.name)?,
+            file_hash: row.get(columns.hash)?,
             created_time: Local
                 .timestamp_opt(created_timestamp, 0)
                 .single()
@@ -951,14 +1194,15 @@ impl LiveSetDatabase {
                     )
                 })?,
 
-            tempo: row.get("tempo")?,
+            tempo: row.get(columns.tempo)?,
             time_signature: TimeSignature {
-                numerator: row.get("time_signature_numerator")?,
-                denominator: row.get("time_signature_denominator")?,
+                numerator: row.get(columns.time_signature_numerator)?,
+                denominator: row.get(columns.time_signature_denominator)?,
             },
+            // Parsed from the borrowed column text, with no String copied per row
             key_signature: match (
-                row.get::<_, Option<String>>("key_signature_tonic")?,
-                row.get::<_, Option<String>>("key_signature_scale")?,
+                optional_text_column(row, columns.key_signature_tonic)?,
+                optional_text_column(row, columns.key_signature_scale)?,
             ) {
                 (Some(tonic), Some(scale)) => Some(KeySignature {
                     tonic: tonic.parse().map_err(|e| {
@@ -978,13 +1222,13 @@ impl LiveSetDatabase {
                 }),
                 _ => None,
             },
-            furthest_bar: row.get("furthest_bar")?,
+            furthest_bar: row.get(columns.furthest_bar)?,
 
             ableton_version: AbletonVersion {
-                major: row.get("ableton_version_major")?,
-                minor: row.get("ableton_version_minor")?,
-                patch: row.get("ableton_version_patch")?,
-                beta: row.get("ableton_version_beta")?,
+                major: row.get(columns.ableton_version_major)?,
+                minor: row.get(columns.ableton_version_minor)?,
+                patch: row.get(columns.ableton_version_patch)?,
+                beta: row.get(columns.ableton_version_beta)?,
             },
 
             estimated_duration: duration_secs.map(chrono::Duration::seconds),
@@ -994,15 +1238,30 @@ impl LiveSetDatabase {
         })
     }
 
+    /// Returns a token that changes whenever the database contents change, whether
+    /// written through this connection (`total_changes`) or another one, such as the
+    /// file watcher's (`data_version`). Used to tell whether cached reads are stale.
+    pub fn data_version(&self) -> Result<(i64, i64), DatabaseError> {
+        let data_version: i64 = self
+            .conn
+            .prepare_cached("PRAGMA data_version")?
+            .query_row([], |row| row.get(0))?;
+        let total_changes: i64 = self
+            .conn
+            .prepare_cached("SELECT total_changes()")?
+            .query_row([], |row| row.get(0))?;
+        Ok((data_version, total_changes))
+    }
+
     pub fn get_last_scanned_time(&self, path: &Path) -> Result<Option<DateTime<Local>>, DatabaseError> {
         let path_str = path.to_string_lossy().to_string();
         
+        // Called once per discovered file during a scan, so reuse the parsed statement
         let last_parsed: Option<i64> = self.conn
-            .query_row(
+            .prepare_cached(
                 "SELECT last_parsed_at FROM projects WHERE path = ? AND is_active = true",
-                params![path_str],
-                |row| row.get(0)
-            )
+            )?
+            .query_row(params![path_str], |row| row.get(0))
             .optional()?;
             
         Ok(last_parsed.map(|timestamp| {
@@ -1011,4 +1270,35 @@ impl LiveSetDatabase {
                 .expect("Invalid timestamp in database")
         }))
     }
+
+    /// Last parse time of every active project keyed by path, so a scan can check
+    /// all discovered files against one query instead of one lookup per file
+    pub fn get_last_scanned_times(&self) -> Result<HashMap<String, DateTime<Local>>, DatabaseError> {
+        let mut stmt = self.conn.prepare_cached(
+            "SELECT path, last_parsed_at FROM projects WHERE is_active = true",
+        )?;
+
+        let mut last_scanned = HashMap::new();
+        let mut rows = stmt.query([])?;
+        while let Some(row) = rows.next()? {
+            let path: String = row.get(0)?;
+            let timestamp: i64 = row.get(1)?;
+            let time = Local.timestamp_opt(timestamp, 0)
+                .single()
+                .expect("Invalid timestamp in database");
+            last_scanned.insert(path, time);
+        }
+
+        debug!("Loaded last scan times for {} projects", last_scanned.len());
+        Ok(last_scanned)
+    }
+
+    /// Paths of all projects in the database, active or not
+    pub fn get_project_paths(&self) -> Result<HashSet<String>, DatabaseError> {
+        let mut stmt = self.conn.prepare_cached("SELECT path FROM projects")?;
+        let paths = stmt
+            .query_map([], |row| row.get(0))?
+            .collect::<Result<HashSet<String>, _>>()?;
+        Ok(paths)
+    }
 }
@@ -1,5 +1,11 @@
 use chrono::{DateTime, Local};
-use rusqlite::types::ToSql;
+use rusqlite::types::{ToSql, Type, ValueRef};
+use serde::{Deserialize, Deserializer};
+use std::collections::HashSet;
+use std::path::PathBuf;
+use uuid::Uuid;
+
+use crate::models::{Plugin, Sample};
 
 pub(crate) struct SqlDateTime(DateTime<Local>);
 
@@ -14,3 +20,118 @@ impl ToSql for SqlDateTime {
         Ok(rusqlite::types::ToSqlOutput::from(self.0.timestamp()))
     }
 }
+
+/// SQLite has no boolean type, so flags come through JSON aggregates as 0/1
+fn bool_from_int<'de, D: Deserializer<'de>>(deserializer: D) -> Result<bool, D::Error> {
+    Ok(i64::deserialize(deserializer)? != 0)
+}
+
+/// A plugin row as produced by `PROJECT_PLUGINS_JSON`
+#[derive(Deserialize)]
+struct PluginJson<'a> {
+    id: &'a str,
+    ableton_plugin_id: Option<i32>,
+    ableton_module_id: Option<i32>,
+    dev_identifier: String,
+    name: String,
+    format: String,
+    #[serde(deserialize_with = "bool_from_int")]
+    installed: bool,
+    vendor: Option<String>,
+    version: Option<String>,
+    sdk_version: Option<String>,
+    flags: Option<i32>,
+    scanstate: Option<i32>,
+    enabled: Option<i32>,
+}
+
+/// A sample row as produced by `PROJECT_SAMPLES_JSON`
+#[derive(Deserialize)]
+struct SampleJson<'a> {
+    id: &'a str,
+    name: String,
+    path: String,
+    #[serde(deserialize_with = "bool_from_int")]
+    is_present: bool,
+}
+
+fn json_error(column: usize, error: serde_json::Error) -> rusqlite::Error {
+    rusqlite::Error::FromSqlConversionFailure(column, Type::Text, Box::new(error))
+}
+
+/// Borrows a text column straight from SQLite's row buffer instead of copying it
+pub(crate) fn text_column<'a>(row: &'a rusqlite::Row, column: usize) -> rusqlite::Result<&'a str> {
+    row.get_ref(column)?
+        .as_str()
+        .map_err(|e| rusqlite::Error::FromSqlConversionFailure(column, Type::Text, Box::new(e)))
+}
+
+/// Like `text_column`, for columns that may be NULL
+pub(crate) fn optional_text_column<'a>(
+    row: &'a rusqlite::Row,
+    column: usize,
+) -> rusqlite::Result<Option<&'a str>> {
+    match row.get_ref(column)? {
+        ValueRef::Null => Ok(None),
+        _ => text_column(row, column).map(Some),
+    }
+}
+
+/// Writes a UUID in its stored text form into `buffer` (from `Uuid::encode_buffer`)
+/// and returns it for binding. Bulk writes bind thousands of ids, and this skips the
+/// formatter and the `String` that `to_string` would allocate for each.
+pub(crate) fn uuid_to_sql<'b>(id: &Uuid, buffer: &'b mut [u8]) -> &'b str {
+    id.hyphenated().encode_lower(buffer)
+}
+
+/// Parses a stored relation id. Loaded plugins and samples keep the ids they were
+/// stored with rather than drawing a fresh random id for every row read.
+pub(crate) fn uuid_from_sql(value: &str, column: usize) -> rusqlite::Result<Uuid> {
+    Uuid::parse_str(value)
+        .map_err(|e| rusqlite::Error::FromSqlConversionFailure(column, Type::Text, Box::new(e)))
+}
+
+/// Decodes the `plugins_json` column of a project row
+pub(crate) fn plugins_from_json(row: &rusqlite::Row, column: usize) -> rusqlite::Result<HashSet<Plugin>> {
+    let plugins: Vec<PluginJson> = serde_json::from_str(text_column(row, column)?)
+        .map_err(|e| json_error(column, e))?;
+
+    plugins
+        .into_iter()
+        .map(|p| -> rusqlite::Result<Plugin> {
+            Ok(Plugin {
+                id: uuid_from_sql(p.id, column)?,
+                plugin_id: p.ableton_plugin_id,
+                module_id: p.ableton_module_id,
+                dev_identifier: p.dev_identifier,
+                name: p.name,
+                plugin_format: p.format.parse().map_err(rusqlite::Error::InvalidParameterName)?,
+                installed: p.installed,
+                vendor: p.vendor,
+                version: p.version,
+                sdk_version: p.sdk_version,
+                flags: p.flags,
+                scanstate: p.scanstate,
+                enabled: p.enabled,
+            })
+        })
+        .collect()
+}
+
+/// Decodes the `samples_json` column of a project row
+pub(crate) fn samples_from_json(row: &rusqlite::Row, column: usize) -> rusqlite::Result<HashSet<Sample>> {
+    let samples: Vec<SampleJson> = serde_json::from_str(text_column(row, column)?)
+        .map_err(|e| json_error(column, e))?;
+
+    samples
+        .into_iter()
+        .map(|s| -> rusqlite::Result<Sample> {
+            Ok(Sample {
+                id: uuid_from_sql(s.id, column)?,
+                name: s.name,
+                path: PathBuf::from(s.path),
+                is_present: s.is_present,
+            })
+        })
+        .collect()
+}
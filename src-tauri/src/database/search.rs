@@ -11,6 +11,60 @@ use uuid::Uuid;
 
 use super::LiveSetDatabase;
 
+/// Default ranking of `project_search`, stored in the table's config so `rank`
+/// means this. bm25 weights follow the column order of `project_search`; names
+/// count most, then plugins and tags, then samples and paths.
+pub(crate) const SEARCH_RANK_FUNCTION: &str = "bm25(0.0, 10.0, 2.0, 5.0, 3.0, 5.0, 1.0, 1.0, 1.0, 1.0)";
+
+/// Phase one of a search: rank matches inside the FTS index and keep only what the
+/// results need from it. Full project rows are loaded afterwards for this bounded
+/// set of ids, so join work scales with the limit rather than the match count.
+/// Ordering by the `rank` column lets FTS5 sort the matches itself instead of
+/// handing every row to an outer sorter.
+const FTS_SEARCH_SQL: &str = "SELECT project_id, rank
+     FROM project_search
+     WHERE project_search MATCH ?
+     ORDER BY rank
+     LIMIT ?";
+
+/// Fallback for queries the prefix index cannot answer: matches the query anywhere
+/// inside a project, plugin, vendor or sample name, e.g. "verb" in "Reverb"
+const SUBSTRING_SEARCH_SQL: &str = "SELECT p.id
+     FROM projects p
+     WHERE p.name LIKE ?1
+        OR EXISTS (
+            SELECT 1 FROM project_plugins pp
+            JOIN plugins pl ON pl.id = pp.plugin_id
+            WHERE pp.project_id = p.id AND (pl.name LIKE ?1 OR pl.vendor LIKE ?1)
+        )
+        OR EXISTS (
+            SELECT 1 FROM project_samples ps
+            JOIN samples s ON s.id = ps.sample_id
+            WHERE ps.project_id = p.id AND s.name LIKE ?1
+        )
+     ORDER BY p.name
+     LIMIT ?2";
+
+/// Upper bound on the number of results a single search returns
+pub(crate) const MAX_SEARCH_RESULTS: i64 = 1000;
+
+/// Turns free text into an FTS5 expression that matches every term as a prefix.
+/// Terms are quoted so punctuation such as the dot in `kick.wav` is never read as
+/// query syntax. Returns None when the input has nothing to match on.
+pub(crate) fn fts5_prefix_query(input: &str) -> Option<String> {
+    let terms: Vec<String> = input
+        .split_whitespace()
+        .filter(|term| term.chars().any(char::is_alphanumeric))
+        .map(|term| format!("\"{}\"*", term.replace('"', "\"\"")))
+        .collect();
+
+    if terms.is_empty() {
+        None
+    } else {
+        Some(terms.join(" "))
+    }
+}
+
 #[derive(Debug, Default)]
 #[allow(unused)]
 pub struct SearchQuery {
@@ -34,6 +88,11 @@ pub struct SearchQuery {
     
     // Full text search
     pub text: String,
+
+    /// How many of the best matches to return, capped at `MAX_SEARCH_RESULTS`.
+    /// The limit is applied inside the ranked FTS query, so only these rows are
+    /// ever loaded in full.
+    pub limit: Option<usize>,
 }
 
 #[derive(Debug)]
@@ -43,7 +102,7 @@ pub struct SearchResult {
     pub match_reason: Vec<MatchReason>,
 }
 
-#[derive(Debug)]
+#[derive(Debug, Clone)]
 pub enum MatchReason {
     Name(String),
     Path(String),
@@ -147,20 +206,37 @@ impl SearchQuery {
         query
     }
 
-    fn build_fts5_query(&self) -> (String, Vec<String>) {
+    /// Quotes a value as an FTS5 string, doubling any quotes inside it so user input
+    /// can never end the string early and be read as query syntax
+    fn fts5_quote(value: &str) -> String {
+        format!("\"{}\"", value.replace('"', "\"\""))
+    }
+
+    /// Matches projects whose name starts with the first free-text word. Someone
+    /// typing a project name is looking for exactly those, so they are ranked ahead
+    /// of projects that only contain the word somewhere.
+    fn name_prefix_expression(&self) -> Option<String> {
+        self.text
+            .split_whitespace()
+            .find(|term| term.chars().any(char::is_alphanumeric))
+            .map(|term| format!("name : ^{}*", Self::fts5_quote(term)))
+    }
+
+    /// Builds the FTS5 MATCH expression for this query. The SQL around it is the
+    /// constant `FTS_SEARCH_SQL`, so the prepared statement is reused across
+    /// searches and only the expression is rebuilt per query.
+    fn build_fts5_query(&self) -> String {
         let mut conditions = Vec::new();
-        let mut params = Vec::new();
 
         // Helper function to add a column-specific condition
         let mut add_column_condition = |column: &str, value: &str| {
             if column == "created_at" || column == "modified_at" {
                 // For dates, use a proper FTS5 prefix match
                 // The * must be outside the quotes according to the docs
-                conditions.push(format!("{} : \"{}\" *", column, value));
+                conditions.push(format!("{} : {} *", column, Self::fts5_quote(value)));
             } else {
-                conditions.push(format!("{} : \"{}\"", column, value));
+                conditions.push(format!("{} : {}", column, Self::fts5_quote(value)));
             }
-            params.push(value.to_string());
         };
 
         // Add specific field conditions
@@ -198,100 +274,123 @@ impl SearchQuery {
             add_column_condition("modified_at", modified);
         }
 
-        // Add full text search if present
-        if !self.text.is_empty() {
-            conditions.push(format!("\"{}\"", self.text));
-            params.push(self.text.clone());
+        // Free text matches each word as a prefix, so results narrow as the user types
+        // instead of only appearing once a whole word has been entered
+        if let Some(text_query) = fts5_prefix_query(&self.text) {
+            conditions.push(text_query);
         }
 
-        let fts5_query = if conditions.is_empty() {
-            String::new()
-        } else {
-            conditions.join(" AND ")
-        };
-
-        let query = format!(
-            "SELECT project_id, rank, name, path, plugins, samples 
-             FROM project_search 
-             WHERE project_search MATCH ? 
-             ORDER BY rank"
-        );
-
-        (query, vec![fts5_query])
+        conditions.join(" AND ")
     }
 }
 
 impl LiveSetDatabase {
-    pub fn search_fts(&mut self, query: &SearchQuery) -> Result<Vec<SearchResult>, DatabaseError> {
-        debug!("Performing FTS5 search with query: {:?}", query);
+    /// Phase one of every search: the ids of the best `limit` matches for an FTS5
+    /// expression with their bm25 scores, best first
+    pub(crate) fn ranked_project_ids(
+        conn: &Connection,
+        match_expression: &str,
+        limit: i64,
+    ) -> Result<Vec<(String, f64)>, DatabaseError> {
+        let mut stmt = conn.prepare_cached(FTS_SEARCH_SQL)?;
+        let mut results = Vec::new();
+        let mut rows = stmt.query(params![match_expression, limit])?;
+        while let Some(row) = rows.next()? {
+            results.push((row.get(0)?, row.get(1)?));
+        }
+        debug!("Found {} potential matches", results.len());
+        Ok(results)
+    }
 
-        // First collect all matching paths in a transaction
-        let matching_paths = {
-            let tx = self.conn.transaction()?;
-            
-            let (sql_query, params) = query.build_fts5_query();
-            debug!("FTS5 query: {}", sql_query);
-            debug!("Query params: {:?}", params);
-
-            let results = {
-                let mut stmt = tx.prepare(&sql_query)?;
-                let param_refs: Vec<&dyn ToSql> = params.iter().map(|p| p as &dyn ToSql).collect();
-
-                // Collect all results into a vector
-                let mut results = Vec::new();
-                let mut rows = stmt.query(param_refs.as_slice())?;
-                while let Some(row) = rows.next()? {
-                    let plugins: String = row.get(4)?;
-                    debug!("Checking row with plugins: {:?}", plugins);
-                    results.push((
-                        row.get::<_, String>(0)?, // project_id
-                        row.get::<_, f64>(1)?,    // rank
-                        row.get::<_, String>(2)?, // name
-                        row.get::<_, String>(3)?, // path
-                        plugins,                  // plugins
-                        row.get::<_, String>(5)?, // samples
-                    ));
-                }
-                debug!("Found {} potential matches", results.len());
-                results
-            };
-            
-            tx.commit()?;
-            results
+    /// Ids of projects whose name, plugins or samples contain `query` anywhere, in
+    /// name order. Scans every project, so it only backs up searches the FTS index
+    /// found nothing for.
+    pub(crate) fn substring_project_ids(
+        conn: &Connection,
+        query: &str,
+        limit: i64,
+    ) -> Result<Vec<String>, DatabaseError> {
+        let mut stmt = conn.prepare_cached(SUBSTRING_SEARCH_SQL)?;
+        let pattern = format!("%{}%", query.trim());
+        let ids = stmt
+            .query_map(params![pattern, limit], |row| row.get(0))?
+            .collect::<SqliteResult<Vec<String>>>()?;
+        debug!("Found {} substring matches", ids.len());
+        Ok(ids)
+    }
+
+    /// The ids and bm25 scores of a query's best matches, best first, without loading
+    /// the projects. Lets callers that already hold some of the projects, such as
+    /// the search response cache, load only the ones they are missing.
+    pub fn search_ids(&self, query: &SearchQuery) -> Result<Vec<(String, f64)>, DatabaseError> {
+        let fts5_query = query.build_fts5_query();
+        debug!("FTS5 match expression: {}", fts5_query);
+        if fts5_query.is_empty() {
+            // Nothing searchable, such as input made only of punctuation
+            return Ok(Vec::new());
+        }
+
+        let limit = query
+            .limit
+            .map_or(MAX_SEARCH_RESULTS, |limit| (limit as i64).min(MAX_SEARCH_RESULTS));
+
+        // Name-prefix matches first, each group in bm25 order
+        let mut ranked = match query.name_prefix_expression() {
+            Some(name_prefix) => Self::ranked_project_ids(
+                &self.conn,
+                &format!("{} AND {}", fts5_query, name_prefix),
+                limit,
+            )?,
+            None => Vec::new(),
         };
-        
-        // Now get full project details and build search results
-        let mut search_results = Vec::new();
-        #[allow(unused)]
-        for (project_id, rank, name, path, plugins, samples) in matching_paths {
-            debug!("Processing match: {} ({})", name, path);
-            if let Ok(Some(project)) = self.get_project_by_path(&path) {
-                let mut match_reason = Vec::new();
-                
-                // Add match reasons based on what matched
-                if let Some(plugin_query) = &query.plugin {
-                    let plugin_query = plugin_query.to_lowercase();
-                    let plugins_lower = plugins.to_lowercase();
-                    debug!("  Checking if '{}' exists in '{}'", plugin_query, plugins_lower);
-                    if plugins_lower.contains(&plugin_query) {
-                        debug!("  Found plugin match!");
-                        match_reason.push(MatchReason::Plugin(plugin_query.clone()));
-                    }
-                }
-                if let Some(bpm) = &query.bpm {
-                    match_reason.push(MatchReason::Tempo(bpm.clone()));
+        if (ranked.len() as i64) < limit {
+            let seen: HashSet<String> = ranked.iter().map(|(id, _)| id.clone()).collect();
+            for (id, score) in Self::ranked_project_ids(&self.conn, &fts5_query, limit)? {
+                if ranked.len() as i64 >= limit {
+                    break;
                 }
-                if let Some(date_created) = &query.date_created {
-                    match_reason.push(MatchReason::DateCreated(date_created.clone()));
-                }
-                if let Some(date_modified) = &query.date_modified {
-                    match_reason.push(MatchReason::DateModified(date_modified.clone()));
+                if !seen.contains(&id) {
+                    ranked.push((id, score));
                 }
+            }
+        }
+        Ok(ranked)
+    }
 
+    pub fn search_fts(&mut self, query: &SearchQuery) -> Result<Vec<SearchResult>, DatabaseError> {
+        debug!("Performing FTS5 search with query: {:?}", query);
+
+        let matching_paths = self.search_ids(query)?;
+        
+        // Every condition in the MATCH expression has to hold for a row to be returned,
+        // so the match reasons are the same for every result: work them out once
+        // rather than re-checking each result's plugin list
+        let mut query_reasons = Vec::new();
+        if let Some(plugin) = &query.plugin {
+            query_reasons.push(MatchReason::Plugin(plugin.to_lowercase()));
+        }
+        if let Some(bpm) = &query.bpm {
+            query_reasons.push(MatchReason::Tempo(bpm.clone()));
+        }
+        if let Some(date_created) = &query.date_created {
+            query_reasons.push(MatchReason::DateCreated(date_created.clone()));
+        }
+        if let Some(date_modified) = &query.date_modified {
+            query_reasons.push(MatchReason::DateModified(date_modified.clone()));
+        }
+
+        // Load full details for every match in one batch rather than per result
+        let project_ids: Vec<String> = matching_paths.iter().map(|m| m.0.clone()).collect();
+        let mut projects = Self::load_projects_by_ids(&self.conn, &project_ids)?;
+
+        // Build search results in rank order
+        let mut search_results = Vec::with_capacity(matching_paths.len());
+        for (project_id, rank) in matching_paths {
+            if let Some(project) = projects.remove(&project_id) {
                 search_results.push(SearchResult {
                     project,
                     rank,
-                    match_reason,
+                    match_reason: query_reasons.clone(),
                 });
             }
         }
@@ -560,4 +659,123 @@ mod tests {
         let results = db.search_fts(&date_query).expect("Search failed");
         assert_eq!(results.len(), 2, "Should find both projects from 2024");
     }
+
+    #[test]
+    fn test_search_tag_follows_tagging() {
+        setup();
+        let (mut db, _, _, _, _) = setup_test_projects();
+        let edm_id = db
+            .get_all_projects_with_status(None)
+            .expect("Failed to get projects")
+            .into_iter()
+            .find(|p| p.name == "EDM Project.als")
+            .expect("EDM project missing")
+            .id
+            .to_string();
+
+        let tag_id = db.add_tag("wip").expect("Failed to add tag");
+        db.tag_project(&edm_id, &tag_id).expect("Failed to tag project");
+        let results = db.search_fts(&SearchQuery::parse("tag:wip")).expect("Search failed");
+        assert_eq!(results.len(), 1);
+        assert_eq!(results[0].project.id.to_string(), edm_id);
+
+        db.untag_project(&edm_id, &tag_id).expect("Failed to untag project");
+        let results = db.search_fts(&SearchQuery::parse("tag:wip")).expect("Search failed");
+        assert!(results.is_empty());
+    }
+
+    #[test]
+    fn test_fts5_prefix_query() {
+        assert_eq!(fts5_prefix_query("kick.wav"), Some("\"kick.wav\"*".to_string()));
+        assert_eq!(
+            fts5_prefix_query("  fab  \"pro\" "),
+            Some("\"fab\"* \"\"\"pro\"\"\"*".to_string())
+        );
+        assert_eq!(fts5_prefix_query("  - * "), None);
+    }
+
+    #[test]
+    fn test_build_fts5_query_quotes_values() {
+        let query = SearchQuery::parse("plugin:serum my\"song");
+        assert_eq!(
+            query.build_fts5_query(),
+            "plugins : \"serum\" AND \"my\"\"song\"*"
+        );
+    }
+
+    #[test]
+    fn test_search_text_matches_prefixes() {
+        setup();
+        let (mut db, _, _, _, _) = setup_test_projects();
+
+        // A partly typed word already finds the project
+        let results = db.search_fts(&SearchQuery::parse("guit")).expect("Search failed");
+        assert_eq!(results.len(), 1);
+        assert_eq!(results[0].project.name, "Rock Band.als");
+
+        let results = db.search_fts(&SearchQuery::parse("- *")).expect("Search failed");
+        assert!(results.is_empty());
+    }
+
+    #[test]
+    fn test_search_ignores_case() {
+        setup();
+        let (mut db, _, _, _, _) = setup_test_projects();
+
+        // Case is folded once when a project is indexed, not per row while searching
+        for input in ["GUIT", "rock BAND"] {
+            let results = db.search_fts(&SearchQuery::parse(input)).expect("Search failed");
+            assert_eq!(results.len(), 1, "No match for {}", input);
+            assert_eq!(results[0].project.name, "Rock Band.als");
+        }
+    }
+
+    #[test]
+    fn test_search_ranks_name_prefix_first() {
+        setup();
+        let (mut db, _, _, _, _) = setup_test_projects();
+        for name in ["Night Rock Rock.als", "Rock Anthem Extended Mix.als"] {
+            let scan = LiveSetBuilder::new().build();
+            db.insert_project(&LiveSet {
+                is_active: true,
+                file_path: PathBuf::from(name),
+                name: String::from(name),
+                file_hash: String::from("dummy_hash"),
+                created_time: Local::now(),
+                modified_time: Local::now(),
+                last_parsed_timestamp: Local::now(),
+                tempo: scan.tempo,
+                time_signature: scan.time_signature,
+                key_signature: None,
+                furthest_bar: None,
+                estimated_duration: None,
+                ableton_version: scan.version,
+                plugins: scan.plugins,
+                samples: scan.samples,
+                tags: HashSet::new(),
+                id: Uuid::new_v4(),
+            })
+            .expect("Failed to insert project");
+        }
+
+        // bm25 alone prefers the short name that repeats the word; names starting
+        // with it come first regardless
+        let results = db.search_fts(&SearchQuery::parse("rock")).expect("Search failed");
+        let names: Vec<&str> = results.iter().map(|r| r.project.name.as_str()).collect();
+        assert_eq!(names.len(), 3);
+        assert!(names[..2].contains(&"Rock Band.als"));
+        assert!(names[..2].contains(&"Rock Anthem Extended Mix.als"));
+        assert_eq!(names[2], "Night Rock Rock.als");
+    }
+
+    #[test]
+    fn test_search_limit_keeps_best_matches() {
+        setup();
+        let (mut db, _, _, _, _) = setup_test_projects();
+
+        let mut query = SearchQuery::parse("FabFilter");
+        query.limit = Some(1);
+        let results = db.search_fts(&query).expect("Search failed");
+        assert_eq!(results.len(), 1, "Both projects match but only one was asked for");
+    }
 }
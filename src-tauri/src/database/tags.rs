@@ -1,14 +1,13 @@
 use crate::database::models::SqlDateTime;
 use crate::error::DatabaseError;
 use crate::live_set::LiveSet;
-use crate::models::{AbletonVersion, KeySignature, Plugin, Sample, TimeSignature};
-use chrono::{Local, TimeZone};
+use chrono::Local;
 use log::debug;
-use rusqlite::{params, OptionalExtension};
+use rusqlite::params;
 use std::collections::HashSet;
-use std::path::PathBuf;
 use uuid::Uuid;
 
+use super::core::{ProjectColumns, PROJECT_COLUMNS};
 use super::LiveSetDatabase;
 
 impl LiveSetDatabase {
@@ -59,7 +58,7 @@ impl LiveSetDatabase {
 
     pub fn get_project_tags(&mut self, project_id: &str) -> Result<HashSet<String>, DatabaseError> {
         debug!("Getting tags for project: {}", project_id);
-        let mut stmt = self.conn.prepare(
+        let mut stmt = self.conn.prepare_cached(
             r#"
             SELECT t.name 
             FROM tags t
@@ -69,11 +68,7 @@ impl LiveSetDatabase {
         )?;
 
         let tags = stmt
-            .query_map([project_id], |row| {
-                let name: String = row.get(0)?;
-                debug!("Found tag: {}", name);
-                Ok(name)
-            })?
+            .query_map([project_id], |row| row.get(0))?
             .filter_map(|r| r.ok())
             .collect();
 
@@ -85,219 +80,28 @@ impl LiveSetDatabase {
         debug!("Getting projects with tag: {}", tag_id);
         let tx = self.conn.transaction()?;
 
-        let project_paths = {
-            let mut stmt = tx.prepare(
-                r#"
-                SELECT DISTINCT p.path 
-                FROM projects p
-                JOIN project_tags pt ON pt.project_id = p.id
-                WHERE pt.tag_id = ?
-                "#,
-            )?;
-
-            let paths: Vec<String> = stmt
-                .query_map([tag_id], |row| {
-                    let path: String = row.get(0)?;
-                    Ok(path)
-                })?
-                .filter_map(|r| r.ok())
-                .collect();
-
-            debug!("Found {} project paths with tag", paths.len());
-            paths
+        let mut results = {
+            let mut stmt = tx.prepare_cached(&format!(
+                "SELECT {} FROM projects WHERE id IN (SELECT project_id FROM project_tags WHERE tag_id = ?)",
+                PROJECT_COLUMNS
+            ))?;
+            let columns = ProjectColumns::new(&stmt)?;
+
+            let mut projects = Vec::new();
+            let mut rows = stmt.query([tag_id])?;
+            while let Some(row) = rows.next()? {
+                projects.push(Self::row_to_live_set(row, &columns)?);
+            }
+            projects
         };
 
-        let mut results = Vec::new();
-        for path in project_paths {
-            let project = {
-                let mut stmt = tx.prepare(
-                    r#"
-                    SELECT 
-                        id, path, name, hash, created_at, modified_at, last_parsed_at,
-                        tempo, time_signature_numerator, time_signature_denominator,
-                        key_signature_tonic, key_signature_scale, duration_seconds, furthest_bar,
-                        ableton_version_major, ableton_version_minor, ableton_version_patch, ableton_version_beta
-                    FROM projects 
-                    WHERE path = ?
-                    "#,
-                )?;
-
-                stmt.query_row([&path], |row| {
-                    let project_id: String = row.get(0)?;
-                    debug!("Found project with ID: {}", project_id);
-
-                    let duration_secs: Option<i64> = row.get(12)?;
-                    let created_timestamp: i64 = row.get(4)?;
-                    let modified_timestamp: i64 = row.get(5)?;
-                    let scanned_timestamp: i64 = row.get(6)?;
-
-                    let mut live_set = LiveSet {
-                        is_active: true,
-                        id: Uuid::parse_str(&project_id).map_err(|_| {
-                            rusqlite::Error::InvalidParameterName("Invalid UUID".into())
-                        })?,
-                        file_path: PathBuf::from(row.get::<_, String>(1)?),
-                        name: row.get(2)?,
-                        file_hash: row.get(3)?,
-                        created_time: Local
-                            .timestamp_opt(created_timestamp, 0)
-                            .single()
-                            .ok_or_else(|| {
-                                rusqlite::Error::InvalidParameterName("Invalid timestamp".into())
-                            })?,
-                        modified_time: Local
-                            .timestamp_opt(modified_timestamp, 0)
-                            .single()
-                            .ok_or_else(|| {
-                                rusqlite::Error::InvalidParameterName("Invalid timestamp".into())
-                            })?,
-                        last_parsed_timestamp: Local
-                            .timestamp_opt(scanned_timestamp, 0)
-                            .single()
-                            .ok_or_else(|| {
-                                rusqlite::Error::InvalidParameterName("Invalid timestamp".into())
-                            })?,
-
-                        tempo: row.get(7)?,
-                        time_signature: TimeSignature {
-                            numerator: row.get(8)?,
-                            denominator: row.get(9)?,
-                        },
-                        key_signature: match (
-                            row.get::<_, Option<String>>(10)?,
-                            row.get::<_, Option<String>>(11)?,
-                        ) {
-                            (Some(tonic), Some(scale)) => {
-                                debug!("Found key signature: {} {}", tonic, scale);
-                                Some(KeySignature {
-                                    tonic: tonic
-                                        .parse()
-                                        .map_err(|e| rusqlite::Error::InvalidParameterName(e))?,
-                                    scale: scale
-                                        .parse()
-                                        .map_err(|e| rusqlite::Error::InvalidParameterName(e))?,
-                                })
-                            }
-                            _ => None,
-                        },
-                        furthest_bar: row.get(13)?,
-
-                        ableton_version: AbletonVersion {
-                            major: row.get(14)?,
-                            minor: row.get(15)?,
-                            patch: row.get(16)?,
-                            beta: row.get(17)?,
-                        },
-
-                        estimated_duration: duration_secs.map(chrono::Duration::seconds),
-                        plugins: HashSet::new(),
-                        samples: HashSet::new(),
-                        tags: HashSet::new(),
-                    };
-
-                    // Get plugins in a new scope
-                    {
-                        let mut stmt = tx.prepare(
-                            r#"
-                            SELECT p.* 
-                            FROM plugins p
-                            JOIN project_plugins pp ON pp.plugin_id = p.id
-                            WHERE pp.project_id = ?
-                            "#,
-                        )?;
-
-                        let plugins = stmt
-                            .query_map([&project_id], |row| {
-                                let name: String = row.get(4)?;
-                                debug!("Found plugin: {}", name);
-                                Ok(Plugin {
-                                    id: Uuid::new_v4(),
-                                    plugin_id: row.get(1)?,
-                                    module_id: row.get(2)?,
-                                    dev_identifier: row.get(3)?,
-                                    name,
-                                    plugin_format: row
-                                        .get::<_, String>(5)?
-                                        .parse()
-                                        .map_err(|e| rusqlite::Error::InvalidParameterName(e))?,
-                                    installed: row.get(6)?,
-                                    vendor: row.get(7)?,
-                                    version: row.get(8)?,
-                                    sdk_version: row.get(9)?,
-                                    flags: row.get(10)?,
-                                    scanstate: row.get(11)?,
-                                    enabled: row.get(12)?,
-                                })
-                            })?
-                            .filter_map(|r| r.ok())
-                            .collect::<HashSet<_>>();
-
-                        debug!("Retrieved {} plugins", plugins.len());
-                        live_set.plugins = plugins;
-                    }
-
-                    // Get samples in a new scope
-                    {
-                        let mut stmt = tx.prepare(
-                            r#"
-                            SELECT s.* 
-                            FROM samples s
-                            JOIN project_samples ps ON ps.sample_id = s.id
-                            WHERE ps.project_id = ?
-                            "#,
-                        )?;
-
-                        let samples = stmt
-                            .query_map([&project_id], |row| {
-                                let name: String = row.get(1)?;
-                                debug!("Found sample: {}", name);
-                                Ok(Sample {
-                                    id: Uuid::new_v4(),
-                                    name,
-                                    path: PathBuf::from(row.get::<_, String>(2)?),
-                                    is_present: row.get(3)?,
-                                })
-                            })?
-                            .filter_map(|r| r.ok())
-                            .collect::<HashSet<_>>();
-
-                        debug!("Retrieved {} samples", samples.len());
-                        live_set.samples = samples;
-                    }
-
-                    // Get tags in a new scope
-                    {
-                        let mut stmt = tx.prepare(
-                            r#"
-                            SELECT t.name 
-                            FROM tags t
-                            JOIN project_tags pt ON pt.tag_id = t.id
-                            WHERE pt.project_id = ?
-                            "#,
-                        )?;
-
-                        let tags = stmt
-                            .query_map([&project_id], |row| {
-                                let name: String = row.get(0)?;
-                                debug!("Found tag: {}", name);
-                                Ok(name)
-                            })?
-                            .filter_map(|r| r.ok())
-                            .collect::<HashSet<_>>();
-
-                        debug!("Retrieved {} tags", tags.len());
-                        live_set.tags = tags;
-                    }
-
-                    Ok(live_set)
-                })
-                .optional()?
-            };
-
-            if let Some(live_set) = project {
-                debug!("Retrieved project: {}", live_set.name);
-                results.push(live_set);
-            }
+        // Relations are loaded for every tagged project at once: one query per
+        // relation rather than three per project
+        Self::attach_relations(&tx, &mut results)?;
+        let project_ids: Vec<String> = results.iter().map(|p| p.id.to_string()).collect();
+        let mut tags_by_project = Self::load_project_tags(&tx, &project_ids)?;
+        for (live_set, project_id) in results.iter_mut().zip(&project_ids) {
+            live_set.tags = tags_by_project.remove(project_id).unwrap_or_default();
         }
 
         tx.commit()?;
@@ -309,7 +113,7 @@ impl LiveSetDatabase {
         debug!("Listing all tags");
         let mut stmt = self
             .conn
-            .prepare("SELECT id, name FROM tags ORDER BY name")?;
+            .prepare_cached("SELECT id, name FROM tags ORDER BY name")?;
 
         let tags = stmt
             .query_map([], |row| {
@@ -41,7 +41,7 @@ impl LiveSetDatabase {
 
     pub fn get_project_tasks(&mut self, project_id: &str) -> Result<Vec<(String, String, bool)>, DatabaseError> {
         debug!("Getting tasks for project {}", project_id);
-        let mut stmt = self.conn.prepare(
+        let mut stmt = self.conn.prepare_cached(
             "SELECT id, description, completed FROM project_tasks WHERE project_id = ? ORDER BY created_at"
         )?;
 
@@ -59,7 +59,7 @@ impl LiveSetDatabase {
 
     pub fn get_collection_tasks(&mut self, collection_id: &str) -> Result<Vec<(String, String, String, bool)>, DatabaseError> {
         debug!("Getting tasks for all projects in collection {}", collection_id);
-        let mut stmt = self.conn.prepare(
+        let mut stmt = self.conn.prepare_cached(
             r#"
             SELECT t.id, p.name, t.description, t.completed
             FROM project_tasks t
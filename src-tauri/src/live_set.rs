@@ -1,6 +1,7 @@
 use chrono::{DateTime, Duration, Local};
 use colored::Colorize;
 use std::collections::HashSet;
+use std::fs::Metadata;
 use std::path::PathBuf;
 use uuid::Uuid;
 
@@ -9,31 +10,39 @@ use crate::config::CONFIG;
 use crate::error::LiveSetError;
 use crate::models::{AbletonVersion, KeySignature, Plugin, Sample, TimeSignature};
 use crate::scan::{ParseOptions, Parser};
-use crate::utils::metadata::{load_file_hash, load_file_name, load_file_timestamps};
-use crate::utils::plugins::get_most_recent_db_file;
-use crate::utils::{decompress_gzip_file, validate_ableton_file};
+use crate::utils::metadata::{file_name_from_path, file_timestamps, load_file_hash};
+use crate::utils::plugins::cached_most_recent_db_file;
+use crate::utils::{validate_ableton_file, validate_ableton_metadata, with_decompressed_gzip_file};
 
 #[derive(Debug)]
 pub struct LiveSetPreprocessed {
     pub(crate) path: PathBuf,
     pub(crate) name: String,
-    pub(crate) file_hash: String,
     pub(crate) created_time: DateTime<Local>,
     pub(crate) modified_time: DateTime<Local>,
 }
 
 impl LiveSetPreprocessed {
+    /// Gathers the file metadata a scan needs to decide whether to parse. The file
+    /// is not hashed here: that reads the whole file, so it is left to
+    /// `LiveSet::from_preprocessed` and only happens for files that changed.
     pub fn new(file_path: PathBuf) -> Result<Self, LiveSetError> {
-        validate_ableton_file(&file_path)?;
-        
-        let name = load_file_name(&file_path)?;
-        let (modified_time, created_time) = load_file_timestamps(&file_path)?;
-        let file_hash = load_file_hash(&file_path)?;
-        
+        // One stat call covers validation, the name check and both timestamps
+        let metadata = validate_ableton_file(&file_path)?;
+        Self::with_metadata(file_path, &metadata)
+    }
+
+    /// Like `new`, using metadata the caller already has, such as the metadata a
+    /// directory scan returned, instead of a stat call of its own
+    pub fn with_metadata(file_path: PathBuf, metadata: &Metadata) -> Result<Self, LiveSetError> {
+        validate_ableton_metadata(&file_path, metadata)?;
+
+        let name = file_name_from_path(&file_path)?;
+        let (modified_time, created_time) = file_timestamps(&file_path, metadata)?;
+
         Ok(Self {
             path: file_path,
             name,
-            file_hash,
             created_time,
             modified_time,
         })
@@ -73,21 +82,22 @@ impl LiveSet {
     }
 
     pub fn from_preprocessed(preprocessed: LiveSetPreprocessed) -> Result<Self, LiveSetError> {
-        // Scope the xml_data to this block so it's dropped after parsing
-        let parse_result = {
-            let xml_data = decompress_gzip_file(&preprocessed.path)?;
+        let file_hash = load_file_hash(&preprocessed.path)?;
+
+        // The decompressed data lives in this thread's reusable buffer and is only
+        // borrowed for the duration of the parse
+        let parse_result = with_decompressed_gzip_file(&preprocessed.path, |xml_data| {
             let parser_options = ParseOptions::default();
-            let mut parser = Parser::new(&xml_data, parser_options)?;
-            parser.parse(&xml_data)?
-            // xml_data is dropped here when the block ends
-        };
+            let mut parser = Parser::new(xml_data, parser_options)?;
+            parser.parse(xml_data)
+        })??;
 
         let mut live_set = LiveSet {
             is_active: true,
             id: Uuid::new_v4(),
             file_path: preprocessed.path,
             name: preprocessed.name,
-            file_hash: preprocessed.file_hash,
+            file_hash,
             created_time: preprocessed.created_time,
             modified_time: preprocessed.modified_time,
             last_parsed_timestamp: Local::now(),
@@ -109,11 +119,16 @@ impl LiveSet {
         Ok(live_set)
     }
 
+    /// Estimates the length from the furthest bar, assuming four beats per bar. The
+    /// result is whole seconds, matching the `duration_seconds` column it is stored in.
     pub fn calculate_duration(&mut self) -> Result<(), LiveSetError> {
         if let (tempo, Some(furthest_bar)) = (self.tempo, self.furthest_bar) {
-            let beats_per_second = tempo / 60.0;
-            let total_seconds = furthest_bar * 4.0 / beats_per_second;
-            self.estimated_duration = Some(Duration::seconds(total_seconds as i64));
+            // bars * 4 beats * 60 seconds / beats per minute, as a single division.
+            // A zero tempo would give infinity, which is left as no estimate.
+            if tempo > 0.0 {
+                let total_seconds = (furthest_bar * 240.0 / tempo) as i64;
+                self.estimated_duration = Some(Duration::seconds(total_seconds));
+            }
         }
         Ok(())
     }
@@ -125,21 +140,21 @@ impl LiveSet {
             .map_err(|e| LiveSetError::ConfigError(e.clone()))?;
         let db_dir = &config.live_database_dir;
         let ableton_db = AbletonDatabase::new(
-            get_most_recent_db_file(&PathBuf::from(db_dir)).map_err(LiveSetError::DatabaseError)?,
+            cached_most_recent_db_file(&PathBuf::from(db_dir)).map_err(LiveSetError::DatabaseError)?,
         )
         .map_err(LiveSetError::DatabaseError)?;
 
-        let mut updated_plugins = HashSet::new();
-
-        for plugin in self.plugins.iter() {
-            let mut updated_plugin = plugin.clone();
-            updated_plugin
-                .reparse(&ableton_db)
-                .map_err(|e| LiveSetError::DatabaseError(e))?;
-            updated_plugins.insert(updated_plugin);
-        }
-
-        self.plugins = updated_plugins;
+        self.plugins = self
+            .plugins
+            .iter()
+            .map(|plugin| {
+                let mut updated_plugin = plugin.clone();
+                updated_plugin
+                    .reparse(&ableton_db)
+                    .map_err(LiveSetError::DatabaseError)?;
+                Ok(updated_plugin)
+            })
+            .collect::<Result<HashSet<_>, LiveSetError>>()?;
 
         Ok(())
     }
@@ -268,6 +283,7 @@ impl LiveSet {
 #[cfg(test)]
 mod tests {
     use super::*;
+    use crate::utils::decompress_gzip_file;
     use std::path::Path;
     use std::sync::Once;
     use std::time::Instant;
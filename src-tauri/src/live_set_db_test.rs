@@ -290,6 +290,13 @@ fn test_multiple_projects() {
 
     let serum_results = db.search("Serum").expect("Search failed");
     assert_eq!(serum_results.len(), 1); // Only EDM project has Serum
+
+    // Queries inside a word fall back to substring matching
+    let infix_results = db.search("filter").expect("Search failed");
+    assert_eq!(infix_results.len(), 3); // "filter" is inside "FabFilter"
+
+    let name_results = db.search("scape").expect("Search failed");
+    assert_eq!(name_results.len(), 1); // Only "Ambient Soundscape" contains "scape"
 }
 
 #[test]
@@ -573,6 +580,96 @@ fn test_mark_project_deleted() {
     assert!(active_projects.is_empty());
 }
 
+#[test]
+fn test_rescan_keeps_project_id() {
+    setup();
+    let mut db = LiveSetDatabase::new(PathBuf::from(":memory:")).expect("Failed to create database");
+
+    let live_set = create_test_live_set();
+    let project_id = live_set.id.to_string();
+    db.insert_project(&live_set).expect("Failed to insert project");
+    let tag_id = db.add_tag("favorite").expect("Failed to add tag");
+    db.tag_project(&project_id, &tag_id).expect("Failed to tag project");
+
+    // A rescan parses the same path under a fresh id; the stored row is updated in place
+    let mut rescanned = create_test_live_set();
+    rescanned.tempo = 140.0;
+    db.insert_project(&rescanned).expect("Failed to re-insert project");
+
+    let project = db
+        .get_project(&project_id)
+        .expect("Failed to get project")
+        .expect("Project should keep its id");
+    assert_eq!(project.tempo, 140.0);
+    assert_eq!(project.plugins.len(), live_set.plugins.len());
+    assert!(project.tags.contains("favorite"));
+    assert!(db.get_project(&rescanned.id.to_string()).unwrap().is_none());
+}
+
+#[test]
+fn test_outdated_search_index_is_rebuilt() {
+    setup();
+    let temp_dir = tempfile::tempdir().expect("Failed to create temp dir");
+    let db_path = temp_dir.path().join("search_index.db");
+
+    {
+        let mut db = LiveSetDatabase::new(db_path.clone()).expect("Failed to create database");
+        db.insert_project(&create_test_live_set()).expect("Failed to insert project");
+        // Stand in for a search table created by an older schema
+        db.conn
+            .execute_batch(
+                "DROP TABLE project_search;
+                 CREATE VIRTUAL TABLE project_search USING fts5(
+                     project_id UNINDEXED, name, path, plugins, samples, tags, notes,
+                     created_at, modified_at, tempo
+                 );",
+            )
+            .expect("Failed to replace search table");
+    }
+
+    let mut db = LiveSetDatabase::new(db_path).expect("Failed to reopen database");
+    let results = db.search("Test Plugin").expect("Search failed");
+    assert_eq!(results.len(), 1, "Rebuilt index should cover existing projects");
+}
+
+#[test]
+fn test_read_only_connection_sees_commits() {
+    setup();
+    let temp_dir = tempfile::tempdir().expect("Failed to create temp dir");
+    let db_path = temp_dir.path().join("read_only.db");
+
+    let mut db = LiveSetDatabase::new(db_path.clone()).expect("Failed to create database");
+    let mut reader = LiveSetDatabase::open_read_only(db_path).expect("Failed to open reader");
+
+    db.insert_project(&create_test_live_set()).expect("Failed to insert project");
+    assert_eq!(reader.search("Test Plugin").expect("Search failed").len(), 1);
+    assert!(reader.add_tag("favorite").is_err(), "Reader should refuse writes");
+}
+
+#[test]
+fn test_last_scanned_times() {
+    setup();
+    let mut db = LiveSetDatabase::new(PathBuf::from(":memory:")).expect("Failed to create database");
+
+    let live_set = create_test_live_set();
+    let project_id = live_set.id;
+    let path = live_set.file_path.to_string_lossy().to_string();
+    db.insert_project(&live_set).expect("Failed to insert project");
+
+    // Active projects appear in the batch lookup with the same time as the single lookup
+    let times = db.get_last_scanned_times().expect("Failed to get scan times");
+    let single = db
+        .get_last_scanned_time(&live_set.file_path)
+        .expect("Failed to get scan time");
+    assert_eq!(times.get(&path).copied(), single);
+    assert!(db.get_project_paths().unwrap().contains(&path));
+
+    // Deleted projects are skipped by the scan lookup but still known by path
+    db.mark_project_deleted(&project_id).expect("Failed to mark project as deleted");
+    assert!(db.get_last_scanned_times().unwrap().is_empty());
+    assert!(db.get_project_paths().unwrap().contains(&path));
+}
+
 #[test]
 fn test_find_deleted_by_hash() {
     setup();
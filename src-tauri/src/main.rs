@@ -11,10 +11,12 @@ mod utils;
 mod watcher;
 mod commands;
 
-use std::collections::HashSet;
+use std::collections::{HashMap, HashSet};
 use std::path::PathBuf;
+use std::sync::atomic::{AtomicUsize, Ordering};
+use std::thread;
+use chrono::{DateTime, Local};
 use log::{info, debug, error, warn};
-use std::time::Duration;
 use tauri::Manager;
 use tauri::State;
 use std::sync::Arc;
@@ -25,203 +27,266 @@ use crate::database::LiveSetDatabase;
 use crate::database::batch::BatchInsertManager;
 use crate::scan::parallel::ParallelParser;
 use crate::scan::project_scanner::ProjectPathScanner;
-use crate::error::LiveSetError;
-use crate::live_set::LiveSetPreprocessed;
+use crate::error::{DatabaseError, LiveSetError};
+use crate::live_set::{LiveSet, LiveSetPreprocessed};
 use crate::commands::AppState;
 use crate::commands::{start_scan, list_projects, search_projects};
 use crate::commands::scan::ScanProgress;
 
-fn preprocess_projects(paths: HashSet<PathBuf>) -> Result<Vec<LiveSetPreprocessed>, LiveSetError> {
-    debug!("Preprocessing {} projects", paths.len());
-    let mut preprocessed = Vec::with_capacity(paths.len());
-    
-    for path in paths {
-        match LiveSetPreprocessed::new(path.clone()) {
-            Ok(metadata) => {
-                debug!("Successfully preprocessed: {}", metadata.name);
-                preprocessed.push(metadata);
-            }
-            Err(e) => {
-                error!("Failed to preprocess {}: {}", path.display(), e);
-                // Continue with other files even if one fails
-                continue;
-            }
+/// Whether a project is new or was modified after it was last parsed
+fn needs_parsing(
+    project: &LiveSetPreprocessed,
+    last_scanned_times: &HashMap<String, DateTime<Local>>,
+) -> bool {
+    match last_scanned_times.get(project.path.to_string_lossy().as_ref()) {
+        Some(&last_scanned) => {
+            let changed = project.modified_time > last_scanned;
+            debug!(
+                "Project {}: {} (last scanned: {}, modified: {})",
+                if changed { "needs update" } else { "unchanged" },
+                project.name,
+                last_scanned,
+                project.modified_time
+            );
+            changed
+        }
+        None => {
+            debug!("New project found: {}", project.name);
+            true
         }
     }
-    
-    debug!("Successfully preprocessed {} projects", preprocessed.len());
-    Ok(preprocessed)
 }
 
-fn filter_unchanged_projects(
-    preprocessed: Vec<LiveSetPreprocessed>, 
-    db: &LiveSetDatabase
-) -> Result<Vec<PathBuf>, LiveSetError> {
-    let total_count = preprocessed.len();
-    debug!("Filtering {} preprocessed projects", total_count);
-    let mut to_parse = Vec::new();
-    
-    for project in preprocessed.into_iter() {
-        match db.get_last_scanned_time(&project.path)? {
-            Some(last_scanned) => {
-                if project.modified_time > last_scanned {
-                    debug!(
-                        "Project needs update: {} (last scanned: {}, modified: {})",
-                        project.name,
-                        last_scanned,
-                        project.modified_time
-                    );
-                    to_parse.push(project.path);
-                } else {
-                    debug!(
-                        "Project unchanged: {} (last scanned: {}, modified: {})",
-                        project.name,
-                        last_scanned,
-                        project.modified_time
-                    );
-                }
-            }
-            None => {
-                debug!("New project found: {}", project.name);
-                to_parse.push(project.path);
-            }
-        }
-    }
-    
+/// Parsed projects are written in batches of this size while parsing continues, so
+/// a large first scan keeps a bounded number of parsed sets in memory and each
+/// write transaction stays short
+const INSERT_BATCH_SIZE: usize = 1000;
+
+fn insert_live_sets(
+    db: &Mutex<LiveSetDatabase>,
+    live_sets: Vec<LiveSet>,
+) -> Result<(), LiveSetError> {
+    debug!("Inserting {} live sets into database", live_sets.len());
+    let live_sets = Arc::new(live_sets);
+    let mut db = lock_database(db)?;
+    let mut batch_manager = BatchInsertManager::new(&mut db.conn, live_sets);
+    let stats = batch_manager.execute()?;
+
     info!(
-        "Found {} projects that need parsing out of {} total",
-        to_parse.len(),
-        total_count
+        "Batch insert complete: {} projects, {} plugins, {} samples",
+        stats.projects_inserted,
+        stats.plugins_inserted,
+        stats.samples_inserted
     );
-    Ok(to_parse)
+    Ok(())
+}
+
+fn lock_database(
+    db: &Mutex<LiveSetDatabase>,
+) -> Result<std::sync::MutexGuard<'_, LiveSetDatabase>, LiveSetError> {
+    db.lock().map_err(|e| {
+        LiveSetError::DatabaseError(DatabaseError::InvalidOperation(format!(
+            "Database lock poisoned: {}",
+            e
+        )))
+    })
 }
 
 pub fn process_projects(window: Option<tauri::Window>) -> Result<(), LiveSetError> {
+    let config = CONFIG.as_ref().map_err(|e| LiveSetError::ConfigError(e.clone()))?;
+    debug!("Initializing database at {}", config.database_path);
+    let db = Mutex::new(LiveSetDatabase::new(PathBuf::from(&config.database_path))?);
+    process_projects_with_db(window, &db)
+}
+
+/// Runs a scan against an already open database, such as the connection held in
+/// `AppState`, so its page cache and prepared statements carry over between scans.
+/// The lock is only held while reading scan times and while writing results.
+pub fn process_projects_with_db(
+    window: Option<tauri::Window>,
+    db: &Mutex<LiveSetDatabase>,
+) -> Result<(), LiveSetError> {
     debug!("Starting process_projects");
     
     // Get paths from config
     let config = CONFIG.as_ref().map_err(|e| LiveSetError::ConfigError(e.clone()))?;
-    debug!("Using database path from config: {}", config.database_path);
     debug!("Using project paths from config: {:?}", config.paths);
     
-    // Initialize database early to use for filtering
-    debug!("Initializing database at {}", config.database_path);
-    let mut db = LiveSetDatabase::new(PathBuf::from(&config.database_path))?;
-    
     let scanner = ProjectPathScanner::new()?;
-    let mut found_projects = HashSet::new();
 
-    // Scan all configured directories
+    // Only configured directories that exist are walked
+    let mut scan_roots = Vec::with_capacity(config.paths.len());
     for path in &config.paths {
         let path = PathBuf::from(path);
         if path.exists() {
             info!("Scanning directory: {}", path.display());
-            let projects = scanner.scan_directory(&path)?;
-            debug!("Found {} projects in {}", projects.len(), path.display());
-            found_projects.extend(projects);
+            scan_roots.push(path);
         } else {
             error!("Directory does not exist: {}", path.display());
         }
     }
+    let last_scanned_times = Arc::new(lock_database(db)?.get_last_scanned_times()?);
 
-    if found_projects.is_empty() {
-        info!("No Ableton projects found in configured paths");
-        return Ok(());
-    }
+    // Parsing is CPU bound and independent per file, so use one thread per core
+    let thread_count = std::thread::available_parallelism()
+        .map(|n| n.get())
+        .unwrap_or(4);
+    debug!("Creating parallel parser with {} threads", thread_count);
+    let parser = ParallelParser::new(thread_count);
 
-    // Preprocess and filter projects
-    let preprocessed = preprocess_projects(found_projects)?;
-    let projects_to_parse = filter_unchanged_projects(preprocessed, &db)?;
-    
-    if projects_to_parse.is_empty() {
-        info!("No projects need updating");
-        return Ok(());
-    }
+    // Each root is walked on its own thread, and every new or changed project is
+    // queued for parsing as soon as the walk reaches it. Parsing and inserting then
+    // overlap with the walk instead of waiting for the whole tree to be listed.
+    let seen_projects = Arc::new(Mutex::new(HashSet::new()));
+    let found_count = Arc::new(AtomicUsize::new(0));
+    let submitted_count = Arc::new(AtomicUsize::new(0));
+    let walks_remaining = Arc::new(AtomicUsize::new(scan_roots.len()));
+    let mut walkers = Vec::with_capacity(scan_roots.len());
+    for root in scan_roots {
+        let scanner = scanner.clone();
+        let work_tx = parser.project_sender()?;
+        let last_scanned_times = Arc::clone(&last_scanned_times);
+        let seen_projects = Arc::clone(&seen_projects);
+        let found_count = Arc::clone(&found_count);
+        let submitted_count = Arc::clone(&submitted_count);
+        let walks_remaining = Arc::clone(&walks_remaining);
+        walkers.push(thread::spawn(move || {
+            let walk = scanner.for_each_project(&root, |path, metadata| {
+                // Configured roots may overlap, so each project is only queued once
+                if !seen_projects.lock().unwrap().insert(path.clone()) {
+                    return;
+                }
+                found_count.fetch_add(1, Ordering::SeqCst);
 
-    let total_projects = projects_to_parse.len();
-    info!("Found {} projects that need parsing", total_projects);
-    for project in &projects_to_parse {
-        debug!("Will parse project: {}", project.display());
+                // Built from the walk's metadata and handed to the parser as is, so
+                // the workers never stat the file again
+                let project = match LiveSetPreprocessed::with_metadata(path.clone(), &metadata) {
+                    Ok(project) => project,
+                    Err(e) => {
+                        error!("Failed to preprocess {}: {}", path.display(), e);
+                        return;
+                    }
+                };
+                if needs_parsing(&project, &last_scanned_times) {
+                    debug!("Will parse project: {}", project.path.display());
+                    if work_tx.send(project).is_ok() {
+                        submitted_count.fetch_add(1, Ordering::SeqCst);
+                    }
+                }
+            });
+            walks_remaining.fetch_sub(1, Ordering::SeqCst);
+            (root, walk)
+        }));
     }
 
-    // Create parallel parser with number of threads based on project count
-    let thread_count = (total_projects / 2).max(1).min(4);
-    debug!("Creating parallel parser with {} threads", thread_count);
-    let parser = ParallelParser::new(thread_count);
-    
-    // Submit filtered projects for parsing
-    debug!("Submitting {} projects to parser", total_projects);
-    let receiver = {
-        let receiver = parser.get_results_receiver();
-        parser.submit_paths(projects_to_parse)?;
-        receiver
-    };
-    // Parser is dropped here, which will close the work channel
-    
+    // From here only the walkers can queue paths. The workers exit once the walks
+    // are done and the queue is drained, which ends the results loop below.
+    parser.finish_submitting();
+    let receiver = parser.get_results_receiver();
+
     let mut successful_live_sets = Vec::new();
-    
-    // Collect results from parser with progress tracking
-    debug!("Starting to collect parser results");
+    let mut successful_count = 0;
     let mut completed_count = 0;
-    
-    while completed_count < total_projects {
-        match receiver.recv_timeout(Duration::from_secs(5)) {
-            Ok(result) => {
-                completed_count += 1;
-                info!("Progress: {}/{} projects processed", completed_count, total_projects);
-                
-                // Emit progress update if window is available
-                if let Some(window) = &window {
-                    let percentage = (completed_count * 100) / total_projects;
-                    let _ = window.emit("scan:progress", ScanProgress {
-                        status: "scanning".into(),
-                        current: completed_count,
-                        total: Some(total_projects),
-                        message: format!("Processing projects ({}%)", percentage),
-                    });
-                }
-                
-                match result {
-                    Ok((path, live_set)) => {
-                        debug!("Successfully parsed: {}", path.display());
-                        successful_live_sets.push(live_set);
-                    }
-                    Err((path, error)) => {
-                        error!("Failed to parse {}: {:?}", path.display(), error);
-                    }
+
+    // Collect results from parser with progress tracking. The total is only known
+    // once every walk has finished.
+    debug!("Starting to collect parser results");
+    for result in receiver.iter() {
+        completed_count += 1;
+        let total_projects = if walks_remaining.load(Ordering::SeqCst) == 0 {
+            Some(submitted_count.load(Ordering::SeqCst))
+        } else {
+            None
+        };
+        // Per-project progress goes to the window; the log only gets it at debug level
+        debug!("Progress: {} projects processed of {:?}", completed_count, total_projects);
+
+        // Emit progress update if window is available
+        if let Some(window) = &window {
+            let message = match total_projects {
+                Some(total) => format!(
+                    "Processing projects ({}%)",
+                    (completed_count * 100) / total.max(1)
+                ),
+                None => format!("Processing projects ({} so far)", completed_count),
+            };
+            let _ = window.emit("scan:progress", ScanProgress {
+                status: "scanning".into(),
+                current: completed_count,
+                total: total_projects,
+                message,
+            });
+        }
+
+        match result {
+            Ok((path, live_set)) => {
+                debug!("Successfully parsed: {}", path.display());
+                successful_live_sets.push(live_set);
+                successful_count += 1;
+                if successful_live_sets.len() >= INSERT_BATCH_SIZE {
+                    insert_live_sets(db, std::mem::take(&mut successful_live_sets))?;
                 }
             }
+            Err((path, error)) => {
+                error!("Failed to parse {}: {:?}", path.display(), error);
+            }
+        }
+    }
+
+    // A walk that lost its root or skipped unreadable entries leaves projects out of
+    // this scan, so that is reported instead of passing for a complete scan
+    let mut incomplete_walks = 0;
+    for walker in walkers {
+        match walker.join() {
+            Ok((_, Ok(0))) => {}
+            Ok((root, Ok(skipped))) => {
+                incomplete_walks += 1;
+                warn!("Skipped {} unreadable entries under {}", skipped, root.display());
+            }
+            Ok((root, Err(e))) => {
+                incomplete_walks += 1;
+                error!("Failed to scan {}: {}", root.display(), e);
+            }
             Err(_) => {
-                // If we timeout waiting for results, but haven't received all expected results
-                // wait a bit longer unless it's been too long
-                if completed_count < total_projects {
-                    warn!(
-                        "Timeout while waiting for results. Processed {}/{} projects. Continuing to wait...",
-                        completed_count, total_projects
-                    );
-                    continue;
-                }
-                break;
+                incomplete_walks += 1;
+                error!("A directory walk panicked; its projects may be missing from this scan");
             }
         }
     }
-    
+    if incomplete_walks > 0 {
+        warn!(
+            "{} configured folder(s) were not scanned completely; some projects may be missing",
+            incomplete_walks
+        );
+    }
+
+    let found_count = found_count.load(Ordering::SeqCst);
+    let total_projects = submitted_count.load(Ordering::SeqCst);
+    if found_count == 0 {
+        info!("No Ableton projects found in configured paths");
+        return Ok(());
+    }
+    if total_projects == 0 {
+        info!("No projects need updating");
+        return Ok(());
+    }
+    info!(
+        "Found {} projects that need parsing out of {} total",
+        total_projects, found_count
+    );
+
     info!("Processing complete. Successfully parsed {} out of {} projects", 
-          successful_live_sets.len(), total_projects);
+          successful_count, total_projects);
 
-    // Insert all successful live sets into database
+    // Insert whatever is left from the last partial batch
     if !successful_live_sets.is_empty() {
-        debug!("Inserting {} live sets into database", successful_live_sets.len());
-        let live_sets = std::sync::Arc::new(successful_live_sets);
-        let mut batch_manager = BatchInsertManager::new(&mut db.conn, live_sets);
-        let stats = batch_manager.execute()?;
-        
-        info!(
-            "Batch insert complete: {} projects, {} plugins, {} samples",
-            stats.projects_inserted,
-            stats.plugins_inserted,
-            stats.samples_inserted
-        );
+        insert_live_sets(db, successful_live_sets)?;
+    }
+
+    // A bulk load leaves the search index fragmented; small rescans are handled by
+    // FTS5's incremental merging
+    if successful_count >= INSERT_BATCH_SIZE {
+        lock_database(db)?.optimize_search_index()?;
     }
 
     Ok(())
@@ -257,8 +322,11 @@ mod tests {
         for path in &config.paths {
             let path = PathBuf::from(path);
             if path.exists() {
-                let projects = scanner.scan_directory(&path).expect("Failed to scan directory");
-                expected_projects.extend(projects);
+                scanner
+                    .for_each_project(&path, |project, _| {
+                        expected_projects.insert(project);
+                    })
+                    .expect("Failed to scan directory");
             }
         }
         
@@ -316,12 +384,13 @@ mod tests {
 // Tauri entry point
 #[tokio::main]
 async fn main() {
-    // Initialize logging with INFO level
-    std::env::set_var("RUST_LOG", "error");
+    let config = CONFIG.as_ref().expect("Failed to load config");
+
+    // Initialize logging at the configured level, errors only by default
+    std::env::set_var("RUST_LOG", config.log_level.as_deref().unwrap_or("error"));
     env_logger::init();
     info!("Starting Studio Project Manager");
 
-    let config = CONFIG.as_ref().expect("Failed to load config");
     let db_path = PathBuf::from(&config.database_path);
     
     tauri::Builder::default()
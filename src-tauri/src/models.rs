@@ -13,6 +13,7 @@ use crate::ableton_db::AbletonDatabase;
 use crate::config::CONFIG;
 use crate::error::{DatabaseError, SampleError, TimeSignatureError};
 use crate::utils::plugins::get_most_recent_db_file;
+use crate::utils::samples::decode_hex;
 
 #[derive(Debug, Clone, Copy, PartialEq, Eq, Hash)]
 pub(crate) struct Id(u64);
@@ -224,15 +225,79 @@ impl FromStr for PluginFormat {
     }
 }
 
+impl Tonic {
+    /// The name stored in the database, borrowed so binding it allocates nothing
+    pub(crate) fn as_str(&self) -> &'static str {
+        match self {
+            Tonic::Empty => "Empty",
+            Tonic::C => "C",
+            Tonic::CSharp => "CSharp",
+            Tonic::D => "D",
+            Tonic::DSharp => "DSharp",
+            Tonic::E => "E",
+            Tonic::F => "F",
+            Tonic::FSharp => "FSharp",
+            Tonic::G => "G",
+            Tonic::GSharp => "GSharp",
+            Tonic::A => "A",
+            Tonic::ASharp => "ASharp",
+            Tonic::B => "B",
+        }
+    }
+}
+
+impl Scale {
+    /// The name stored in the database, borrowed so binding it allocates nothing
+    pub(crate) fn as_str(&self) -> &'static str {
+        match self {
+            Scale::Empty => "Empty",
+            Scale::Major => "Major",
+            Scale::Minor => "Minor",
+            Scale::Dorian => "Dorian",
+            Scale::Mixolydian => "Mixolydian",
+            Scale::Aeolian => "Aeolian",
+            Scale::Phrygian => "Phrygian",
+            Scale::Locrian => "Locrian",
+            Scale::WholeTone => "WholeTone",
+            Scale::HalfWholeDim => "HalfWholeDim",
+            Scale::WholeHalfDim => "WholeHalfDim",
+            Scale::MinorBlues => "MinorBlues",
+            Scale::MinorPentatonic => "MinorPentatonic",
+            Scale::MajorPentatonic => "MajorPentatonic",
+            Scale::HarmonicMinor => "HarmonicMinor",
+            Scale::MelodicMinor => "MelodicMinor",
+            Scale::Dorian4 => "Dorian4",
+            Scale::PhrygianDominant => "PhrygianDominant",
+            Scale::LydianDominant => "LydianDominant",
+            Scale::LydianAugmented => "LydianAugmented",
+            Scale::HarmonicMajor => "HarmonicMajor",
+            Scale::SuperLocrian => "SuperLocrian",
+            Scale::BToneSpanish => "BToneSpanish",
+            Scale::HungarianMinor => "HungarianMinor",
+            Scale::Hirajoshi => "Hirajoshi",
+            Scale::Iwato => "Iwato",
+            Scale::PelogSelisir => "PelogSelisir",
+            Scale::PelogTembung => "PelogTembung",
+            Scale::Messiaen1 => "Messiaen1",
+            Scale::Messiaen2 => "Messiaen2",
+            Scale::Messiaen3 => "Messiaen3",
+            Scale::Messiaen4 => "Messiaen4",
+            Scale::Messiaen5 => "Messiaen5",
+            Scale::Messiaen6 => "Messiaen6",
+            Scale::Messiaen7 => "Messiaen7",
+        }
+    }
+}
+
 impl fmt::Display for Tonic {
     fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
-        write!(f, "{:?}", self)
+        f.write_str(self.as_str())
     }
 }
 
 impl fmt::Display for Scale {
     fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
-        write!(f, "{:?}", self)
+        f.write_str(self.as_str())
     }
 }
 
@@ -244,7 +309,7 @@ pub(crate) struct KeySignature {
 
 impl fmt::Display for KeySignature {
     fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
-        write!(f, "{:?} {:?}", self.tonic, self.scale)
+        write!(f, "{} {}", self.tonic.as_str(), self.scale.as_str())
     }
 }
 
@@ -279,17 +344,24 @@ impl PluginFormat {
     }
 }
 
-impl fmt::Display for PluginFormat {
-    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+impl PluginFormat {
+    /// The label stored in the database, borrowed so binding it allocates nothing
+    pub(crate) fn as_str(self) -> &'static str {
         match self {
-            PluginFormat::VST2Instrument => write!(f, "VST2 Instrument"),
-            PluginFormat::VST2AudioFx => write!(f, "VST2 Effect"),
-            PluginFormat::VST3Instrument => write!(f, "VST3 Instrument"),
-            PluginFormat::VST3AudioFx => write!(f, "VST3 Effect"),
+            PluginFormat::VST2Instrument => "VST2 Instrument",
+            PluginFormat::VST2AudioFx => "VST2 Effect",
+            PluginFormat::VST3Instrument => "VST3 Instrument",
+            PluginFormat::VST3AudioFx => "VST3 Effect",
         }
     }
 }
 
+impl fmt::Display for PluginFormat {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        f.write_str(self.as_str())
+    }
+}
+
 #[derive(Debug, Clone, PartialEq, Eq, Hash)]
 pub struct Plugin {
     // Our database ID
@@ -378,7 +450,6 @@ static INSTALLED_PLUGINS: Lazy<Arc<Result<HashSet<(String, PluginFormat)>, Datab
                 let db = AbletonDatabase::new(db_path)?;
 
                 db.get_database_plugins()
-                    .map(|vec| vec.into_iter().collect::<HashSet<_>>())
             })()
         })
     });
@@ -411,19 +482,17 @@ impl Sample {
     }
 
     pub(crate) fn from_pre_11_data(data: &str) -> Result<Self, SampleError> {
-        let cleaned_data = data.replace('\t', "").replace('\n', "");
-        let byte_data = hex::decode(&cleaned_data).map_err(SampleError::HexDecodeError)?;
+        let byte_data = decode_hex(data).map_err(SampleError::HexDecodeError)?;
 
         let utf16_chunks: Vec<u16> = byte_data
             .chunks_exact(2)
             .map(|chunk| u16::from_le_bytes([chunk[0], chunk[1]]))
             .collect();
 
-        let path_string = String::from_utf16(&utf16_chunks)
-            .map_err(|_| SampleError::InvalidUtf16Encoding)?
-            .replace('\0', "");
+        let path_string =
+            String::from_utf16(&utf16_chunks).map_err(|_| SampleError::InvalidUtf16Encoding)?;
 
-        let path = PathBuf::from(path_string);
+        let path = PathBuf::from(path_string.trim_end_matches('\0'));
 
         if !path.exists() {
             return Err(SampleError::FileNotFound(path));
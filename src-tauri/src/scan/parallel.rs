@@ -5,7 +5,7 @@ use std::thread::{self, JoinHandle};
 use log::debug;
 
 use crate::error::LiveSetError;
-use crate::live_set::LiveSet;
+use crate::live_set::{LiveSet, LiveSetPreprocessed};
 
 
 /// Result type for parsing operations
@@ -21,8 +21,9 @@ impl ParserWorker {
         Self { sender }
     }
 
-    fn process_file(&self, path: PathBuf) {
-        let result = LiveSet::new(path.clone())
+    fn process_file(&self, preprocessed: LiveSetPreprocessed) {
+        let path = preprocessed.path.clone();
+        let result = LiveSet::from_preprocessed(preprocessed)
             .map(|live_set| (path.clone(), live_set))
             .map_err(|err| (path, err));
             
@@ -37,14 +38,14 @@ pub struct ParallelParser {
     thread_count: usize,
     workers: Vec<JoinHandle<()>>,
     results_rx: Receiver<ParseResult>,
-    work_tx: Arc<Mutex<Option<Sender<PathBuf>>>>,
+    work_tx: Arc<Mutex<Option<Sender<LiveSetPreprocessed>>>>,
 }
 
 impl ParallelParser {
     /// Create a new parallel parser with specified thread count
     pub fn new(thread_count: usize) -> Self {
         let (results_tx, results_rx): (Sender<ParseResult>, Receiver<ParseResult>) = channel();
-        let (work_tx, work_rx): (Sender<PathBuf>, Receiver<PathBuf>) = channel();
+        let (work_tx, work_rx): (Sender<LiveSetPreprocessed>, Receiver<LiveSetPreprocessed>) = channel();
         let work_tx = Arc::new(Mutex::new(Some(work_tx)));
         let work_rx = Arc::new(Mutex::new(work_rx));
         
@@ -58,9 +59,15 @@ impl ParallelParser {
                 debug!("Worker thread {} started", thread_id);
                 let worker = ParserWorker::new(results_tx);
                 
-                while let Ok(path) = work_rx.lock().unwrap().recv() {
-                    debug!("Worker {} processing file: {}", thread_id, path.display());
-                    worker.process_file(path);
+                loop {
+                    // Release the queue lock before parsing. In a `while let` the guard
+                    // would live for the whole loop body and serialize the workers.
+                    let project = match work_rx.lock().unwrap().recv() {
+                        Ok(project) => project,
+                        Err(_) => break,
+                    };
+                    debug!("Worker {} processing file: {}", thread_id, project.path.display());
+                    worker.process_file(project);
                 }
                 debug!("Worker thread {} exiting", thread_id);
             });
@@ -76,21 +83,22 @@ impl ParallelParser {
         }
     }
     
-    /// Submit paths for parsing
-    pub fn submit_paths(&self, paths: Vec<PathBuf>) -> Result<(), LiveSetError> {
-        debug!("Submitting {} paths to worker threads", paths.len());
-        if let Some(tx) = self.work_tx.lock().unwrap().as_ref() {
-            for path in paths {
-                debug!("Sending path to worker: {}", path.display());
-                tx.send(path).map_err(|_| LiveSetError::InvalidProject("Failed to send path to worker thread".to_string()))?;
-            }
-            debug!("Finished submitting all paths");
-            Ok(())
-        } else {
-            Err(LiveSetError::InvalidProject("Worker threads are no longer available".to_string()))
-        }
+    /// A sender for queueing projects from other threads, such as a directory walk
+    /// that submits projects as it finds them
+    pub fn project_sender(&self) -> Result<Sender<LiveSetPreprocessed>, LiveSetError> {
+        self.work_tx
+            .lock()
+            .unwrap()
+            .clone()
+            .ok_or_else(|| LiveSetError::InvalidProject("Worker threads are no longer available".to_string()))
     }
-    
+
+    /// Drops the parser's own work sender. The workers exit, closing the results
+    /// channel, once every sender from `project_sender` is gone and the queue is empty.
+    pub fn finish_submitting(&self) {
+        self.work_tx.lock().unwrap().take();
+    }
+
     /// Get receiver for parsing results
     pub fn get_results_receiver(&self) -> &Receiver<ParseResult> {
         &self.results_rx
@@ -296,7 +304,8 @@ mod tests {
         write!(file, "test data").unwrap();
         
         let parser = ParallelParser::new(2);
-        parser.submit_paths(vec![test_file.clone()]).unwrap();
+        let project = LiveSetPreprocessed::new(test_file.clone()).unwrap();
+        parser.project_sender().unwrap().send(project).unwrap();
         
         // Get first result
         let result = parser.get_results_receiver().recv().unwrap();
@@ -313,14 +322,17 @@ mod tests {
         
         // Get paths from config
         let config = CONFIG.as_ref().expect("Failed to load config");
-        let mut found_projects = HashSet::new();
+        let mut found_projects = HashMap::new();
         
         // Scan all configured directories
         for path in &config.paths {
             let path = PathBuf::from(path);
             if path.exists() {
-                let projects = scanner.scan_directory(&path).unwrap();
-                found_projects.extend(projects);
+                scanner
+                    .for_each_project(&path, |project, metadata| {
+                        found_projects.insert(project, metadata);
+                    })
+                    .unwrap();
             }
         }
         
@@ -335,7 +347,14 @@ mod tests {
         let parser = ParallelParser::new(thread_count);
         
         // Submit all found projects for parsing
-        parser.submit_paths(found_projects.into_iter().collect()).unwrap();
+        let work_tx = parser.project_sender().unwrap();
+        for (path, metadata) in found_projects {
+            if let Ok(project) = LiveSetPreprocessed::with_metadata(path, &metadata) {
+                work_tx.send(project).unwrap();
+            }
+        }
+        drop(work_tx);
+        parser.finish_submitting();
         
         // Collect results with timeout
         let receiver = parser.get_results_receiver();
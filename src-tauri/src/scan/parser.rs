@@ -1,7 +1,8 @@
 #[allow(unused_imports)]
-use log::{debug, trace, warn};
+use log::{debug, log_enabled, trace, warn, Level};
 use quick_xml::events::Event;
 use quick_xml::Reader;
+use std::cell::RefCell;
 use std::collections::{HashMap, HashSet};
 use std::io::BufRead;
 use std::path::PathBuf;
@@ -14,12 +15,49 @@ use crate::error::LiveSetError;
 use crate::models::{
     AbletonVersion, KeySignature, Plugin, PluginInfo, Sample, Scale, TimeSignature, Tonic,
 };
-use crate::utils::plugins::get_most_recent_db_file;
+use crate::utils::plugins::cached_most_recent_db_file;
 use crate::utils::plugins::LineTrackingBuffer;
 use crate::utils::{EventExt, StringResultExt};
 #[allow(unused_imports)]
 use crate::{debug_fn, trace_fn, warn_fn};
 
+/// Time value Ableton uses for the initial event of an automation envelope, which is
+/// where the song's starting time signature is stored
+const TIME_SIGNATURE_EVENT_TIME: &[u8] = b"-63072000";
+
+thread_local! {
+    /// Ableton's plugin database, opened once per parsing thread and reused for every
+    /// project that thread parses
+    static ABLETON_DB: RefCell<Option<AbletonDatabase>> = RefCell::new(None);
+}
+
+/// Runs `f` against the most recent Ableton plugin database. The database is only
+/// located when this thread first needs it, through a process-wide lookup that
+/// lists the directory again only when it has changed; scan threads live for one
+/// scan, so a newer database file is picked up by the next scan rather than
+/// re-checked for every project.
+fn with_ableton_db<T>(
+    f: impl FnOnce(&AbletonDatabase) -> Result<T, LiveSetError>,
+) -> Result<T, LiveSetError> {
+    ABLETON_DB.with(|cached| {
+        let mut cached = cached.borrow_mut();
+        let ableton_db = match cached.take() {
+            Some(ableton_db) => ableton_db,
+            None => {
+                let config = CONFIG
+                    .as_ref()
+                    .map_err(|e| LiveSetError::ConfigError(e.clone()))?;
+                let db_path = cached_most_recent_db_file(&PathBuf::from(&config.live_database_dir))
+                    .map_err(LiveSetError::DatabaseError)?;
+                AbletonDatabase::new(db_path).map_err(LiveSetError::DatabaseError)?
+            }
+        };
+        let result = f(&ableton_db);
+        *cached = Some(ableton_db);
+        result
+    })
+}
+
 #[derive(Debug, Clone, PartialEq)]
 pub enum PathType {
     Direct,  // For version >= 11
@@ -134,10 +172,14 @@ pub struct Parser {
     pub(crate) dev_identifiers: Arc<parking_lot::RwLock<HashMap<String, ()>>>,
     pub(crate) current_tempo: f64,
     pub(crate) current_time_signature: TimeSignature,
-    pub(crate) current_end_times: Vec<f64>,
+    /// Largest CurrentEnd value seen so far, kept as a running max rather than a
+    /// list of every clip's end time
+    pub(crate) max_end_time: Option<f64>,
 
     // Initialize key parsing state
-    pub(crate) key_frequencies: HashMap<KeySignature, usize>,
+    /// Clip count per key signature in first-seen order, so ties resolve to the
+    /// key that appeared first. There are only a few distinct keys per set.
+    pub(crate) key_frequencies: Vec<(KeySignature, usize)>,
     current_scale_info: Option<(Tonic, Scale)>,
     current_clip_in_key: bool,
 }
@@ -164,7 +206,9 @@ impl Parser {
             depth: 0,
             ableton_version: version,
             options,
-            line_tracker: LineTrackingBuffer::new(xml_data.to_vec()),
+            // Line numbers only show up in log messages, so skip counting newlines
+            // unless those messages can be emitted
+            line_tracker: LineTrackingBuffer::new(log_enabled!(Level::Warn)),
 
             // Initialize sample parsing state
             sample_paths: HashSet::new(),
@@ -182,10 +226,10 @@ impl Parser {
             dev_identifiers: Arc::new(parking_lot::RwLock::new(HashMap::new())),
             current_tempo: 0.0,
             current_time_signature: TimeSignature::default(),
-            current_end_times: Vec::new(),
+            max_end_time: None,
 
             // Initialize key parsing state
-            key_frequencies: HashMap::new(),
+            key_frequencies: Vec::new(),
             current_scale_info: None,
             current_clip_in_key: false,
         })
@@ -195,10 +239,9 @@ impl Parser {
     fn detect_version(xml_data: &[u8]) -> Result<AbletonVersion, LiveSetError> {
         let mut reader = Reader::from_reader(xml_data);
         reader.config_mut().trim_text(true);
-        let mut buf = Vec::new();
 
         loop {
-            match reader.read_event_into(&mut buf) {
+            match reader.read_event() {
                 Ok(Event::Empty(ref e)) | Ok(Event::Start(ref e)) => {
                     if e.name().as_ref() == b"Ableton" {
                         // Get MinorVersion attribute which contains the actual version info
@@ -207,27 +250,17 @@ impl Parser {
                             .ok_or(LiveSetError::MissingVersion)?
                             .unescape_value()?;
 
-                        // Parse version components from MinorVersion (format: "12.0_12049")
-                        let parts: Vec<&str> = version_str.split('_').collect();
-                        if parts.len() != 2 {
-                            return Err(LiveSetError::InvalidVersion(version_str.to_string()));
-                        }
-
-                        let version_parts: Vec<&str> = parts[0].split('.').collect();
-                        if version_parts.len() != 2 {
-                            return Err(LiveSetError::InvalidVersion(version_str.to_string()));
-                        }
+                        // Parse version components from MinorVersion (format: "12.0_12049").
+                        // Any extra separator leaves a component that fails to parse below.
+                        let invalid = || LiveSetError::InvalidVersion(version_str.to_string());
+                        let (major_minor, patch) =
+                            version_str.split_once('_').ok_or_else(invalid)?;
+                        let (major, minor) = major_minor.split_once('.').ok_or_else(invalid)?;
 
                         // Parse major, minor, and patch versions
-                        let major: u32 = version_parts[0]
-                            .parse()
-                            .map_err(|_| LiveSetError::InvalidVersion(version_str.to_string()))?;
-                        let minor: u32 = version_parts[1]
-                            .parse()
-                            .map_err(|_| LiveSetError::InvalidVersion(version_str.to_string()))?;
-                        let patch: u32 = parts[1]
-                            .parse()
-                            .map_err(|_| LiveSetError::InvalidVersion(version_str.to_string()))?;
+                        let major: u32 = major.parse().map_err(|_| invalid())?;
+                        let minor: u32 = minor.parse().map_err(|_| invalid())?;
+                        let patch: u32 = patch.parse().map_err(|_| invalid())?;
 
                         // Get beta status from SchemaChangeCount
                         let beta = e
@@ -256,16 +289,16 @@ impl Parser {
                 Err(e) => return Err(LiveSetError::from(e)),
                 _ => {}
             }
-            buf.clear();
         }
         Err(LiveSetError::MissingVersion)
     }
 
     /// Main parsing function that processes the XML data
     pub(crate) fn parse(&mut self, xml_data: &[u8]) -> Result<ParseResult, LiveSetError> {
+        // The whole document is already in memory, so read events straight out of the
+        // input slice instead of copying each one into an intermediate buffer
         let mut reader = Reader::from_reader(xml_data);
         reader.config_mut().trim_text(true);
-        let mut buf = Vec::new();
         let mut byte_pos; // Will be set in the loop
         let result = ParseResult::default();
 
@@ -275,9 +308,9 @@ impl Parser {
         #[allow(unused_variables)]
         loop {
             byte_pos = reader.buffer_position();
-            let line = self.line_tracker.get_line_number(byte_pos);
+            let line = self.line_tracker.get_line_number(xml_data, byte_pos);
 
-            match reader.read_event_into(&mut buf) {
+            match reader.read_event() {
                 Ok(Event::Start(ref event)) => {
                     if skip_first && event.name().as_ref() == b"Ableton" {
                         skip_first = false;
@@ -309,13 +342,37 @@ impl Parser {
                 }
                 _ => {}
             }
-            buf.clear();
         }
 
         // Convert collected data into final result
         self.finalize_result(result)
     }
 
+    /// Picks the key signature seen in the most clips with a single pass over the
+    /// counts, keeping the first one seen on a tie and falling back to the default
+    /// key when no clip had one
+    fn most_frequent_key(&self) -> KeySignature {
+        self.key_frequencies
+            .iter()
+            .fold(None, |best: Option<&(KeySignature, usize)>, entry| match best {
+                Some(best) if best.1 >= entry.1 => Some(best),
+                _ => Some(entry),
+            })
+            .map(|(key, count)| {
+                debug_fn!(
+                    "finalize_result",
+                    "Found most frequent key signature: {} (count: {})",
+                    key,
+                    count
+                );
+                key.clone()
+            })
+            .unwrap_or_else(|| {
+                debug_fn!("finalize_result", "No key signatures found, using default");
+                KeySignature::default()
+            })
+    }
+
     /// Converts the parser's state into the final ParseResult
     #[cfg(test)]
     pub(crate) fn finalize_result(
@@ -344,13 +401,9 @@ impl Parser {
             )));
         }
 
-        // Calculate furthest bar if requested and we have end times
-        if self.options.calculate_furthest_bar && !self.current_end_times.is_empty() {
+        // Calculate furthest bar if we have end times (only collected when requested)
+        if let Some(max_end_time) = self.max_end_time {
             let beats_per_bar = result.time_signature.numerator as f64;
-            let max_end_time = self
-                .current_end_times
-                .iter()
-                .fold(f64::NEG_INFINITY, |a, &b| a.max(b));
             result.furthest_bar = Some(max_end_time / beats_per_bar);
 
             debug_fn!(
@@ -373,21 +426,22 @@ impl Parser {
             ));
         }
 
-        // Convert plugin info tags to Plugin instances
-        let config = CONFIG
-            .as_ref()
-            .map_err(|e| LiveSetError::ConfigError(e.clone()))?;
-        let db_dir = &config.live_database_dir;
-        let db_path =
-            get_most_recent_db_file(&PathBuf::from(db_dir)).map_err(LiveSetError::DatabaseError)?;
-        let ableton_db = AbletonDatabase::new(db_path).map_err(LiveSetError::DatabaseError)?;
+        // Convert plugin info tags to Plugin instances, looking up every plugin in the
+        // project with one query. Projects without plugins never touch Ableton's database.
+        let mut db_plugins = if self.plugin_info_tags.is_empty() {
+            HashMap::new()
+        } else {
+            let dev_identifiers: Vec<&str> =
+                self.plugin_info_tags.keys().map(String::as_str).collect();
+            with_ableton_db(|ableton_db| {
+                ableton_db
+                    .get_plugins_by_dev_identifiers(&dev_identifiers)
+                    .map_err(LiveSetError::DatabaseError)
+            })?
+        };
 
         for (dev_identifier, info) in &self.plugin_info_tags {
-            let db_plugin = ableton_db
-                .get_plugin_by_dev_identifier(dev_identifier)
-                .map_err(LiveSetError::DatabaseError)?;
-
-            let plugin = match db_plugin {
+            let plugin = match db_plugins.remove(dev_identifier) {
                 Some(db_plugin) => {
                     debug_fn!(
                         "finalize_result",
@@ -440,26 +494,7 @@ impl Parser {
         // Handle key signature if requested
         // TODO: add fallback to key detection using midi data, use music21 python script to detect key
         if self.options.parse_key {
-            // Find the most frequent key signature
-            let most_frequent_key = self
-                .key_frequencies
-                .iter()
-                .max_by_key(|&(_, count)| count)
-                .map(|(key, count)| {
-                    debug_fn!(
-                        "finalize_result",
-                        "Found most frequent key signature: {} (count: {})",
-                        key,
-                        count
-                    );
-                    key.clone()
-                })
-                .unwrap_or_else(|| {
-                    debug_fn!("finalize_result", "No key signatures found, using default");
-                    KeySignature::default()
-                });
-
-            result.key_signature = Some(most_frequent_key);
+            result.key_signature = Some(self.most_frequent_key());
         } else {
             result.key_signature = None;
         }
@@ -492,13 +527,9 @@ impl Parser {
             )));
         }
 
-        // Calculate furthest bar if requested and we have end times
-        if self.options.calculate_furthest_bar && !self.current_end_times.is_empty() {
+        // Calculate furthest bar if we have end times (only collected when requested)
+        if let Some(max_end_time) = self.max_end_time {
             let beats_per_bar = result.time_signature.numerator as f64;
-            let max_end_time = self
-                .current_end_times
-                .iter()
-                .fold(f64::NEG_INFINITY, |a, &b| a.max(b));
             result.furthest_bar = Some(max_end_time / beats_per_bar);
 
             debug_fn!(
@@ -521,21 +552,22 @@ impl Parser {
             ));
         }
 
-        // Convert plugin info tags to Plugin instances
-        let config = CONFIG
-            .as_ref()
-            .map_err(|e| LiveSetError::ConfigError(e.clone()))?;
-        let db_dir = &config.live_database_dir;
-        let db_path =
-            get_most_recent_db_file(&PathBuf::from(db_dir)).map_err(LiveSetError::DatabaseError)?;
-        let ableton_db = AbletonDatabase::new(db_path).map_err(LiveSetError::DatabaseError)?;
+        // Convert plugin info tags to Plugin instances, looking up every plugin in the
+        // project with one query. Projects without plugins never touch Ableton's database.
+        let mut db_plugins = if self.plugin_info_tags.is_empty() {
+            HashMap::new()
+        } else {
+            let dev_identifiers: Vec<&str> =
+                self.plugin_info_tags.keys().map(String::as_str).collect();
+            with_ableton_db(|ableton_db| {
+                ableton_db
+                    .get_plugins_by_dev_identifiers(&dev_identifiers)
+                    .map_err(LiveSetError::DatabaseError)
+            })?
+        };
 
         for (dev_identifier, info) in &self.plugin_info_tags {
-            let db_plugin = ableton_db
-                .get_plugin_by_dev_identifier(dev_identifier)
-                .map_err(LiveSetError::DatabaseError)?;
-
-            let plugin = match db_plugin {
+            let plugin = match db_plugins.remove(dev_identifier) {
                 Some(db_plugin) => {
                     debug_fn!(
                         "finalize_result",
@@ -587,26 +619,7 @@ impl Parser {
 
         // Handle key signature if requested
         if self.options.parse_key {
-            // Find the most frequent key signature
-            let most_frequent_key = self
-                .key_frequencies
-                .iter()
-                .max_by_key(|&(_, count)| count)
-                .map(|(key, count)| {
-                    debug_fn!(
-                        "finalize_result",
-                        "Found most frequent key signature: {} (count: {})",
-                        key,
-                        count
-                    );
-                    key.clone()
-                })
-                .unwrap_or_else(|| {
-                    debug_fn!("finalize_result", "No key signatures found, using default");
-                    KeySignature::default()
-                });
-
-            result.key_signature = Some(most_frequent_key);
+            result.key_signature = Some(self.most_frequent_key());
         } else {
             result.key_signature = None;
         }
@@ -620,8 +633,10 @@ impl Parser {
         reader: &mut Reader<R>,
         byte_pos: &mut u64,
     ) -> Result<(), LiveSetError> {
-        let name = event.name().to_string_result()?;
-        let line = self.line_tracker.get_line_number(*byte_pos);
+        // Borrow the tag name instead of allocating a String for every element
+        let qname = event.name();
+        let name = qname.to_str_result()?;
+        let line = self.line_tracker.current_line();
 
         trace_fn!(
             "handle_start_event",
@@ -632,7 +647,7 @@ impl Parser {
             self.depth
         );
 
-        match name.as_str() {
+        match name {
             "SampleRef" => {
                 debug_fn!(
                     "handle_start_event",
@@ -734,14 +749,14 @@ impl Parser {
                 let start_depth = self.depth;
 
                 loop {
+                    // Reported against the element that started the look-ahead
                     *byte_pos = reader.buffer_position();
-                    let line = self.line_tracker.get_line_number(*byte_pos);
+                    let line = self.line_tracker.current_line();
 
                     match reader.read_event_into(&mut buf) {
                         Ok(Event::Empty(ref event)) => {
-                            let tag_name = event.name().to_string_result()?;
-                            match tag_name.as_str() {
-                                "BrowserContentPath" => {
+                            match event.name().as_ref() {
+                                b"BrowserContentPath" => {
                                     debug_fn!(
                                         "handle_start_event",
                                         "[{}] Found BrowserContentPath at depth {}",
@@ -750,7 +765,7 @@ impl Parser {
                                     );
                                     found_browser_content_path = true;
                                 }
-                                "BranchDeviceId" => {
+                                b"BranchDeviceId" => {
                                     if let Some(id) = event.get_value_as_string_result()? {
                                         debug_fn!(
                                             "handle_start_event",
@@ -766,9 +781,8 @@ impl Parser {
                             }
                         }
                         Ok(Event::Start(ref e)) => {
-                            let tag_name = e.name().to_string_result()?;
                             // Only consider PluginDesc nested if it's at a deeper depth
-                            if tag_name == "PluginDesc" && self.depth > start_depth {
+                            if e.name().as_ref() == b"PluginDesc" && self.depth > start_depth {
                                 debug_fn!(
                                     "handle_start_event",
                                     "[{}] Found nested PluginDesc at depth {}, ignoring device ID",
@@ -790,8 +804,9 @@ impl Parser {
                             }
                         }
                         Ok(Event::End(ref e)) => {
-                            let end_name = e.name().to_string_result()?;
-                            if end_name == "BranchSourceContext" && self.depth <= start_depth {
+                            if e.name().as_ref() == b"BranchSourceContext"
+                                && self.depth <= start_depth
+                            {
                                 debug_fn!(
                                     "handle_start_event",
                                     "[{}] Exiting BranchSourceContext look-ahead at depth {}",
@@ -875,7 +890,7 @@ impl Parser {
                             name,
                             device_id
                         );
-                        self.state = if name.as_str() == "Vst3PluginInfo" {
+                        self.state = if name == "Vst3PluginInfo" {
                             ParserState::InVst3PluginInfo
                         } else {
                             ParserState::InVstPluginInfo
@@ -972,9 +987,19 @@ impl Parser {
                     return Ok(());
                 }
 
+                // Events at any other time are automation points, not the song's
+                // starting time signature, so skip them before decoding anything
+                if let Some(time) = event.try_get_attribute("Time")? {
+                    if time.value.as_ref() != TIME_SIGNATURE_EVENT_TIME {
+                        return Ok(());
+                    }
+                }
+
                 // Get the Value attribute
                 if let Some(value) = event.try_get_attribute("Value")? {
-                    let value_str = value.unescape_value()?.to_string();
+                    // Numeric values never contain entities, so read the raw attribute
+                    // bytes in place rather than unescaping into a new String
+                    let value_str = value.value.to_str_result()?;
                     debug_fn!(
                         "handle_start_event",
                         "[{}] Found EnumEvent with value: {}",
@@ -1025,7 +1050,7 @@ impl Parser {
 
                 // Get the Value attribute
                 if let Some(value) = event.try_get_attribute("Value")? {
-                    let value_str = value.unescape_value()?.to_string();
+                    let value_str = value.value.to_str_result()?;
                     match value_str.parse::<f64>() {
                         Ok(end_time) => {
                             debug_fn!(
@@ -1034,7 +1059,8 @@ impl Parser {
                                 line,
                                 end_time
                             );
-                            self.current_end_times.push(end_time);
+                            let max_end_time = self.max_end_time.unwrap_or(f64::NEG_INFINITY);
+                            self.max_end_time = Some(max_end_time.max(end_time));
                         }
                         Err(e) => {
                             warn_fn!(
@@ -1062,7 +1088,7 @@ impl Parser {
             "Manual" if matches!(self.state, ParserState::InTempo { .. }) => {
                 // Get the Value attribute for the tempo
                 if let Some(value) = event.try_get_attribute("Value")? {
-                    let value_str = value.unescape_value()?.to_string();
+                    let value_str = value.value.to_str_result()?;
                     match value_str.parse::<f64>() {
                         Ok(tempo) if tempo >= 10.0 && tempo <= 999.0 => {
                             debug_fn!(
@@ -1136,7 +1162,8 @@ impl Parser {
             }
             "IsInKey" if matches!(self.state, ParserState::InMidiClip) => {
                 if let Some(value) = event.try_get_attribute("Value")? {
-                    let is_in_key = value.unescape_value()?.as_ref() == "true";
+                    // A boolean never contains entities, so compare the raw bytes
+                    let is_in_key = value.value.as_ref() == b"true";
                     debug_fn!(
                         "handle_start_event",
                         "[{}] Found IsInKey: {}",
@@ -1149,7 +1176,14 @@ impl Parser {
                     if is_in_key {
                         if let Some((tonic, scale)) = self.current_scale_info.take() {
                             let key_sig = KeySignature { tonic, scale };
-                            *self.key_frequencies.entry(key_sig).or_insert(0) += 1;
+                            match self
+                                .key_frequencies
+                                .iter_mut()
+                                .find(|(key, _)| *key == key_sig)
+                            {
+                                Some((_, count)) => *count += 1,
+                                None => self.key_frequencies.push((key_sig, 1)),
+                            }
                         }
                     }
                 }
@@ -1163,7 +1197,8 @@ impl Parser {
         &mut self,
         event: &quick_xml::events::BytesEnd,
     ) -> Result<(), LiveSetError> {
-        let name = event.name().to_string_result()?;
+        let qname = event.name();
+        let name = qname.to_str_result()?;
 
         trace_fn!(
             "handle_end_event",
@@ -1173,7 +1208,7 @@ impl Parser {
             self.depth
         );
 
-        match name.as_str() {
+        match name {
             "SampleRef" => {
                 debug_fn!(
                     "handle_end_event",
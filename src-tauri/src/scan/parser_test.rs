@@ -99,6 +99,23 @@ fn test_time_signature() {
     assert_eq!(time_sig.denominator, 4);
 }
 
+#[test]
+fn test_time_signature_ignores_later_events() {
+    let mut scanner = create_test_scanner();
+    let mut reader = Reader::from_str(
+        r#"
+        <EnumEvent Id="0" Time="-63072000" Value="201" />
+        <EnumEvent Id="1" Time="16" Value="202" />
+    "#,
+    );
+
+    process_xml(&mut scanner, &mut reader);
+
+    let time_sig = scanner.current_time_signature;
+    assert_eq!(time_sig.numerator, 4);
+    assert_eq!(time_sig.denominator, 4);
+}
+
 #[test]
 fn test_invalid_time_signature() {
     let mut scanner = create_test_scanner();
@@ -183,6 +200,23 @@ fn test_invalid_version_format() {
     assert!(matches!(result, Err(LiveSetError::InvalidVersion(_))));
 }
 
+#[test]
+fn test_version_with_extra_components() {
+    for version in ["12.0.1_12049", "12.0_120_49"] {
+        let xml_data = format!(
+            r#"<?xml version="1.0" encoding="UTF-8"?>
+<Ableton MajorVersion="5" MinorVersion="{}" SchemaChangeCount="7">
+    <LiveSet>
+    </LiveSet>
+</Ableton>"#,
+            version
+        );
+
+        let result = Parser::new(xml_data.as_bytes(), ParseOptions::default());
+        assert!(matches!(result, Err(LiveSetError::InvalidVersion(_))));
+    }
+}
+
 #[test]
 fn test_missing_version() {
     let xml_data = r#"<?xml version="1.0" encoding="UTF-8"?>
@@ -1172,6 +1206,37 @@ fn test_multiple_key_signatures() {
     assert_eq!(scanner.key_frequencies.len(), 2);
 }
 
+#[test]
+fn test_key_signature_tie_keeps_first_seen() {
+    let mut scanner = create_test_scanner();
+    let mut reader = Reader::from_str(
+        r#"
+        <MidiClip>
+            <ScaleInformation>
+                <RootNote Value="9" />
+                <Name Value="Minor" />
+            </ScaleInformation>
+            <IsInKey Value="true" />
+        </MidiClip>
+        <MidiClip>
+            <ScaleInformation>
+                <RootNote Value="0" />
+                <Name Value="Major" />
+            </ScaleInformation>
+            <IsInKey Value="true" />
+        </MidiClip>
+    "#,
+    );
+
+    process_xml(&mut scanner, &mut reader);
+
+    setup_valid_scanner(&mut scanner);
+
+    let result = scanner.finalize_result(ParseResult::default()).unwrap();
+    assert_eq!(result.key_signature.clone().unwrap().tonic, Tonic::A);
+    assert_eq!(result.key_signature.clone().unwrap().scale, Scale::Minor);
+}
+
 fn process_xml(scanner: &mut Parser, reader: &mut Reader<&[u8]>) {
     let mut buf = Vec::new();
     let mut byte_pos = 0;
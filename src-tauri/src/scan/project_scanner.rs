@@ -1,10 +1,41 @@
+use std::ffi::OsStr;
+use std::fs::{self, Metadata};
 use std::path::{Path, PathBuf};
 use regex::Regex;
-use walkdir::WalkDir;
+use walkdir::{DirEntry, WalkDir};
 use std::collections::HashSet;
+use std::io;
 use crate::error::{LiveSetError, PatternError};
 
+/// File name suffix of Ableton Live sets
+pub(crate) const PROJECT_SUFFIX: &str = ".als";
+
+/// Whether a file name is an Ableton Live set. The name is compared as a plain
+/// suffix without allocating or splitting the path. Names that are not valid
+/// UTF-8 are never projects, for the scanner and the watcher alike.
+pub(crate) fn is_project_name(name: &OsStr) -> bool {
+    name.to_str().map_or(false, |name| name.ends_with(PROJECT_SUFFIX))
+}
+
+/// Folders that never hold sets worth indexing, compared ignoring ASCII case:
+/// Ableton's Backup folders, git metadata, and the AppleDouble folders macOS adds
+/// to zip archives. Add further names here; a scan over a handful of short names
+/// is cheaper than hashing each directory name.
+const SKIPPED_FOLDERS: [&str; 3] = ["backup", ".git", "__macosx"];
+
+/// Whether a directory name is one of the `SKIPPED_FOLDERS`
+fn is_skipped_name(name: &OsStr) -> bool {
+    SKIPPED_FOLDERS
+        .iter()
+        .any(|skipped| name.eq_ignore_ascii_case(skipped))
+}
+
+fn is_skipped_folder(entry: &DirEntry) -> bool {
+    entry.file_type().is_dir() && is_skipped_name(entry.file_name())
+}
+
 /// Scanner for finding Ableton Live project files in directories
+#[derive(Clone)]
 pub struct ProjectPathScanner {
     /// Regex pattern for identifying backup files
     backup_pattern: Regex,
@@ -19,43 +50,104 @@ impl ProjectPathScanner {
         Ok(Self { backup_pattern })
     }
 
-    /// Scan a directory for Ableton Live project files
-    pub fn scan_directory(&self, dir: &Path) -> Result<Vec<PathBuf>, LiveSetError> {
-        let mut project_paths = HashSet::new();
+    /// Calls `found` with each project's path and metadata as the walk reaches it,
+    /// so callers can start on the first projects while the rest of the tree is
+    /// still being walked. walkdir takes the metadata from the directory listing
+    /// where the platform provides it, as Windows does, so preprocessing does not
+    /// have to stat every project a second time. Symlinked files are passed with
+    /// the metadata of their target, which the walk already fetched.
+    ///
+    /// Entries that cannot be read are skipped and their number is returned, so the
+    /// caller can report an incomplete scan. A `dir` that cannot be read at all is
+    /// an error.
+    pub fn for_each_project(
+        &self,
+        dir: &Path,
+        mut found: impl FnMut(PathBuf, Metadata),
+    ) -> Result<usize, LiveSetError> {
+        // Symlinked directories are followed by hand rather than with walkdir's
+        // follow_links, whose loop check reopens every ancestor directory for each
+        // directory it enters. Here only symlinks pay for a stat, and a target that
+        // was already walked is skipped, which also breaks link cycles.
+        let mut walked_roots = HashSet::new();
+        if let Ok(root) = dir.canonicalize() {
+            walked_roots.insert(root);
+        }
+        let mut pending_roots = vec![dir.to_path_buf()];
+        let mut skipped = 0;
 
-        for entry in WalkDir::new(dir)
-            .follow_links(true)
-            .into_iter()
-            .filter_map(|e| e.ok())
-        {
-            let path = entry.path();
-            
-            // Check if it's an .als file
-            if let Some(ext) = path.extension() {
-                if ext == "als" {
-                    let path_str = path.to_string_lossy();
-                    
-                    // Skip if it's a backup file
-                    if !self.backup_pattern.is_match(&path_str) {
-                        project_paths.insert(path.to_path_buf());
+        while let Some(root) = pending_roots.pop() {
+            // Backup folders hold nothing but timestamped copies, and the other
+            // skipped folders no sets at all, so they are pruned instead of walked
+            // and filtered file by file
+            let entries = WalkDir::new(&root)
+                .into_iter()
+                .filter_entry(|entry| entry.depth() == 0 || !is_skipped_folder(entry));
+            for entry in entries {
+                let entry = match entry {
+                    Ok(entry) => entry,
+                    // Nothing under `dir` was walked if `dir` itself can't be read
+                    Err(e) if e.depth() == 0 && root.as_path() == dir => {
+                        return Err(io::Error::from(e).into());
+                    }
+                    Err(_) => {
+                        skipped += 1;
+                        continue;
+                    }
+                };
+
+                // The file type comes from the directory listing, so directories are
+                // skipped without a stat call
+                let file_type = entry.file_type();
+                let mut target_metadata = None;
+                if file_type.is_symlink() {
+                    match fs::metadata(entry.path()) {
+                        Ok(metadata) if metadata.is_dir() => {
+                            if is_skipped_name(entry.file_name()) {
+                                continue;
+                            }
+                            if let Ok(target) = entry.path().canonicalize() {
+                                if walked_roots.insert(target) {
+                                    pending_roots.push(entry.into_path());
+                                }
+                            }
+                            continue;
+                        }
+                        Ok(metadata) if metadata.is_file() => target_metadata = Some(metadata),
+                        _ => continue,
                     }
+                } else if !file_type.is_file() {
+                    continue;
                 }
-            }
-        }
 
-        Ok(project_paths.into_iter().collect())
-    }
+                // Only the file name decides whether this is a project, so check it
+                // without converting the whole path
+                if !is_project_name(entry.file_name()) {
+                    continue;
+                }
+                // `is_project_name` only accepts UTF-8 names, so this never falls back
+                let name = entry.file_name().to_str().unwrap_or_default();
 
-    /// Scan multiple directories for Ableton Live project files
-    pub fn scan_directories(&self, dirs: &[PathBuf]) -> Result<Vec<PathBuf>, LiveSetError> {
-        let mut all_paths = HashSet::new();
+                // Skip macOS "._" metadata files and Ableton's timestamped backups
+                if name.starts_with("._") || self.backup_pattern.is_match(name) {
+                    continue;
+                }
 
-        for dir in dirs {
-            let paths = self.scan_directory(dir)?;
-            all_paths.extend(paths);
+                let metadata = match target_metadata {
+                    Some(metadata) => metadata,
+                    None => match entry.metadata() {
+                        Ok(metadata) => metadata,
+                        Err(_) => {
+                            skipped += 1;
+                            continue;
+                        }
+                    },
+                };
+                found(entry.into_path(), metadata);
+            }
         }
 
-        Ok(all_paths.into_iter().collect())
+        Ok(skipped)
     }
 }
 
@@ -71,6 +163,13 @@ mod tests {
         path
     }
 
+    fn project_paths(scanner: &ProjectPathScanner, dir: &Path) -> Vec<PathBuf> {
+        let mut paths = Vec::new();
+        let skipped = scanner.for_each_project(dir, |path, _| paths.push(path)).unwrap();
+        assert_eq!(skipped, 0);
+        paths
+    }
+
     #[test]
     fn test_basic_file_detection() {
         let temp_dir = TempDir::new().unwrap();
@@ -81,7 +180,7 @@ mod tests {
         create_test_file(temp_dir.path(), "not_a_project.txt");
         
         let scanner = ProjectPathScanner::new().unwrap();
-        let paths = scanner.scan_directory(temp_dir.path()).unwrap();
+        let paths = project_paths(&scanner, temp_dir.path());
         
         assert_eq!(paths.len(), 2);
         assert!(paths.iter().all(|p| p.extension().unwrap() == "als"));
@@ -97,12 +196,47 @@ mod tests {
         create_test_file(temp_dir.path(), "another [2023-11-20 154321].als");
         
         let scanner = ProjectPathScanner::new().unwrap();
-        let paths = scanner.scan_directory(temp_dir.path()).unwrap();
+        let paths = project_paths(&scanner, temp_dir.path());
         
         assert_eq!(paths.len(), 1);
         assert_eq!(paths[0].file_name().unwrap(), "project.als");
     }
 
+    #[test]
+    fn test_non_project_entries_skipped() {
+        let temp_dir = TempDir::new().unwrap();
+
+        create_test_file(temp_dir.path(), "project.als");
+        create_test_file(temp_dir.path(), "._project.als");
+        fs::create_dir(temp_dir.path().join("folder.als")).unwrap();
+
+        let scanner = ProjectPathScanner::new().unwrap();
+        let paths = project_paths(&scanner, temp_dir.path());
+
+        assert_eq!(paths.len(), 1);
+        assert_eq!(paths[0].file_name().unwrap(), "project.als");
+    }
+
+    #[test]
+    fn test_skipped_folders_pruned() {
+        let temp_dir = TempDir::new().unwrap();
+        let backup_dir = temp_dir.path().join("Backup");
+        fs::create_dir(&backup_dir).unwrap();
+
+        create_test_file(temp_dir.path(), "project.als");
+        create_test_file(&backup_dir, "project.als");
+        for folder in [".git", "__MACOSX"] {
+            let skipped = temp_dir.path().join(folder);
+            fs::create_dir(&skipped).unwrap();
+            create_test_file(&skipped, "project.als");
+        }
+
+        let scanner = ProjectPathScanner::new().unwrap();
+        let paths = project_paths(&scanner, temp_dir.path());
+
+        assert_eq!(paths, vec![temp_dir.path().join("project.als")]);
+    }
+
     #[test]
     fn test_nested_directory_scanning() {
         let temp_dir = TempDir::new().unwrap();
@@ -116,30 +250,64 @@ mod tests {
         create_test_file(&sub_dir, "nested [2023-10-15 123456].als");
         
         let scanner = ProjectPathScanner::new().unwrap();
-        let paths = scanner.scan_directory(temp_dir.path()).unwrap();
+        let paths = project_paths(&scanner, temp_dir.path());
         
         assert_eq!(paths.len(), 2);
         assert!(paths.iter().any(|p| p.file_name().unwrap() == "root.als"));
         assert!(paths.iter().any(|p| p.file_name().unwrap() == "nested.als"));
     }
 
+    #[cfg(unix)]
     #[test]
-    fn test_multiple_directory_scanning() {
-        let temp_dir1 = TempDir::new().unwrap();
-        let temp_dir2 = TempDir::new().unwrap();
-        
-        create_test_file(temp_dir1.path(), "project1.als");
-        create_test_file(temp_dir2.path(), "project2.als");
-        create_test_file(temp_dir2.path(), "project2 [2023-10-15 123456].als");
-        
-        let parser = ProjectPathScanner::new().unwrap();
-        let paths = parser.scan_directories(&[
-            temp_dir1.path().to_path_buf(),
-            temp_dir2.path().to_path_buf(),
-        ]).unwrap();
-        
+    fn test_symlinked_directories_followed_once() {
+        let temp_dir = TempDir::new().unwrap();
+        let library = temp_dir.path().join("library");
+        let linked = temp_dir.path().join("linked");
+        fs::create_dir(&library).unwrap();
+        fs::create_dir(&linked).unwrap();
+
+        create_test_file(&library, "root.als");
+        create_test_file(&linked, "linked.als");
+        std::os::unix::fs::symlink(&linked, library.join("shortcut")).unwrap();
+        // A link back to the scanned directory must not be walked again
+        std::os::unix::fs::symlink(&library, library.join("loop")).unwrap();
+
+        let scanner = ProjectPathScanner::new().unwrap();
+        let paths = project_paths(&scanner, &library);
+
         assert_eq!(paths.len(), 2);
-        assert!(paths.iter().any(|p| p.file_name().unwrap() == "project1.als"));
-        assert!(paths.iter().any(|p| p.file_name().unwrap() == "project2.als"));
+        assert!(paths.iter().any(|p| p.file_name().unwrap() == "root.als"));
+        assert!(paths.iter().any(|p| p.ends_with("shortcut/linked.als")));
+    }
+
+    #[test]
+    fn test_scan_returns_file_metadata() {
+        let temp_dir = TempDir::new().unwrap();
+        let path = create_test_file(temp_dir.path(), "project.als");
+        fs::write(&path, b"some content").unwrap();
+        create_test_file(temp_dir.path(), "notes.txt");
+
+        let scanner = ProjectPathScanner::new().unwrap();
+        let mut projects = Vec::new();
+        scanner
+            .for_each_project(temp_dir.path(), |path, metadata| projects.push((path, metadata)))
+            .unwrap();
+
+        assert_eq!(projects.len(), 1);
+        assert_eq!(projects[0].0, path);
+        assert!(projects[0].1.is_file());
+        assert_eq!(projects[0].1.len(), 12);
     }
-} 
\ No newline at end of file
+
+    #[test]
+    fn test_unreadable_root_is_an_error() {
+        let temp_dir = TempDir::new().unwrap();
+
+        let scanner = ProjectPathScanner::new().unwrap();
+        let result = scanner.for_each_project(&temp_dir.path().join("missing"), |_, _| {
+            panic!("no project can be found under a missing folder")
+        });
+
+        assert!(result.is_err());
+    }
+}
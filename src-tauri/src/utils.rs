@@ -1,7 +1,8 @@
 use chrono::Duration;
 use flate2::read::GzDecoder;
 use std::borrow::Cow;
-use std::fs::File;
+use std::cell::RefCell;
+use std::fs::{self, File, Metadata};
 use std::io::{BufRead, BufReader, Read};
 use std::path::Path;
 use std::str::from_utf8;
@@ -141,19 +142,38 @@ impl<'a> EventExt for BytesStart<'a> {
     }
 }
 
-pub(crate) fn validate_ableton_file(file_path: &Path) -> Result<(), FileError> {
-    if !file_path.exists() {
-        return Err(FileError::NotFound(file_path.to_path_buf()));
+/// Validates an Ableton file and returns its metadata, so callers can read
+/// timestamps without a second stat call.
+pub(crate) fn validate_ableton_file(file_path: &Path) -> Result<Metadata, FileError> {
+    // The extension is checked first: it needs no filesystem access, so paths that
+    // can never be sets are rejected without a stat call
+    validate_ableton_extension(file_path)?;
+
+    let metadata = fs::metadata(file_path)
+        .map_err(|_| FileError::NotFound(file_path.to_path_buf()))?;
+    if !metadata.is_file() {
+        return Err(FileError::NotAFile(file_path.to_path_buf()));
     }
 
-    if !file_path.is_file() {
+    Ok(metadata)
+}
+
+/// Validates an Ableton file against metadata the caller already has, such as the
+/// metadata a directory walk returned
+pub(crate) fn validate_ableton_metadata(file_path: &Path, metadata: &Metadata) -> Result<(), FileError> {
+    validate_ableton_extension(file_path)?;
+
+    if !metadata.is_file() {
         return Err(FileError::NotAFile(file_path.to_path_buf()));
     }
 
+    Ok(())
+}
+
+fn validate_ableton_extension(file_path: &Path) -> Result<(), FileError> {
     if file_path.extension().unwrap_or_default() != "als" {
         return Err(FileError::InvalidExtension(file_path.to_path_buf()));
     }
-
     Ok(())
 }
 
@@ -201,35 +221,85 @@ pub(crate) fn format_file_size(size: u64) -> String {
 /// println!("Decompressed {} bytes", decompressed_data.len());
 /// ```
 pub(crate) fn decompress_gzip_file(file_path: &Path) -> Result<Vec<u8>, FileError> {
-    info!("Attempting to extract gzipped data from: {:?}", file_path);
-    trace!("Opening file for gzip decompression");
-
-    let file = File::open(file_path).map_err(|error| {
-        error!(
-            "Failed to open file for gzip decompression: {:?}",
-            file_path
-        );
-        FileError::GzipDecompressionError {
-            path: file_path.to_path_buf(),
-            source: error,
+    let mut compressed_data = Vec::new();
+    let mut decompressed_data = Vec::new();
+    decompress_gzip_file_into(file_path, &mut compressed_data, &mut decompressed_data)?;
+    Ok(decompressed_data)
+}
+
+thread_local! {
+    /// Compressed and decompressed buffers reused for every file a thread parses
+    static GZIP_BUFFERS: RefCell<(Vec<u8>, Vec<u8>)> = RefCell::new((Vec::new(), Vec::new()));
+}
+
+/// Buffers that grew past this are freed after use instead of being kept for the
+/// thread's next file, so one very large set does not pin its memory.
+const MAX_RETAINED_GZIP_BUFFER: usize = 64 * 1024 * 1024;
+
+/// Decompresses a gzip file into this thread's reusable buffers and runs `f` on the
+/// contents. Parsing threads handle many files in a row, and keeping the buffers
+/// saves allocating and faulting in a fresh multi-megabyte buffer for each one.
+pub(crate) fn with_decompressed_gzip_file<T>(
+    file_path: &Path,
+    f: impl FnOnce(&[u8]) -> T,
+) -> Result<T, FileError> {
+    // The buffers are taken out rather than borrowed, so a nested call gets fresh
+    // ones instead of a RefCell panic
+    let (mut compressed_data, mut decompressed_data) =
+        GZIP_BUFFERS.with(|buffers| std::mem::take(&mut *buffers.borrow_mut()));
+
+    let result = decompress_gzip_file_into(file_path, &mut compressed_data, &mut decompressed_data)
+        .map(|()| f(&decompressed_data));
+
+    for buffer in [&mut compressed_data, &mut decompressed_data] {
+        if buffer.capacity() > MAX_RETAINED_GZIP_BUFFER {
+            *buffer = Vec::new();
         }
-    })?;
+    }
+    GZIP_BUFFERS.with(|buffers| *buffers.borrow_mut() = (compressed_data, decompressed_data));
 
-    debug!("File opened successfully, creating GzDecoder");
-    let mut gzip_decoder = GzDecoder::new(file);
-    let mut decompressed_data = Vec::new();
+    result
+}
 
-    trace!("Beginning decompression of gzipped data");
-    gzip_decoder
-        .read_to_end(&mut decompressed_data)
+/// Reads the gzip file at `file_path` into `compressed_data` and its contents into
+/// `decompressed_data`, replacing whatever either buffer held
+fn decompress_gzip_file_into(
+    file_path: &Path,
+    compressed_data: &mut Vec<u8>,
+    decompressed_data: &mut Vec<u8>,
+) -> Result<(), FileError> {
+    info!("Attempting to extract gzipped data from: {:?}", file_path);
+    trace!("Reading compressed file into memory");
+
+    let gzip_error = |error| FileError::GzipDecompressionError {
+        path: file_path.to_path_buf(),
+        source: error,
+    };
+
+    // Read the compressed file in one go: it is a fraction of the decompressed size
+    // and the decoder then works from memory instead of issuing small reads
+    compressed_data.clear();
+    File::open(file_path)
+        .and_then(|mut file| file.read_to_end(compressed_data))
         .map_err(|error| {
-            error!("Failed to decompress gzipped data from: {:?}", file_path);
-            FileError::GzipDecompressionError {
-                path: file_path.to_path_buf(),
-                source: error,
-            }
+            error!(
+                "Failed to open file for gzip decompression: {:?}",
+                file_path
+            );
+            gzip_error(error)
         })?;
 
+    debug!("File read successfully, creating GzDecoder");
+    let mut gzip_decoder = GzDecoder::new(compressed_data.as_slice());
+    decompressed_data.clear();
+    decompressed_data.reserve(gzip_size_hint(compressed_data));
+
+    trace!("Beginning decompression of gzipped data");
+    gzip_decoder.read_to_end(decompressed_data).map_err(|error| {
+        error!("Failed to decompress gzipped data from: {:?}", file_path);
+        gzip_error(error)
+    })?;
+
     let decompressed_size = decompressed_data.len();
     info!(
         "Successfully decompressed {} bytes from: {:?}",
@@ -237,7 +307,25 @@ pub(crate) fn decompress_gzip_file(file_path: &Path) -> Result<Vec<u8>, FileErro
     );
     debug!("Decompressed data size: {} bytes", decompressed_size);
 
-    Ok(decompressed_data)
+    Ok(())
+}
+
+/// Upper bound on how much memory the gzip size hint may reserve up front.
+const MAX_GZIP_PREALLOCATION: usize = 512 * 1024 * 1024;
+
+/// Returns the uncompressed size recorded in a gzip stream's trailer (ISIZE, the
+/// last four bytes, little endian) so the output buffer can be allocated once
+/// instead of growing repeatedly. It is only a hint: the field is stored modulo
+/// 2^32, so it is capped and the decoder still grows the buffer if needed.
+fn gzip_size_hint(compressed_data: &[u8]) -> usize {
+    match compressed_data.len().checked_sub(4) {
+        Some(start) => {
+            let mut trailer = [0u8; 4];
+            trailer.copy_from_slice(&compressed_data[start..]);
+            (u32::from_le_bytes(trailer) as usize).min(MAX_GZIP_PREALLOCATION)
+        }
+        None => 0,
+    }
 }
 
 static LINE_CACHE: Lazy<Mutex<Vec<(usize, usize)>>> = Lazy::new(|| Mutex::new(Vec::new()));
@@ -288,3 +376,52 @@ pub(crate) fn format_duration(duration: &Duration) -> String {
         format!("{}m {}.{:03}s", minutes, seconds, milliseconds)
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use flate2::write::GzEncoder;
+    use flate2::Compression;
+    use std::io::Write;
+
+    #[test]
+    fn test_validate_ableton_file_checks_extension_first() {
+        // A path that can never be a set is rejected as such, without looking it up
+        let path = Path::new("missing/notes.txt");
+        assert!(matches!(
+            validate_ableton_file(path),
+            Err(FileError::InvalidExtension(_))
+        ));
+        assert!(matches!(
+            validate_ableton_file(Path::new("missing/song.als")),
+            Err(FileError::NotFound(_))
+        ));
+    }
+
+    #[test]
+    fn test_decompress_gzip_file_uses_trailer_size() {
+        let data = b"<Ableton MinorVersion=\"12.0_12049\"></Ableton>".repeat(1000);
+        let mut encoder = GzEncoder::new(Vec::new(), Compression::default());
+        encoder.write_all(&data).unwrap();
+        let compressed = encoder.finish().unwrap();
+
+        assert_eq!(gzip_size_hint(&compressed), data.len());
+        assert_eq!(gzip_size_hint(&[0x1f]), 0);
+
+        let temp_dir = tempfile::tempdir().expect("Failed to create temp dir");
+        let path = temp_dir.path().join("test.als");
+        std::fs::write(&path, &compressed).expect("Failed to write test file");
+        assert_eq!(decompress_gzip_file(&path).unwrap(), data);
+
+        // The reused thread buffers must hold only the current file's contents
+        let small = b"<Ableton/>";
+        let mut encoder = GzEncoder::new(Vec::new(), Compression::default());
+        encoder.write_all(small).unwrap();
+        let small_path = temp_dir.path().join("small.als");
+        std::fs::write(&small_path, encoder.finish().unwrap()).expect("Failed to write test file");
+        let len = with_decompressed_gzip_file(&path, |xml| xml.len()).unwrap();
+        assert_eq!(len, data.len());
+        let contents = with_decompressed_gzip_file(&small_path, |xml| xml.to_vec()).unwrap();
+        assert_eq!(contents, small);
+    }
+}
@@ -1,8 +1,7 @@
 // /src/utils/metadata.rs
 
-use std::fs;
-use std::fs::File;
-use std::io::Read;
+use std::fs::{File, Metadata};
+use std::io::{ErrorKind, Read};
 use std::path::PathBuf;
 
 use chrono::{DateTime, Local};
@@ -10,14 +9,11 @@ use crc32fast::Hasher;
 
 use crate::error::FileError;
 
-pub(crate) fn load_file_timestamps(
+/// Reads the timestamps from metadata that has already been fetched
+pub(crate) fn file_timestamps(
     file_path: &PathBuf,
+    metadata: &Metadata,
 ) -> Result<(DateTime<Local>, DateTime<Local>), FileError> {
-    let metadata = fs::metadata(file_path).map_err(|e| FileError::MetadataError {
-        path: file_path.clone(),
-        source: e,
-    })?;
-
     let modified_time = metadata
         .modified()
         .map(DateTime::<Local>::from)
@@ -34,6 +30,10 @@ pub(crate) fn load_file_timestamps(
     Ok((modified_time, created_time))
 }
 
+/// Read size used when hashing. Large enough that the CRC runs over long
+/// contiguous slices instead of paying a read syscall per kilobyte.
+const HASH_BUFFER_SIZE: usize = 256 * 1024;
+
 pub(crate) fn load_file_hash(file_path: &PathBuf) -> Result<String, FileError> {
     let mut file = File::open(file_path).map_err(|e| FileError::HashingError {
         path: file_path.clone(),
@@ -41,19 +41,20 @@ pub(crate) fn load_file_hash(file_path: &PathBuf) -> Result<String, FileError> {
     })?;
 
     let mut hasher = Hasher::new();
-    let mut buffer = [0; 1024];
+    let mut buffer = vec![0; HASH_BUFFER_SIZE];
 
     loop {
-        let bytes_read = file
-            .read(&mut buffer)
-            .map_err(|e| FileError::HashingError {
-                path: file_path.clone(),
-                source: e,
-            })?;
-
-        if bytes_read == 0 {
-            break;
-        }
+        let bytes_read = match file.read(&mut buffer) {
+            Ok(0) => break,
+            Ok(n) => n,
+            Err(e) if e.kind() == ErrorKind::Interrupted => continue,
+            Err(e) => {
+                return Err(FileError::HashingError {
+                    path: file_path.clone(),
+                    source: e,
+                })
+            }
+        };
 
         hasher.update(&buffer[..bytes_read]);
     }
@@ -64,11 +65,9 @@ pub(crate) fn load_file_hash(file_path: &PathBuf) -> Result<String, FileError> {
     Ok(hash_string)
 }
 
-pub(crate) fn load_file_name(file_path: &PathBuf) -> Result<String, FileError> {
-    if file_path.is_dir() {
-        return Err(FileError::NameError("Path is a directory".to_string()));
-    }
-    
+/// Extracts the file name without touching the filesystem, for paths already
+/// known to be files
+pub(crate) fn file_name_from_path(file_path: &PathBuf) -> Result<String, FileError> {
     file_path
         .file_name()
         .ok_or_else(|| FileError::NameError("File name is not present".to_string()))?
@@ -80,23 +79,36 @@ pub(crate) fn load_file_name(file_path: &PathBuf) -> Result<String, FileError> {
 #[cfg(test)]
 mod tests {
     use super::*;
+    use std::fs;
+
+    #[test]
+    fn test_load_file_hash_spans_buffer_boundary() {
+        // Content larger than one read buffer must hash the same as hashing it in one go
+        let data: Vec<u8> = (0..HASH_BUFFER_SIZE * 2 + 123).map(|i| (i % 251) as u8).collect();
+        let temp_dir = tempfile::tempdir().expect("Failed to create temp dir");
+        let path = temp_dir.path().join("hash_test.als");
+        fs::write(&path, &data).expect("Failed to write test file");
+
+        let expected = format!("{:08x}", crc32fast::hash(&data));
+        assert_eq!(load_file_hash(&path).unwrap(), expected);
+    }
 
     #[test]
-    fn test_load_file_name() {
+    fn test_file_name_from_path() {
         // Test file with extension
         let path = PathBuf::from("C:/Users/jake/Desktop/test_file.txt");
-        assert_eq!(load_file_name(&path).unwrap(), "test_file.txt");
+        assert_eq!(file_name_from_path(&path).unwrap(), "test_file.txt");
 
         // Test file without extension
         let path = PathBuf::from("C:/Users/jake/Desktop/test_file");
-        assert_eq!(load_file_name(&path).unwrap(), "test_file");
+        assert_eq!(file_name_from_path(&path).unwrap(), "test_file");
 
         // Test file with multiple extensions
         let path = PathBuf::from("C:/Users/jake/Desktop/test_file.tar.gz");
-        assert_eq!(load_file_name(&path).unwrap(), "test_file.tar.gz");
+        assert_eq!(file_name_from_path(&path).unwrap(), "test_file.tar.gz");
 
         // Test file with dots in name
         let path = PathBuf::from("C:/Users/jake/Desktop/test.file.name.txt");
-        assert_eq!(load_file_name(&path).unwrap(), "test.file.name.txt");
+        assert_eq!(file_name_from_path(&path).unwrap(), "test.file.name.txt");
     }
 }
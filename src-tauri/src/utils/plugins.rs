@@ -1,6 +1,9 @@
 use std::fs;
 use std::path::PathBuf;
-use std::sync::Arc;
+use std::sync::Mutex;
+use std::time::SystemTime;
+
+use once_cell::sync::Lazy;
 
 use crate::{
     error::{DatabaseError, FileError},
@@ -9,38 +12,48 @@ use crate::{
 
 // LINE TRACKER FOR DEBUGGING
 
+/// Maps byte offsets to line numbers for log messages. It does not keep its own copy
+/// of the document: the caller passes the data it is already parsing, and newlines
+/// are counted incrementally as the position moves forward. Created disabled it
+/// reports line 1 for every position without scanning anything.
 #[derive(Clone)]
 pub(crate) struct LineTrackingBuffer {
-    data: Arc<Vec<u8>>,
+    enabled: bool,
     current_line: usize,
     current_position: usize,
 }
 
 impl LineTrackingBuffer {
-    pub(crate) fn new(data: Vec<u8>) -> Self {
+    pub(crate) fn new(enabled: bool) -> Self {
         Self {
-            data: Arc::new(data),
+            enabled,
             current_line: 1,
             current_position: 0,
         }
     }
 
-    pub(crate) fn get_line_number(&mut self, byte_position: u64) -> usize {
-        let byte_position_usize = usize::try_from(byte_position)
-            .unwrap_or_else(|_| self.data.len()); // Clamp to max usize or data length
+    /// Moves the tracker forward to `byte_position` in `data` and returns its line
+    pub(crate) fn get_line_number(&mut self, data: &[u8], byte_position: u64) -> usize {
+        if !self.enabled {
+            return self.current_line;
+        }
+        let end = usize::try_from(byte_position)
+            .unwrap_or(data.len()) // Clamp to max usize or data length
+            .min(data.len());
 
-        while self.current_position < byte_position_usize && self.current_position < self.data.len() {
-            if self.data[self.current_position] == b'\n' {
-                self.current_line += 1;
-            }
-            self.current_position += 1;
+        if end > self.current_position {
+            self.current_line += data[self.current_position..end]
+                .iter()
+                .filter(|&&byte| byte == b'\n')
+                .count();
+            self.current_position = end;
         }
         self.current_line
     }
 
-    #[allow(dead_code)]
-    pub(crate) fn update_position(&mut self, byte_position: u64) {
-        self.get_line_number(byte_position);
+    /// The line of the last position the tracker was moved to
+    pub(crate) fn current_line(&self) -> usize {
+        self.current_line
     }
 }
 
@@ -51,9 +64,12 @@ pub(crate) fn get_most_recent_db_file(directory: &PathBuf) -> Result<PathBuf, Da
             let entry = entry.ok()?;
             let path = entry.path();
             if path.extension().and_then(|ext| ext.to_str()) == Some("db") {
+                // The metadata fetched for the timestamp also says whether this is a
+                // file, so the chosen path needs no second stat
                 entry
                     .metadata()
                     .ok()
+                    .filter(|meta| meta.is_file())
                     .and_then(|meta| meta.modified().ok())
                     .map(|modified| (path, modified))
             } else {
@@ -62,15 +78,33 @@ pub(crate) fn get_most_recent_db_file(directory: &PathBuf) -> Result<PathBuf, Da
         })
         .max_by_key(|(_, modified)| *modified)
         .map(|(path, _)| path)
-        .ok_or_else(|| FileError::NotFound(directory.clone()))
-        .and_then(|path| {
-            if path.is_file() {
-                Ok(path)
-            } else {
-                Err(FileError::NotAFile(path))
-            }
-        })
-        .map_err(DatabaseError::FileError)
+        .ok_or_else(|| DatabaseError::FileError(FileError::NotFound(directory.clone())))
+}
+
+/// The last database directory that was listed, its modification time at that point
+/// and the database file chosen from it
+static MOST_RECENT_DB: Lazy<Mutex<Option<(PathBuf, SystemTime, PathBuf)>>> =
+    Lazy::new(|| Mutex::new(None));
+
+/// Like [`get_most_recent_db_file`], but the directory is only listed again when its
+/// modification time changes. Live adds a new database file when it is updated, which
+/// touches the directory, so every scan thread after the first pays one `stat`
+/// instead of a listing plus one per file.
+pub(crate) fn cached_most_recent_db_file(directory: &PathBuf) -> Result<PathBuf, DatabaseError> {
+    let modified = fs::metadata(directory).and_then(|meta| meta.modified()).ok();
+    let mut cached = MOST_RECENT_DB.lock().unwrap_or_else(|e| e.into_inner());
+
+    if let (Some(modified), Some((cached_dir, cached_modified, cached_path))) =
+        (modified, cached.as_ref())
+    {
+        if cached_dir == directory && *cached_modified == modified && cached_path.is_file() {
+            return Ok(cached_path.clone());
+        }
+    }
+
+    let path = get_most_recent_db_file(directory)?;
+    *cached = modified.map(|modified| (directory.clone(), modified, path.clone()));
+    Ok(path)
 }
 
 pub(crate) fn parse_plugin_format(dev_identifier: &str) -> Option<PluginFormat> {
@@ -86,3 +120,25 @@ pub(crate) fn parse_plugin_format(dev_identifier: &str) -> Option<PluginFormat>
         None
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_cached_most_recent_db_file_follows_new_files() {
+        let temp_dir = tempfile::tempdir().expect("Failed to create temp dir");
+        let directory = temp_dir.path().to_path_buf();
+        let first = directory.join("Live-plugins-1.db");
+        fs::write(&first, b"").expect("Failed to write test file");
+
+        assert_eq!(cached_most_recent_db_file(&directory).unwrap(), first);
+        // A repeated lookup against an unchanged directory reuses the cached answer
+        assert_eq!(cached_most_recent_db_file(&directory).unwrap(), first);
+
+        // Removing the cached file invalidates the entry even if the directory's
+        // modification time has too coarse a resolution to change
+        fs::remove_file(&first).expect("Failed to remove test file");
+        assert!(cached_most_recent_db_file(&directory).is_err());
+    }
+}
@@ -6,16 +6,36 @@ use log::{debug, error, trace, warn};
 #[allow(unused_imports)]
 use crate::error::{AttributeError, SampleError, XmlParseError};
 
+/// Decodes a hex string into bytes, skipping any whitespace between digits.
+/// Ableton wraps the hex in tabs and newlines, so this avoids building a cleaned
+/// copy of the string before decoding it.
+pub(crate) fn decode_hex(hex_str: &str) -> Result<Vec<u8>, hex::FromHexError> {
+    let mut bytes = Vec::with_capacity(hex_str.len() / 2);
+    let mut high_nibble: Option<u8> = None;
+
+    for (index, c) in hex_str.char_indices() {
+        if c.is_whitespace() {
+            continue;
+        }
+        let nibble = c
+            .to_digit(16)
+            .ok_or(hex::FromHexError::InvalidHexCharacter { c, index })? as u8;
+        match high_nibble.take() {
+            Some(high) => bytes.push(high << 4 | nibble),
+            None => high_nibble = Some(nibble),
+        }
+    }
+
+    if high_nibble.is_some() {
+        return Err(hex::FromHexError::OddLength);
+    }
+    Ok(bytes)
+}
+
 pub(crate) fn decode_sample_path(abs_hash_path: &str) -> Result<PathBuf, SampleError> {
     trace!("Starting sample path decoding");
 
-    let cleaned_path = abs_hash_path
-        .chars()
-        .filter(|c| !c.is_whitespace())
-        .collect::<String>();
-    trace!("Cleaned absolute hash path: {:?}", cleaned_path);
-
-    let byte_data = hex::decode(&cleaned_path).map_err(|e| {
+    let byte_data = decode_hex(abs_hash_path).map_err(|e| {
         warn!("Failed to decode hex string: {:?}", e);
         SampleError::HexDecodeError(e)
     })?;
@@ -27,8 +47,8 @@ pub(crate) fn decode_sample_path(abs_hash_path: &str) -> Result<PathBuf, SampleE
         warn!("Errors encountered during UTF-16 decoding");
     }
 
-    let path_string = cow.replace('\0', "");
-    let path = PathBuf::from(path_string);
+    // The path is stored as a null-terminated wide string, so nulls only appear at the end
+    let path = PathBuf::from(cow.trim_end_matches('\0'));
     trace!("Decoded path: {:?}", path);
 
     match path.canonicalize() {
@@ -45,3 +65,23 @@ pub(crate) fn decode_sample_path(abs_hash_path: &str) -> Result<PathBuf, SampleE
         }
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_decode_hex_skips_whitespace() {
+        assert_eq!(decode_hex("43\n\t00 3A00").unwrap(), vec![0x43, 0x00, 0x3A, 0x00]);
+        assert_eq!(decode_hex("").unwrap(), Vec::<u8>::new());
+    }
+
+    #[test]
+    fn test_decode_hex_rejects_invalid_input() {
+        assert!(matches!(decode_hex("4"), Err(hex::FromHexError::OddLength)));
+        assert!(matches!(
+            decode_hex("4G"),
+            Err(hex::FromHexError::InvalidHexCharacter { c: 'G', index: 1 })
+        ));
+    }
+}
@@ -1,8 +1,11 @@
 #![allow(dead_code)]
 use std::path::{Path, PathBuf};
-use std::collections::HashSet;
-use std::sync::{mpsc, Arc};
-use tokio::sync::Mutex;
+use std::collections::{HashMap, HashSet};
+use std::fs;
+use std::sync::mpsc::{self, RecvTimeoutError};
+use std::sync::{Arc, Mutex, MutexGuard};
+use std::thread;
+use std::time::{Duration, Instant};
 use notify::{
     self,
     Event,
@@ -15,15 +18,27 @@ use walkdir::WalkDir;
 use std::error::Error;
 use std::time::SystemTime;
 use log::{debug, info, warn};
+use crate::config::CONFIG;
 use crate::database::LiveSetDatabase;
+use crate::error::DatabaseError;
+use crate::scan::project_scanner::is_project_name;
 
+/// Watches project folders for changes. The database handle is the same one held in
+/// `AppState`, so the watcher reuses the app's open connection instead of opening its own.
 pub struct FileWatcher {
-    watcher: notify::RecommendedWatcher,
+    watcher: Box<dyn Watcher + Send>,
     watch_paths: HashSet<PathBuf>,
+    /// The watched paths actually registered with the OS: those not already inside
+    /// another watched path, whose recursive watch covers them
+    watch_roots: HashSet<PathBuf>,
     event_tx: mpsc::Sender<FileEvent>,
     db: Arc<Mutex<LiveSetDatabase>>,
 }
 
+/// How long a path must go without new events before they are forwarded. A single
+/// save from Ableton arrives as several events, which are coalesced into one.
+const DEBOUNCE_WINDOW: Duration = Duration::from_millis(500);
+
 #[derive(Debug)]
 pub enum FileEvent {
     Created(PathBuf),
@@ -32,29 +47,79 @@ pub enum FileEvent {
     Renamed { from: PathBuf, to: PathBuf },
 }
 
+impl FileEvent {
+    /// The path the event leaves behind, used to coalesce events per file
+    fn path(&self) -> &Path {
+        match self {
+            FileEvent::Created(path) | FileEvent::Modified(path) | FileEvent::Deleted(path) => path,
+            FileEvent::Renamed { to, .. } => to,
+        }
+    }
+}
+
 impl FileWatcher {
-    /// Creates a new FileWatcher instance
+    /// Creates a new FileWatcher instance, polling instead of using native
+    /// notifications when `watcher_poll_interval_secs` is set in the config
     pub fn new(db: Arc<Mutex<LiveSetDatabase>>) -> notify::Result<(Self, mpsc::Receiver<FileEvent>)> {
+        let poll_interval = CONFIG
+            .as_ref()
+            .ok()
+            .and_then(|config| config.watcher_poll_interval_secs)
+            .map(Duration::from_secs);
+        Self::with_poll_interval(db, poll_interval)
+    }
+
+    /// Creates a new FileWatcher instance. With a poll interval the watched folders
+    /// are rescanned on that schedule, which is slower to react but does not lose
+    /// events on network shares the way native notifications can.
+    pub fn with_poll_interval(
+        db: Arc<Mutex<LiveSetDatabase>>,
+        poll_interval: Option<Duration>,
+    ) -> notify::Result<(Self, mpsc::Receiver<FileEvent>)> {
         debug!("Creating new FileWatcher instance");
         let (tx, rx) = mpsc::channel();
-        let event_tx = tx.clone();
-        
-        let watcher = notify::recommended_watcher(move |res: notify::Result<notify::Event>| {
-            match res {
+
+        // The notify callback only queues the raw event, so the watcher thread goes
+        // straight back to draining OS notifications. Classifying and debouncing
+        // happen on a separate thread, which exits once the watcher is dropped.
+        let (raw_tx, raw_rx) = mpsc::channel::<notify::Result<Event>>();
+        let debounced_tx = tx.clone();
+        thread::spawn(move || {
+            run_debouncer(raw_rx, debounced_tx, |res, events| match res {
                 Ok(event) => {
                     debug!("Received filesystem event: {:?}", event.kind);
-                    if let Err(e) = handle_fs_event(&event, &event_tx) {
-                        warn!("Failed to handle filesystem event: {}", e);
-                    }
+                    collect_fs_events(&event, events);
                 }
                 Err(e) => warn!("Error from filesystem watcher: {}", e),
+            })
+        });
+
+        // Events that touch no .als file are dropped here, before they are queued
+        let handler = move |res: notify::Result<notify::Event>| {
+            let relevant = match &res {
+                Ok(event) => event.paths.iter().any(|path| is_project_file(path)),
+                Err(_) => true,
+            };
+            if relevant {
+                let _ = raw_tx.send(res);
+            }
+        };
+        let watcher: Box<dyn Watcher + Send> = match poll_interval {
+            Some(interval) => {
+                info!("Using polling file watcher with {:?} interval", interval);
+                Box::new(notify::PollWatcher::new(
+                    handler,
+                    notify::Config::default().with_poll_interval(interval),
+                )?)
             }
-        })?;
+            None => Box::new(notify::recommended_watcher(handler)?),
+        };
 
         info!("FileWatcher created successfully");
         Ok((Self {
             watcher,
             watch_paths: HashSet::new(),
+            watch_roots: HashSet::new(),
             event_tx: tx,
             db,
         }, rx))
@@ -62,21 +127,27 @@ impl FileWatcher {
 
     /// Add a new directory to watch
     pub fn add_watch_path(&mut self, path: PathBuf) -> notify::Result<()> {
-        debug!("Adding watch path: {:?}", path);
-        if self.watch_paths.insert(path.clone()) {
-            self.watcher.watch(&path, RecursiveMode::Recursive)?;
-            info!("Successfully added watch path: {:?}", path);
-        } else {
-            debug!("Path already being watched: {:?}", path);
+        self.add_watch_paths(std::iter::once(path))
+    }
+
+    /// Adds several directories at once. The set of paths is updated first and the
+    /// OS watches are reconciled once at the end, so a directory nested inside
+    /// another one in the batch is never registered and walked on its own.
+    pub fn add_watch_paths(&mut self, paths: impl IntoIterator<Item = PathBuf>) -> notify::Result<()> {
+        for path in paths {
+            debug!("Adding watch path: {:?}", path);
+            if !self.watch_paths.insert(path.clone()) {
+                debug!("Path already being watched: {:?}", path);
+            }
         }
-        Ok(())
+        self.sync_watch_roots()
     }
 
     /// Remove a watched directory
     pub fn remove_watch_path(&mut self, path: &Path) -> notify::Result<()> {
         debug!("Removing watch path: {:?}", path);
         if self.watch_paths.remove(path) {
-            self.watcher.unwatch(path)?;
+            self.sync_watch_roots()?;
             info!("Successfully removed watch path: {:?}", path);
         } else {
             debug!("Path was not being watched: {:?}", path);
@@ -84,6 +155,37 @@ impl FileWatcher {
         Ok(())
     }
 
+    /// Registers the outermost watched paths with the OS and drops registrations that
+    /// are no longer needed, either because the path was removed or because a newly
+    /// added parent now covers it
+    fn sync_watch_roots(&mut self) -> notify::Result<()> {
+        let roots: HashSet<PathBuf> = self
+            .watch_paths
+            .iter()
+            .filter(|path| {
+                !self
+                    .watch_paths
+                    .iter()
+                    .any(|other| other != *path && path.starts_with(other))
+            })
+            .cloned()
+            .collect();
+
+        let stale: Vec<PathBuf> = self.watch_roots.difference(&roots).cloned().collect();
+        for path in stale {
+            self.watch_roots.remove(&path);
+            self.watcher.unwatch(&path)?;
+        }
+        for path in roots {
+            if !self.watch_roots.contains(&path) {
+                self.watcher.watch(&path, RecursiveMode::Recursive)?;
+                info!("Successfully added watch path: {:?}", path);
+                self.watch_roots.insert(path);
+            }
+        }
+        Ok(())
+    }
+
     /// Check if a path is being watched
     pub fn is_watching(&self, path: &Path) -> bool {
         let is_watching = self.watch_paths.contains(path);
@@ -96,10 +198,23 @@ impl FileWatcher {
         &self.watch_paths
     }
 
+    /// Get the watched paths that are registered with the OS
+    pub fn get_watch_roots(&self) -> &HashSet<PathBuf> {
+        &self.watch_roots
+    }
+
+    /// Locks the shared database. The guard is only held for single queries and never
+    /// across an await, so a blocking lock is fine here.
+    fn lock_db(&self) -> Result<MutexGuard<'_, LiveSetDatabase>, DatabaseError> {
+        self.db.lock().map_err(|e| {
+            DatabaseError::InvalidOperation(format!("Database lock poisoned: {}", e))
+        })
+    }
+
     /// Check for changes that occurred while the application was not running
     pub async fn check_offline_changes(&self) -> Result<(), Box<dyn Error>> {
         debug!("Checking for offline changes");
-        let db_guard = self.db.lock().await;
+        let db_guard = self.lock_db()?;
         let active_projects = db_guard.get_all_projects_with_status(Some(true))?;
         debug!("Found {} active projects to check", active_projects.len());
         drop(db_guard);
@@ -130,22 +245,22 @@ impl FileWatcher {
         debug!("Starting scan for new files");
         let mut found_paths = HashSet::new();
         
-        // First collect all .als files
-        for watch_path in &self.watch_paths {
+        // First collect all .als files. Nested watch paths are covered by their
+        // root, so only the roots are walked.
+        for watch_path in &self.watch_roots {
             debug!("Scanning directory: {:?}", watch_path);
             for entry in WalkDir::new(watch_path).into_iter().filter_map(|e| e.ok()) {
-                let path = entry.path();
-                if path.extension().map_or(false, |ext| ext == "als") {
-                    debug!("Found .als file: {:?}", path);
-                    found_paths.insert(path.to_path_buf());
+                if !entry.file_type().is_dir() && is_project_name(entry.file_name()) {
+                    debug!("Found .als file: {:?}", entry.path());
+                    found_paths.insert(entry.into_path());
                 }
             }
         }
         
         debug!("Found {} potential new files", found_paths.len());
-        let mut db_guard = self.db.lock().await;
+        let known_paths = self.lock_db()?.get_project_paths()?;
         for path in found_paths {
-            if db_guard.get_project_by_path(&path.to_string_lossy())?.is_none() {
+            if !known_paths.contains(path.to_string_lossy().as_ref()) {
                 debug!("New file detected: {:?}", path);
                 self.event_tx.send(FileEvent::Created(path))?;
             }
@@ -156,70 +271,202 @@ impl FileWatcher {
     }
 }
 
-/// Helper function to handle filesystem events
-fn handle_fs_event(event: &Event, tx: &mpsc::Sender<FileEvent>) -> notify::Result<()> {
-    debug!("Handling filesystem event: {:?}", event.kind);
-    match event.kind {
-        EventKind::Create(create_kind) => {
-            match create_kind {
-                CreateKind::File => {
-                    for path in &event.paths {
-                        if path.extension().map_or(false, |ext| ext == "als") {
-                            debug!("File created: {:?}", path);
-                            tx.send(FileEvent::Created(path.clone()))?;
-                        }
+/// Forwards events once their path has been quiet for `DEBOUNCE_WINDOW`, merging
+/// events for the same path so each save is reported once
+pub(crate) fn debounce_events(raw_rx: mpsc::Receiver<FileEvent>, tx: mpsc::Sender<FileEvent>) {
+    run_debouncer(raw_rx, tx, |event, events| events.push(event));
+}
+
+/// Size and modification time last forwarded for each file. A save that leaves both
+/// unchanged, or a second burst of events for a write that was already reported,
+/// is not passed on to be reparsed.
+#[derive(Default)]
+pub(crate) struct StatCache {
+    seen: HashMap<PathBuf, (SystemTime, u64)>,
+}
+
+impl StatCache {
+    /// Records the file's current stat and returns whether it differs from the last
+    /// one recorded. Files that cannot be stat'ed count as changed.
+    pub(crate) fn changed(&mut self, path: &Path) -> bool {
+        match fs::metadata(path).and_then(|metadata| Ok((metadata.modified()?, metadata.len()))) {
+            Ok(stat) => self.seen.insert(path.to_path_buf(), stat) != Some(stat),
+            Err(_) => {
+                self.seen.remove(path);
+                true
+            }
+        }
+    }
+
+    /// Updates the cache for an event and returns whether it should be forwarded.
+    /// Only modifications are ever dropped.
+    fn should_forward(&mut self, event: &FileEvent) -> bool {
+        match event {
+            FileEvent::Modified(path) => self.changed(path),
+            FileEvent::Created(path) => {
+                self.changed(path);
+                true
+            }
+            FileEvent::Renamed { from, to } => {
+                self.seen.remove(from);
+                self.changed(to);
+                true
+            }
+            FileEvent::Deleted(path) => {
+                self.seen.remove(path);
+                true
+            }
+        }
+    }
+}
+
+/// Debounce loop shared by the watcher and `debounce_events`. `translate` turns each
+/// received message into zero or more file events on this thread.
+fn run_debouncer<T, F>(raw_rx: mpsc::Receiver<T>, tx: mpsc::Sender<FileEvent>, mut translate: F)
+where
+    F: FnMut(T, &mut Vec<FileEvent>),
+{
+    let mut pending: Vec<(FileEvent, Instant)> = Vec::new();
+    let mut translated = Vec::new();
+    let mut stat_cache = StatCache::default();
+
+    loop {
+        // Wait for the next event, but no longer than the oldest pending event is due
+        let received = match pending.iter().map(|(_, seen)| *seen).min() {
+            Some(oldest) => {
+                let due = oldest + DEBOUNCE_WINDOW;
+                raw_rx.recv_timeout(due.saturating_duration_since(Instant::now()))
+            }
+            None => raw_rx.recv().map_err(|_| RecvTimeoutError::Disconnected),
+        };
+
+        match received {
+            Ok(message) => {
+                translate(message, &mut translated);
+                for event in translated.drain(..) {
+                    coalesce_event(&mut pending, event);
+                }
+            }
+            Err(RecvTimeoutError::Timeout) => {}
+            Err(RecvTimeoutError::Disconnected) => {
+                for (event, _) in pending {
+                    if stat_cache.should_forward(&event) {
+                        let _ = tx.send(event);
                     }
                 }
-                _ => debug!("Ignoring non-file creation event"),
+                debug!("Filesystem event source closed, stopping debouncer");
+                return;
             }
         }
-        EventKind::Modify(modify_kind) => {
-            match modify_kind {
-                ModifyKind::Data(_) => {
-                    for path in &event.paths {
-                        if path.extension().map_or(false, |ext| ext == "als") {
-                            debug!("File modified: {:?}", path);
-                            tx.send(FileEvent::Modified(path.clone()))?;
-                        }
-                    }
+
+        let now = Instant::now();
+        let mut i = 0;
+        while i < pending.len() {
+            if now.duration_since(pending[i].1) >= DEBOUNCE_WINDOW {
+                let (event, _) = pending.remove(i);
+                if stat_cache.should_forward(&event) && tx.send(event).is_err() {
+                    return;
                 }
-                ModifyKind::Name(rename_mode) => {
-                    match rename_mode {
-                        RenameMode::Both => {
-                            if event.paths.len() == 2 {
-                                let from = &event.paths[0];
-                                let to = &event.paths[1];
-                                if to.extension().map_or(false, |ext| ext == "als") {
-                                    debug!("File renamed: {:?} -> {:?}", from, to);
-                                    tx.send(FileEvent::Renamed {
-                                        from: from.clone(),
-                                        to: to.clone(),
-                                    })?;
-                                }
-                            }
-                        }
-                        _ => debug!("Ignoring non-Both rename event: {:?}", rename_mode),
-                    }
+            } else {
+                i += 1;
+            }
+        }
+    }
+}
+
+/// Merges an event into the pending list, restarting its path's quiet period
+fn coalesce_event(pending: &mut Vec<(FileEvent, Instant)>, event: FileEvent) {
+    let now = Instant::now();
+    let existing = pending.iter().position(|(queued, _)| queued.path() == event.path());
+
+    match existing {
+        Some(index) => {
+            let queued_create = matches!(pending[index].0, FileEvent::Created(_));
+            match event {
+                // A file created and removed within the window never needs processing
+                FileEvent::Deleted(_) if queued_create => {
+                    pending.remove(index);
                 }
-                _ => debug!("Ignoring non-data/name modification event: {:?}", modify_kind),
+                // Writes after a create are part of the create
+                FileEvent::Modified(_) if queued_create => pending[index].1 = now,
+                event => pending[index] = (event, now),
+            }
+        }
+        None => pending.push((event, now)),
+    }
+}
+
+/// Whether a path looks like an Ableton Live set
+fn is_project_file(path: &Path) -> bool {
+    path.file_name().map_or(false, is_project_name)
+}
+
+/// Translates a filesystem event into the file events it implies for .als files.
+/// Backends differ in how specific they are, so the `Any` kinds are handled like
+/// their file counterparts.
+pub(crate) fn collect_fs_events(event: &Event, events: &mut Vec<FileEvent>) {
+    debug!("Handling filesystem event: {:?}", event.kind);
+    let project_paths = || event.paths.iter().filter(|path| is_project_file(path));
+    match event.kind {
+        EventKind::Create(CreateKind::File | CreateKind::Any) => {
+            for path in project_paths() {
+                debug!("File created: {:?}", path);
+                events.push(FileEvent::Created(path.clone()));
             }
         }
-        EventKind::Remove(remove_kind) => {
-            match remove_kind {
-                RemoveKind::File => {
-                    for path in &event.paths {
-                        if path.extension().map_or(false, |ext| ext == "als") {
-                            debug!("File deleted: {:?}", path);
-                            tx.send(FileEvent::Deleted(path.clone()))?;
-                        }
+        EventKind::Modify(ModifyKind::Data(_) | ModifyKind::Any) => {
+            for path in project_paths() {
+                debug!("File modified: {:?}", path);
+                events.push(FileEvent::Modified(path.clone()));
+            }
+        }
+        EventKind::Modify(ModifyKind::Name(rename_mode)) => match rename_mode {
+            RenameMode::Both if event.paths.len() == 2 => {
+                let from = &event.paths[0];
+                let to = &event.paths[1];
+                match (is_project_file(from), is_project_file(to)) {
+                    (true, true) => {
+                        debug!("File renamed: {:?} -> {:?}", from, to);
+                        events.push(FileEvent::Renamed {
+                            from: from.clone(),
+                            to: to.clone(),
+                        });
+                    }
+                    // Saves that write a temp file and rename it over the set
+                    (false, true) => {
+                        debug!("File replaced by rename: {:?} -> {:?}", from, to);
+                        events.push(FileEvent::Created(to.clone()));
                     }
+                    (true, false) => {
+                        debug!("File renamed away: {:?} -> {:?}", from, to);
+                        events.push(FileEvent::Deleted(from.clone()));
+                    }
+                    (false, false) => {}
                 }
-                _ => debug!("Ignoring non-file removal event"),
+            }
+            // Backends that report the two halves of a rename separately
+            RenameMode::To => {
+                for path in project_paths() {
+                    debug!("File moved in: {:?}", path);
+                    events.push(FileEvent::Created(path.clone()));
+                }
+            }
+            RenameMode::From => {
+                for path in project_paths() {
+                    debug!("File moved out: {:?}", path);
+                    events.push(FileEvent::Deleted(path.clone()));
+                }
+            }
+            _ => debug!("Ignoring rename event: {:?}", rename_mode),
+        },
+        EventKind::Remove(RemoveKind::File | RemoveKind::Any) => {
+            for path in project_paths() {
+                debug!("File deleted: {:?}", path);
+                events.push(FileEvent::Deleted(path.clone()));
             }
         }
         _ => debug!("Ignoring unhandled event kind: {:?}", event.kind),
     }
-    Ok(())
 }
 
 impl Drop for FileWatcher {
@@ -3,15 +3,16 @@ use std::collections::HashSet;
 use std::path::{Path, PathBuf};
 use std::fs::{self, File};
 use std::io::Write;
-use std::sync::Arc;
+use std::sync::{Arc, Mutex};
 use std::time::Duration;
 use tempfile::TempDir;
-use tokio::sync::Mutex;
 use tokio::time::sleep;
 use log::{debug, info};
 
 use crate::database::LiveSetDatabase;
-use crate::watcher::file_watcher::{FileEvent, FileWatcher};
+use crate::watcher::file_watcher::{
+    collect_fs_events, debounce_events, FileEvent, FileWatcher, StatCache,
+};
 
 struct TestEnvironment {
     temp_dir: TempDir,
@@ -283,4 +284,85 @@ async fn test_scan_for_new_files() {
     
     assert!(found_files.contains(&path1), "Did not find existing1.als");
     assert!(found_files.contains(&path2), "Did not find existing2.als");
-} 
\ No newline at end of file
+}
+
+#[test]
+fn test_debounce_coalesces_events_per_path() {
+    let (raw_tx, raw_rx) = std::sync::mpsc::channel();
+    let (tx, rx) = std::sync::mpsc::channel();
+
+    let song = PathBuf::from("song.als");
+    let temp = PathBuf::from("temp.als");
+    raw_tx.send(FileEvent::Created(song.clone())).unwrap();
+    raw_tx.send(FileEvent::Modified(song.clone())).unwrap();
+    raw_tx.send(FileEvent::Modified(song.clone())).unwrap();
+    raw_tx.send(FileEvent::Created(temp.clone())).unwrap();
+    raw_tx.send(FileEvent::Deleted(temp)).unwrap();
+    drop(raw_tx);
+
+    // Closing the source flushes whatever is still pending
+    debounce_events(raw_rx, tx);
+    let events: Vec<FileEvent> = rx.try_iter().collect();
+
+    assert_eq!(events.len(), 1, "Expected one coalesced event, got {:?}", events);
+    match &events[0] {
+        FileEvent::Created(path) => assert_eq!(path, &song),
+        other => panic!("Expected a creation event, got {:?}", other),
+    }
+}
+
+#[test]
+fn test_rename_over_project_is_a_create() {
+    use notify::event::{EventKind, ModifyKind, RenameMode};
+
+    // Saving through a temp file renames it over the set
+    let song = PathBuf::from("song.als");
+    let event = notify::Event::new(EventKind::Modify(ModifyKind::Name(RenameMode::Both)))
+        .add_path(PathBuf::from("song.als.tmp"))
+        .add_path(song.clone());
+    let mut events = Vec::new();
+    collect_fs_events(&event, &mut events);
+
+    assert_eq!(events.len(), 1, "Expected one event, got {:?}", events);
+    match &events[0] {
+        FileEvent::Created(path) => assert_eq!(path, &song),
+        other => panic!("Expected a creation event, got {:?}", other),
+    }
+}
+
+#[test]
+fn test_stat_cache_skips_unchanged_files() {
+    let temp_dir = TempDir::new().expect("Failed to create temp directory");
+    let path = temp_dir.path().join("song.als");
+    fs::write(&path, b"first").expect("Failed to write test file");
+
+    let mut cache = StatCache::default();
+    assert!(cache.changed(&path), "First sighting should count as a change");
+    assert!(!cache.changed(&path), "Untouched file should not count as a change");
+
+    fs::write(&path, b"second version").expect("Failed to rewrite test file");
+    assert!(cache.changed(&path), "Rewritten file should count as a change");
+}
+
+#[test]
+fn test_nested_watch_paths_share_one_watch() {
+    let temp_dir = TempDir::new().expect("Failed to create temp directory");
+    let outer = temp_dir.path().to_path_buf();
+    let inner = outer.join("Projects");
+    fs::create_dir(&inner).expect("Failed to create nested directory");
+
+    let db = Arc::new(Mutex::new(
+        LiveSetDatabase::new(PathBuf::from(":memory:")).expect("Failed to create test database")
+    ));
+    let (mut watcher, _rx) = FileWatcher::new(db).expect("Failed to create file watcher");
+
+    watcher
+        .add_watch_paths(vec![inner.clone(), outer.clone()])
+        .expect("Failed to add watch paths");
+    assert_eq!(watcher.get_watch_paths().len(), 2);
+    assert_eq!(watcher.get_watch_roots(), &HashSet::from([outer.clone()]));
+
+    // Once the parent goes, the nested folder needs a watch of its own
+    watcher.remove_watch_path(&outer).expect("Failed to remove watch path");
+    assert_eq!(watcher.get_watch_roots(), &HashSet::from([inner]));
+}
@@ -36,6 +36,37 @@ type Project = {
   samples: string[]
 }
 
+// Summary button for a list column. The menu items are only built while the menu
+// is open, so rendering a page of rows costs one button per cell, not one element
+// per plugin or sample.
+function ListMenuCell({ items, label }: { items: string[]; label: string }) {
+  const [open, setOpen] = useState(false)
+
+  return (
+    <DropdownMenu open={open} onOpenChange={setOpen}>
+      <DropdownMenuTrigger asChild>
+        <Button 
+          variant="ghost" 
+          size="sm" 
+          className="h-6 w-full justify-between font-normal text-xs"
+        >
+          {`${items.length} ${label}`}
+          <ChevronDown className="h-3 w-3 opacity-50" />
+        </Button>
+      </DropdownMenuTrigger>
+      {open && (
+        <DropdownMenuContent align="start" className="w-[200px]">
+          {items.map((item, index) => (
+            <DropdownMenuItem key={index} className="text-xs">
+              {item}
+            </DropdownMenuItem>
+          ))}
+        </DropdownMenuContent>
+      )}
+    </DropdownMenu>
+  )
+}
+
 // Define columns
 const columns: ColumnDef<Project>[] = [
   { 
@@ -202,53 +233,13 @@ const columns: ColumnDef<Project>[] = [
     accessorKey: "plugins",
     header: "Plugins",
     size: 120,
-    cell: ({ row }) => (
-      <DropdownMenu>
-        <DropdownMenuTrigger asChild>
-          <Button 
-            variant="ghost" 
-            size="sm" 
-            className="h-6 w-full justify-between font-normal text-xs"
-          >
-            {`${row.original.plugins.length} plugins`}
-            <ChevronDown className="h-3 w-3 opacity-50" />
-          </Button>
-        </DropdownMenuTrigger>
-        <DropdownMenuContent align="start" className="w-[200px]">
-          {row.original.plugins.map((plugin, index) => (
-            <DropdownMenuItem key={index} className="text-xs">
-              {plugin}
-            </DropdownMenuItem>
-          ))}
-        </DropdownMenuContent>
-      </DropdownMenu>
-    ),
+    cell: ({ row }) => <ListMenuCell items={row.original.plugins} label="plugins" />,
   },
   {
     accessorKey: "samples",
     header: "Samples",
     size: 120,
-    cell: ({ row }) => (
-      <DropdownMenu>
-        <DropdownMenuTrigger asChild>
-          <Button 
-            variant="ghost" 
-            size="sm" 
-            className="h-6 w-full justify-between font-normal text-xs"
-          >
-            {`${row.original.samples.length} samples`}
-            <ChevronDown className="h-3 w-3 opacity-50" />
-          </Button>
-        </DropdownMenuTrigger>
-        <DropdownMenuContent align="start" className="w-[200px]">
-          {row.original.samples.map((sample, index) => (
-            <DropdownMenuItem key={index} className="text-xs">
-              {sample}
-            </DropdownMenuItem>
-          ))}
-        </DropdownMenuContent>
-      </DropdownMenu>
-    ),
+    cell: ({ row }) => <ListMenuCell items={row.original.samples} label="samples" />,
   },
 ]
 
@@ -324,6 +315,14 @@ export function DetailsView() {
     overscan: 10,
   })
 
+  // Only the rows in view are rendered; spacer rows stand in for the rest so the
+  // scroll height still matches the full result list
+  const virtualRows = rowVirtualizer.getVirtualItems()
+  const paddingTop = virtualRows.length > 0 ? virtualRows[0].start : 0
+  const paddingBottom = virtualRows.length > 0
+    ? rowVirtualizer.getTotalSize() - virtualRows[virtualRows.length - 1].end
+    : 0
+
   return (
     <div className="h-full flex flex-col">
       <div 
@@ -364,7 +363,12 @@ export function DetailsView() {
             ))}
           </thead>
           <tbody>
-            {rowVirtualizer.getVirtualItems().map(virtualRow => {
+            {paddingTop > 0 && (
+              <tr>
+                <td colSpan={columns.length} style={{ height: paddingTop }} />
+              </tr>
+            )}
+            {virtualRows.map(virtualRow => {
               const row = rows[virtualRow.index]
               return (
                 <tr 
@@ -388,6 +392,11 @@ export function DetailsView() {
                 </tr>
               )
             })}
+            {paddingBottom > 0 && (
+              <tr>
+                <td colSpan={columns.length} style={{ height: paddingBottom }} />
+              </tr>
+            )}
           </tbody>
         </table>
       </div>